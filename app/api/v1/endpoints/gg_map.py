@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends
 
 from app.core.container import Container
 from app.schema.gg_map_schema import DirectionRequest
-from app.services import GGMapService
+from app.services import AsyncGGMapService
 
 router = APIRouter(
     prefix="/gg-map",
@@ -15,6 +15,6 @@ router = APIRouter(
 @inject
 async def directions(
     direction_request: DirectionRequest = Depends(DirectionRequest),
-    service: GGMapService = Depends(Provide[Container.gg_map_service]),
+    service: AsyncGGMapService = Depends(Provide[Container.async_gg_map_service]),
 ):
-    return service.get_directions(direction_request)
+    return await service.get_directions(direction_request)
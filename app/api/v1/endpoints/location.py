@@ -1,22 +1,27 @@
 from typing import List
+from uuid import UUID
 
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Response
 
 from app.core.container import Container
+from app.core.jobs import JobRegistry
 from app.schema.base_schema import Blank, FindResult
 from app.schema.gg_map_schema import DirectionRequest
 from app.schema.google_api_schema import RouteResponse
+from app.schema.job_schema import JobResponse
 from app.schema.location_schema import (
     CreateEditLocation,
     DetailedLocationResponse,
     FindLocation,
     LocationByRadiusQuery,
+    LocationCluster,
+    LocationClusterQuery,
     LocationResponse,
     LocationResponseWithAmenities,
     SearchLocation,
 )
-from app.services.location_service import LocationService
+from app.services.location_service import AsyncLocationService, LocationService
 from app.util.decode_base64 import decode_base64
 
 router = APIRouter(
@@ -29,22 +34,36 @@ router = APIRouter(
 @inject
 async def get_location_on_route(
     direction: DirectionRequest = Depends(DirectionRequest),
-    service: LocationService = Depends(Provide[Container.location_service]),
+    service: AsyncLocationService = Depends(Provide[Container.async_location_service]),
 ):
-    return service.get_location_by_direction(direction)
+    return await service.get_location_by_direction(direction)
 
 
-@router.get("/sync-elastic-data", status_code=204)
+@router.post("/sync-elastic-data", response_model=JobResponse, status_code=202)
 @inject
-async def sync_elastic_data(
+def sync_elastic_data(
+    background_tasks: BackgroundTasks,
     service: LocationService = Depends(Provide[Container.location_service]),
+    job_registry: JobRegistry = Depends(Provide[Container.job_registry]),
+):
+    job, created = job_registry.start("sync-elastic-data")
+    if created:
+        background_tasks.add_task(job_registry.run, job, service.sync_elastic_data)
+    return job
+
+
+@router.get("/sync-elastic-data/{job_id}", response_model=JobResponse)
+@inject
+def get_sync_elastic_data_job(
+    job_id: UUID,
+    job_registry: JobRegistry = Depends(Provide[Container.job_registry]),
 ):
-    service.sync_elastic_data()
+    return job_registry.get(job_id)
 
 
 @router.get("", response_model=FindResult[LocationResponseWithAmenities])
 @inject
-async def get_location_list(
+def get_location_list(
     find_query: FindLocation = Depends(FindLocation),
     service: LocationService = Depends(Provide[Container.location_service]),
 ):
@@ -55,28 +74,29 @@ async def get_location_list(
 @inject
 async def get_location_list_by_radius(
     find_query: LocationByRadiusQuery = Depends(LocationByRadiusQuery),
-    service: LocationService = Depends(Provide[Container.location_service]),
+    service: AsyncLocationService = Depends(Provide[Container.async_location_service]),
 ):
-    return service.get_by_radius(find_query)
+    return await service.get_by_radius(find_query)
 
 
 @router.get("/nearby", response_model=List[LocationResponse])
 @inject
 async def search_nearby_location(
     find_query: LocationByRadiusQuery = Depends(LocationByRadiusQuery),
-    service: LocationService = Depends(Provide[Container.location_service]),
+    service: AsyncLocationService = Depends(Provide[Container.async_location_service]),
 ):
-    return service.search_nearby_location(find_query)
+    return await service.search_nearby_location(find_query)
 
 
 @router.get("/search", response_model=List[LocationResponse])
 @inject
 async def get_list_location(
+    response: Response,
     is_fuzzi: bool = Query(description="Fuzzi search", default=False),
     charger_type: List[str] = Query([], description="list charge types"),
     searchlocation: SearchLocation = Depends(SearchLocation),
     amenities: List[str] = Query([], description="list amenities"),
-    service: LocationService = Depends(Provide[Container.location_service]),
+    service: AsyncLocationService = Depends(Provide[Container.async_location_service]),
 ):
     if (
         all(
@@ -86,28 +106,45 @@ async def get_list_location(
                 searchlocation.power_output_lte,
                 searchlocation.query,
                 searchlocation.station_count,
+                searchlocation.open_at,
             ]
         )
+        and not searchlocation.open_now
         and len(charger_type) == 0
     ):
         return []
 
     decoded_charge_types = [decode_base64(item).decode("utf-8") for item in charger_type]
-    return service.search_by_elastic(searchlocation, is_fuzzi, decoded_charge_types, amenities)
+    page = await service.search_by_elastic(searchlocation, is_fuzzi, decoded_charge_types, amenities)
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.founds
+
+
+@router.get("/clusters", response_model=List[LocationCluster])
+@inject
+async def get_location_clusters(
+    cluster_query: LocationClusterQuery = Depends(LocationClusterQuery),
+    charger_type: List[str] = Query([], description="list charge types"),
+    amenities: List[str] = Query([], description="list amenities"),
+    service: AsyncLocationService = Depends(Provide[Container.async_location_service]),
+):
+    decoded_charge_types = [decode_base64(item).decode("utf-8") for item in charger_type]
+    return await service.get_clusters(cluster_query, decoded_charge_types, amenities)
 
 
 @router.get("/{location_id}", response_model=DetailedLocationResponse)
 @inject
 async def get_location(
     location_id: str,
-    service: LocationService = Depends(Provide[Container.location_service]),
+    service: AsyncLocationService = Depends(Provide[Container.async_location_service]),
 ):
-    return service.get_by_id(location_id)
+    return await service.get_by_id(location_id)
 
 
 @router.post("", response_model=DetailedLocationResponse, status_code=201)
 @inject
-async def create_location(
+def create_location(
     location: CreateEditLocation,
     service: LocationService = Depends(Provide[Container.location_service]),
 ):
@@ -116,7 +153,7 @@ async def create_location(
 
 @router.patch("/{location_id}", response_model=LocationResponse)
 @inject
-async def update_location(
+def update_location(
     location_id: str,
     location: CreateEditLocation,
     service: LocationService = Depends(Provide[Container.location_service]),
@@ -126,7 +163,7 @@ async def update_location(
 
 @router.delete("/{location_id}", response_model=Blank)
 @inject
-async def soft_delete_location(
+def soft_delete_location(
     location_id: str,
     service: LocationService = Depends(Provide[Container.location_service]),
 ):
@@ -136,7 +173,7 @@ async def soft_delete_location(
 
 @router.delete("", response_model=Blank)
 @inject
-async def wipe_locations(
+def wipe_locations(
     service: LocationService = Depends(Provide[Container.location_service]),
 ):
     service.wipe_locations_data()
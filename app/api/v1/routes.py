@@ -1,5 +1,3 @@
-from fastapi import APIRouter
-
 from app.api.v1.endpoints.amenities import router as amenities_router
 from app.api.v1.endpoints.city import router as city_router
 from app.api.v1.endpoints.district import router as district_router
@@ -16,8 +14,7 @@ from app.api.v1.endpoints.power_output import router as power_output_router
 from app.api.v1.endpoints.power_plug_type import router as power_plug_type_router
 from app.api.v1.endpoints.user_favorite import router as user_favorite_router
 
-routers = APIRouter()
-
+# included one by one by the app, an aggregate router would build every route once more
 router_list = [
     location_router,
     power_plug_type_router,
@@ -33,6 +30,3 @@ router_list = [
     amenities_router,
     location_search_history_router,
 ]
-
-for router in router_list:
-    routers.include_router(router)
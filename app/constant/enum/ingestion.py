@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class IngestionStatusEnum(str, Enum):
+    INSERTED = "inserted"
+    UPDATED = "updated"
+    SKIPPED = "skipped"
+    FAILED = "failed"
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from pydantic import TypeAdapter
+
+from app.core.config import configs
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """In process LRU of query results, kept at most ``ttl`` seconds.
+
+    ``invalidate`` drops every entry. A result computed while an invalidation
+    happened is returned but not stored, it may predate the change. Concurrent
+    ``get_or_compute`` calls of a missing key share a single computation.
+    """
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: int | None = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+        computation = self._inflight.get(key)
+        if computation is None:
+            generation = self._generation
+            computation = self._inflight[key] = asyncio.ensure_future(compute())
+            computation.add_done_callback(lambda done: self._store(key, done, generation))
+        # a cancelled caller does not cancel the computation the others wait for
+        return await asyncio.shield(computation)
+
+    def _store(self, key: Hashable, computation: asyncio.Future, generation: int) -> None:
+        del self._inflight[key]
+        if not computation.cancelled() and computation.exception() is None:
+            self.set(key, computation.result(), generation)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    async def aclose(self) -> None:
+        pass
+
+
+class RedisResultCache(ResultCache):
+    """``ResultCache`` shared by all the processes through Redis.
+
+    Values go through ``adapter`` as JSON, prefixed by the generation they were
+    computed in. ``invalidate`` bumps the generation, older entries are ignored
+    and left to expire. Redis errors only skip the cache. Concurrent calls of
+    a key share one lookup and computation within a process, processes do not
+    coordinate theirs.
+    """
+
+    def __init__(self, url: str, ttl: float, adapter: TypeAdapter, prefix: str) -> None:
+        # optional dependency, installed with the ``redis`` extra
+        import redis
+        import redis.asyncio
+
+        super().__init__(ttl, 0)
+        self.adapter = adapter
+        self.prefix = prefix
+        self._generation_key = f"{prefix}:generation"
+        self._client = redis.Redis.from_url(url, socket_timeout=1)
+        self._async_client = redis.asyncio.Redis.from_url(url, socket_timeout=1)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        computation = self._inflight.get(key)
+        if computation is None:
+            computation = self._inflight[key] = asyncio.ensure_future(self._get_or_compute(key, compute))
+            computation.add_done_callback(lambda done: self._inflight.pop(key, None))
+        # a cancelled caller does not cancel the computation the others wait for
+        return await asyncio.shield(computation)
+
+    async def _get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        entry_key = f"{self.prefix}:{key}"
+        try:
+            generation, entry = await self._async_client.mget(self._generation_key, entry_key)
+        except Exception as e:
+            logger.warning(f"Failed to read the result cache: {e}")
+            return await compute()
+
+        generation = generation or b"0"
+        if entry is not None:
+            entry_generation, _, payload = entry.partition(b":")
+            if entry_generation == generation:
+                return self.adapter.validate_json(payload)
+
+        value = await compute()
+        try:
+            await self._async_client.set(entry_key, generation + b":" + self.adapter.dump_json(value), px=int(self.ttl * 1000))
+        except Exception as e:
+            logger.warning(f"Failed to store in the result cache: {e}")
+        return value
+
+    def invalidate(self) -> None:
+        try:
+            self._client.incr(self._generation_key)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate the result cache: {e}")
+
+    async def aclose(self) -> None:
+        await self._async_client.aclose()
+        self._client.close()
+
+
+def create_directions_cache() -> ResultCache:
+    # routes and their corridor geometry are kept in process, they do not go through JSON
+    return ResultCache(configs.DIRECTIONS_CACHE_TTL_SECONDS, configs.DIRECTIONS_CACHE_MAX_SIZE)
+
+
+def create_result_cache(adapter: TypeAdapter, prefix: str) -> ResultCache:
+    """Redis backed cache when ``REDIS_URL`` is set, an in process one otherwise."""
+    if configs.REDIS_URL:
+        return RedisResultCache(configs.REDIS_URL, configs.RESULT_CACHE_TTL_SECONDS, adapter, prefix)
+    return ResultCache(configs.RESULT_CACHE_TTL_SECONDS, configs.RESULT_CACHE_MAX_SIZE)
@@ -27,6 +27,10 @@ class Configs(BaseSettings):
         "postgresql": "postgresql",
         "mysql": "mysql+pymysql",
     }
+    ASYNC_DB_ENGINE_MAPPER: dict = {
+        "postgresql": "postgresql+asyncpg",
+        "mysql": "mysql+aiomysql",
+    }
 
     PROJECT_ROOT: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -49,6 +53,7 @@ class Configs(BaseSettings):
     DB_HOST: str = os.getenv("DB_HOST", "localhost")
     DB_PORT: str = os.getenv("DB_PORT", "3306")
     DB_ENGINE: str = DB_ENGINE_MAPPER.get(DB, "postgresql")
+    ASYNC_DB_ENGINE: str = ASYNC_DB_ENGINE_MAPPER.get(DB, "postgresql+asyncpg")
     DB_SCHEMA: str = os.getenv("DB_SCHEMA", "ev_charger")
     DB_NAME: str = os.getenv("DB_NAME", ENV_DATABASE_MAPPER[ENV])
 
@@ -63,13 +68,84 @@ class Configs(BaseSettings):
         database=DB_NAME,
     )
 
+    ASYNC_DATABASE_URI: str = DATABASE_URI_FORMAT.format(
+        db_engine=ASYNC_DB_ENGINE,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        database=DB_NAME,
+    )
+
+    # engines of Database / AsyncDatabase, each holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    # 0 disables the timeout
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    DB_APPLICATION_NAME: str = os.getenv("DB_APPLICATION_NAME", PROJECT_NAME)
+    # logs every statement, statements slower than DB_SLOW_QUERY_MS are always logged
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"
+    DB_SLOW_QUERY_MS: float = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+    # a request running one statement this many times is flagged as N+1, over DB_REQUEST_QUERY_BUDGET (0 disables) as over budget
+    DB_REPEATED_QUERY_THRESHOLD: int = int(os.getenv("DB_REPEATED_QUERY_THRESHOLD", "5"))
+    DB_REQUEST_QUERY_BUDGET: int = int(os.getenv("DB_REQUEST_QUERY_BUDGET", "50"))
+    # raise on relationships which are not loaded explicitly, for tests
+    DB_RAISELOAD: bool = os.getenv("DB_RAISELOAD", "false").lower() == "true"
+
     ES_URL: str = os.getenv("ES_URL", "https://localhost:9200")
     ES_USERNAME: str = os.getenv("ES_USERNAME", "elastic")
     ES_PASSWORD: str = os.getenv("ES_PASSWORD", "elastic@123")
 
+    # alias, the documents live in versioned indices swapped in by the reindex
     ES_LOCATION_INDEX: str = "locations"
+    ES_REINDEX_BATCH_SIZE: int = int(os.getenv("ES_REINDEX_BATCH_SIZE", "500"))
+    # how long the index being rebuilt remembers synced deletes, longer than a reindex
+    ES_REINDEX_GC_DELETES: str = os.getenv("ES_REINDEX_GC_DELETES", "6h")
+    # incremental sync of the locations queued in the outbox, 0 disables the API side dispatcher
+    ES_SYNC_BATCH_SIZE: int = int(os.getenv("ES_SYNC_BATCH_SIZE", "500"))
+    ES_SYNC_INTERVAL_SECONDS: float = float(os.getenv("ES_SYNC_INTERVAL_SECONDS", "30"))
+    ES_SYNC_DEBOUNCE_SECONDS: float = float(os.getenv("ES_SYNC_DEBOUNCE_SECONDS", "0.2"))
+    ES_SYNC_MAX_BACKOFF_SECONDS: float = float(os.getenv("ES_SYNC_MAX_BACKOFF_SECONDS", "60"))
+    # searches without text page through a point in time, it outlives the cached first pages
+    ES_SEARCH_PAGE_SIZE: int = int(os.getenv("ES_SEARCH_PAGE_SIZE", "50"))
+    ES_SEARCH_MAX_PAGE_SIZE: int = int(os.getenv("ES_SEARCH_MAX_PAGE_SIZE", "200"))
+    ES_PIT_KEEP_ALIVE: str = os.getenv("ES_PIT_KEEP_ALIVE", "2m")
+    ES_CLUSTER_MAX_TILES: int = int(os.getenv("ES_CLUSTER_MAX_TILES", "2000"))
 
     GOOGLE_MAPS_API_KEY: str = os.getenv("GOOGLE_MAPS_API_KEY", "")
+    # directions of origins / destinations snapped to the same geohash cell share a cached route
+    DIRECTIONS_CACHE_TTL_SECONDS: float = float(os.getenv("DIRECTIONS_CACHE_TTL_SECONDS", "3600"))
+    DIRECTIONS_CACHE_MAX_SIZE: int = int(os.getenv("DIRECTIONS_CACHE_MAX_SIZE", "2000"))
+    DIRECTIONS_CACHE_GEOHASH_PRECISION: int = int(os.getenv("DIRECTIONS_CACHE_GEOHASH_PRECISION", "7"))
+    # stations along a route, at most ES_ROUTE_MAX_LOCATIONS within ROUTE_CORRIDOR_KM of the simplified route
+    ROUTE_CORRIDOR_KM: float = float(os.getenv("ROUTE_CORRIDOR_KM", "1"))
+    ROUTE_SIMPLIFY_TOLERANCE_M: float = float(os.getenv("ROUTE_SIMPLIFY_TOLERANCE_M", "50"))
+    ES_ROUTE_MAX_LOCATIONS: int = int(os.getenv("ES_ROUTE_MAX_LOCATIONS", "5000"))
+
+    # outgoing http
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_MAX_RETRIES: int = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    HTTP_BACKOFF_FACTOR: float = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+    HTTP_MAX_BACKOFF_SECONDS: float = float(os.getenv("HTTP_MAX_BACKOFF_SECONDS", "10"))
+
+    # in memory spatial index for the nearby and by radius reads
+    SPATIAL_INDEX_ENABLED: bool = os.getenv("SPATIAL_INDEX_ENABLED", "false").lower() == "true"
+    SPATIAL_INDEX_CELL_DEGREES: float = float(os.getenv("SPATIAL_INDEX_CELL_DEGREES", "0.1"))
+    # the ingestion server writes from its own process, reload to pick its changes up
+    SPATIAL_INDEX_REFRESH_SECONDS: float = float(os.getenv("SPATIAL_INDEX_REFRESH_SECONDS", "600"))
+
+    # search and nearby results, REDIS_URL shares them between processes instead of one LRU each
+    RESULT_CACHE_TTL_SECONDS: float = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "30"))
+    RESULT_CACHE_MAX_SIZE: int = int(os.getenv("RESULT_CACHE_MAX_SIZE", "10000"))
+    RESULT_CACHE_GEOHASH_PRECISION: int = int(os.getenv("RESULT_CACHE_GEOHASH_PRECISION", "7"))
+    RESULT_CACHE_RADIUS_BUCKET_KM: float = float(os.getenv("RESULT_CACHE_RADIUS_BUCKET_KM", "0.5"))
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
 
     # find query
     PAGE: int = 1
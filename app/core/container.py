@@ -1,12 +1,17 @@
 import logging
 
 from dependency_injector import containers, providers
-from elasticsearch import Elasticsearch
+from elasticsearch import AsyncElasticsearch, Elasticsearch
 
+from app.core.cache import create_directions_cache, create_result_cache
 from app.core.config import configs
-from app.core.database import Database
+from app.core.database import AsyncDatabase, Database
+from app.core.elastic_sync import ElasticSyncDispatcher
+from app.core.http_client import AsyncHttpClient, HttpClient
+from app.core.jobs import JobRegistry
 from app.repository import (
     AmenitiesRepository,
+    AsyncLocationRepository,
     CityRepository,
     DistrictRepository,
     EVChargerPortRepository,
@@ -18,9 +23,15 @@ from app.repository import (
     PowerPlugTypeRepository,
     UserFavoriteRepository,
 )
-from app.repository.elastic_repository import ElasticsearchRepository
+from app.repository.elastic_repository import (
+    AsyncElasticsearchRepository,
+    ElasticsearchRepository,
+    location_result_adapter,
+)
 from app.services import (
     AmenitiesService,
+    AsyncGGMapService,
+    AsyncLocationService,
     CityService,
     DistrictService,
     EVChargerPortService,
@@ -34,6 +45,7 @@ from app.services import (
     PowerPlugTypeService,
     UserFavoriteService,
 )
+from app.util.spatial_index import SpatialIndex
 
 
 class Container(containers.DeclarativeContainer):
@@ -64,6 +76,23 @@ class Container(containers.DeclarativeContainer):
         ssl_show_warn=False,
         http_compress=True,
     )
+    http_client = providers.Singleton(HttpClient)
+    # event loop side of the resources above, used by the async endpoints
+    async_db = providers.Singleton(AsyncDatabase, db_url=configs.ASYNC_DATABASE_URI)
+    async_elasticsearch_client = providers.Singleton(
+        AsyncElasticsearch,
+        hosts=configs.ES_URL,
+        basic_auth=(configs.ES_USERNAME, configs.ES_PASSWORD),
+        verify_certs=False,
+        ssl_show_warn=False,
+        http_compress=True,
+        node_class="httpxasync",
+    )
+    async_http_client = providers.Singleton(AsyncHttpClient)
+    spatial_index = providers.Singleton(SpatialIndex, cell_degrees=configs.SPATIAL_INDEX_CELL_DEGREES)
+    job_registry = providers.Singleton(JobRegistry)
+    location_result_cache = providers.Singleton(create_result_cache, adapter=location_result_adapter, prefix="locations")
+    directions_cache = providers.Singleton(create_directions_cache)
     logger = providers.Singleton(logging.getLogger, name="uvicorn")
     # Repositories
     ev_charger_repository = providers.Factory(EVChargerRepository, session_factory=db.provided.session)
@@ -78,13 +107,37 @@ class Container(containers.DeclarativeContainer):
     power_output_repository = providers.Factory(PowerOutputRepository, session_factory=db.provided.session)
     ev_charger_port_repository = providers.Factory(EVChargerPortRepository, session_factory=db.provided.session)
 
+    async_location_repository = providers.Factory(AsyncLocationRepository, session_factory=async_db.provided.session)
+
     es_repository = providers.Factory(ElasticsearchRepository, es_client=elasticsearch_client)
+    async_es_repository = providers.Factory(AsyncElasticsearchRepository, es_client=async_elasticsearch_client)
 
     # Services
-    gg_map_service = providers.Factory(GGMapService)
-    ev_charger_service = providers.Factory(EVChargerService, ev_charger_repository=ev_charger_repository, es_repository=es_repository)
+    gg_map_service = providers.Factory(GGMapService, http_client=http_client, directions_cache=directions_cache)
+    async_gg_map_service = providers.Factory(AsyncGGMapService, http_client=async_http_client, directions_cache=directions_cache)
+    ev_charger_service = providers.Factory(EVChargerService, ev_charger_repository=ev_charger_repository)
     location_service = providers.Factory(
-        LocationService, location_repository=location_repository, es_repository=es_repository, gg_map_service=gg_map_service
+        LocationService,
+        location_repository=location_repository,
+        es_repository=es_repository,
+        gg_map_service=gg_map_service,
+        spatial_index=spatial_index,
+        result_cache=location_result_cache,
+    )
+    async_location_service = providers.Factory(
+        AsyncLocationService,
+        location_repository=async_location_repository,
+        es_repository=async_es_repository,
+        gg_map_service=async_gg_map_service,
+        spatial_index=spatial_index,
+        result_cache=location_result_cache,
+    )
+    elastic_sync_dispatcher = providers.Singleton(
+        ElasticSyncDispatcher,
+        sync=location_service.provided.sync_dirty_locations,
+        interval=configs.ES_SYNC_INTERVAL_SECONDS,
+        debounce=configs.ES_SYNC_DEBOUNCE_SECONDS,
+        max_backoff=configs.ES_SYNC_MAX_BACKOFF_SECONDS,
     )
     power_plug_type_service = providers.Factory(PowerPlugTypeService, power_plug_type_repository=power_plug_type_repository)
     power_output_service = providers.Factory(PowerOutputService, power_output_repository=power_output_repository)
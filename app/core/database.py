@@ -1,9 +1,28 @@
-from contextlib import AbstractContextManager, contextmanager
-from typing import Any, Callable
+import logging
+import time
+from collections import Counter
+from contextlib import (
+    AbstractAsyncContextManager,
+    AbstractContextManager,
+    asynccontextmanager,
+    contextmanager,
+)
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator
 
-from sqlalchemy import create_engine, orm
+from sqlalchemy import Engine, create_engine, event, make_url, orm
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy.orm import Session, as_declarative
+from sqlalchemy.orm import ORMExecuteState, Session, as_declarative, raiseload
+
+from app.core.config import configs
+
+logger = logging.getLogger(__name__)
 
 
 @as_declarative()
@@ -17,9 +36,130 @@ class BaseModel:
         return cls.__name__.lower()
 
 
+class QueryStats:
+    """Statements run while handling one request."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated(self) -> list[tuple[str, int]]:
+        """Statements run at least ``DB_REPEATED_QUERY_THRESHOLD`` times, the signature of N+1 lazy loads."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= configs.DB_REPEATED_QUERY_THRESHOLD]
+
+    @property
+    def over_budget(self) -> bool:
+        return 0 < configs.DB_REQUEST_QUERY_BUDGET < self.count
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the statements run in this context, threads and tasks started from it included."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def parameters_shape(parameters: Any) -> Any:
+    # the types only, bound values may hold personal data
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"{len(parameters)} x {parameters_shape(parameters[0])}"
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement of ``engine``, for the request ``QueryStats`` and the slow query log."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # statements do not nest on a connection, a failed one is overwritten by the next
+        conn.info["query_started_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started_at = conn.info.pop("query_started_at", None)
+        if started_at is None:
+            return
+        duration = time.perf_counter() - started_at
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+        if duration * 1000 >= configs.DB_SLOW_QUERY_MS:
+            logger.warning(f"Slow query ({duration * 1000:.0f} ms): {statement} parameters: {parameters_shape(parameters)}")
+
+
+@event.listens_for(Session, "do_orm_execute")
+def raiseload_relationships(state: ORMExecuteState) -> None:
+    # DB_RAISELOAD turns the lazy loads of relationships which are not loaded explicitly into errors,
+    # the eager loads of relationships get it as well so the relationships of the loaded children raise too
+    if configs.DB_RAISELOAD and state.is_select and not state.is_column_load:
+        state.statement = state.statement.options(raiseload("*", sql_only=True))
+
+
+def connect_args(db_url: str) -> dict[str, Any]:
+    """Driver specific ``application_name`` and statement timeout of new connections."""
+    driver = make_url(db_url).get_driver_name()
+    timeout_ms = configs.DB_STATEMENT_TIMEOUT_MS
+    if driver == "psycopg2":
+        args = {"application_name": configs.DB_APPLICATION_NAME}
+        if timeout_ms:
+            args["options"] = f"-c statement_timeout={timeout_ms}"
+        return args
+    if driver == "asyncpg":
+        server_settings = {"application_name": configs.DB_APPLICATION_NAME}
+        if timeout_ms:
+            server_settings["statement_timeout"] = str(timeout_ms)
+        return {"server_settings": server_settings}
+    if driver in ("pymysql", "aiomysql") and timeout_ms:
+        return {"init_command": f"SET SESSION max_execution_time={timeout_ms}"}
+    return {}
+
+
+def engine_options(db_url: str) -> dict[str, Any]:
+    return {
+        "echo": configs.DB_ECHO,
+        "pool_size": configs.DB_POOL_SIZE,
+        "max_overflow": configs.DB_MAX_OVERFLOW,
+        "pool_timeout": configs.DB_POOL_TIMEOUT_SECONDS,
+        # connections dropped by the server or a proxy are replaced before use
+        "pool_pre_ping": configs.DB_POOL_PRE_PING,
+        "pool_recycle": configs.DB_POOL_RECYCLE_SECONDS,
+        "connect_args": connect_args(db_url),
+    }
+
+
+def create_db_engine(db_url: str) -> Engine:
+    engine = create_engine(db_url, **engine_options(db_url))
+    instrument_engine(engine)
+    return engine
+
+
+def create_async_db_engine(db_url: str) -> AsyncEngine:
+    engine = create_async_engine(db_url, **engine_options(db_url))
+    # cursor events are only emitted by the sync engine the async one drives
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
 class Database:
     def __init__(self, db_url: str) -> None:
-        self._engine = create_engine(db_url, echo=True)
+        self._engine = create_db_engine(db_url)
         self._session_factory = orm.scoped_session(
             orm.sessionmaker(
                 autocommit=False,
@@ -41,3 +181,28 @@ class Database:
             raise
         finally:
             session.close()
+
+
+class AsyncDatabase:
+    def __init__(self, db_url: str) -> None:
+        self._engine = create_async_db_engine(db_url)
+        # objects are read after the session is closed, keep them loaded
+        self._session_factory = async_sessionmaker(
+            self._engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
+    @asynccontextmanager
+    async def session(self) -> Callable[..., AbstractAsyncContextManager[AsyncSession]]:
+        session: AsyncSession = self._session_factory()
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    async def dispose(self) -> None:
+        await self._engine.dispose()
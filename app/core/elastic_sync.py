@@ -0,0 +1,78 @@
+import logging
+import threading
+from typing import Callable
+
+from app.repository.location_sync_outbox_repository import add_dirty_listener
+
+logger = logging.getLogger(__name__)
+
+
+class ElasticSyncDispatcher:
+    """Background thread draining the location outbox into Elasticsearch.
+
+    It wakes up after each commit which queued locations, waits ``debounce``
+    seconds so close writes share one ``_bulk`` request, and otherwise polls
+    every ``interval`` seconds for the rows queued by other processes. A
+    failed ``sync`` is retried with an exponential backoff, the rows stay
+    queued meanwhile.
+    """
+
+    def __init__(
+        self,
+        sync: Callable[[], int],
+        interval: float = 30,
+        debounce: float = 0.2,
+        initial_backoff: float = 1,
+        max_backoff: float = 60,
+    ) -> None:
+        self.sync = sync
+        self.interval = interval
+        self.debounce = debounce
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._remove_listener: Callable[[], None] | None = None
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._remove_listener = add_dirty_listener(self.notify)
+        self._thread = threading.Thread(target=self._run, name="elastic-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        if self._thread is None:
+            return
+        self._remove_listener()
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = self._remove_listener = None
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            if self._stopped.wait(self.debounce):
+                return
+            self._wake.clear()
+            self._sync_with_retries()
+
+    def _sync_with_retries(self) -> None:
+        backoff = self.initial_backoff
+        while True:
+            try:
+                synced = self.sync()
+                if synced:
+                    logger.info(f"Synced {synced} locations to Elasticsearch")
+                return
+            except Exception as e:
+                logger.warning(f"Failed to sync locations to Elasticsearch, retrying in {backoff}s: {e}")
+            if self._stopped.wait(backoff):
+                return
+            backoff = min(backoff * 2, self.max_backoff)
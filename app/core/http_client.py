@@ -0,0 +1,131 @@
+import asyncio
+import importlib.util
+import logging
+import time
+from typing import Any
+
+import httpx
+
+from app.core.config import configs
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# A failed request of another method may still have been applied by the server
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"}
+
+# HTTP/2 needs the optional ``h2`` package (``httpx[http2]``)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _client_options(transport=None) -> dict[str, Any]:
+    options: dict[str, Any] = {
+        "timeout": httpx.Timeout(configs.HTTP_TIMEOUT_SECONDS, connect=configs.HTTP_CONNECT_TIMEOUT_SECONDS),
+        "limits": httpx.Limits(
+            max_connections=configs.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=configs.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        "http2": HTTP2_AVAILABLE,
+    }
+    if transport is not None:
+        options["transport"] = transport
+    return options
+
+
+def _retry_delay(attempt: int, response: httpx.Response | None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), configs.HTTP_MAX_BACKOFF_SECONDS)
+    return min(configs.HTTP_BACKOFF_FACTOR * (2**attempt), configs.HTTP_MAX_BACKOFF_SECONDS)
+
+
+def _retryable(method: str, retry: bool | None) -> bool:
+    return method.upper() in IDEMPOTENT_METHODS if retry is None else retry
+
+
+def _should_retry(attempt: int, response: httpx.Response | None, retryable: bool) -> bool:
+    if not retryable or attempt >= configs.HTTP_MAX_RETRIES:
+        return False
+    return response is None or response.status_code in RETRY_STATUS_CODES
+
+
+class HttpClient:
+    """Process wide HTTP client with pooled keep-alive connections.
+
+    Idempotent requests are retried with exponential backoff on transport
+    errors, 429 and 5xx responses, other methods only when the caller passes
+    ``retry=True``. Close it on shutdown to release the pooled connections.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport | None = None) -> None:
+        self._client = httpx.Client(**_client_options(transport))
+
+    def request(self, method: str, url: str, retry: bool | None = None, **kwargs) -> httpx.Response:
+        retryable = _retryable(method, retry)
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if not _should_retry(attempt, None, retryable):
+                    raise
+                logger.warning(f"{method} {url} failed ({e}), retrying.")
+            else:
+                if not _should_retry(attempt, response, retryable):
+                    response.raise_for_status()
+                    return response
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying.")
+            time.sleep(_retry_delay(attempt, response))
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get_json(self, url: str, **kwargs) -> Any:
+        return self.get(url, **kwargs).json()
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class AsyncHttpClient:
+    """``HttpClient`` counterpart for code running on the event loop."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self._client = httpx.AsyncClient(**_client_options(transport))
+
+    async def request(self, method: str, url: str, retry: bool | None = None, **kwargs) -> httpx.Response:
+        retryable = _retryable(method, retry)
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if not _should_retry(attempt, None, retryable):
+                    raise
+                logger.warning(f"{method} {url} failed ({e}), retrying.")
+            else:
+                if not _should_retry(attempt, response, retryable):
+                    response.raise_for_status()
+                    return response
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying.")
+            await asyncio.sleep(_retry_delay(attempt, response))
+            attempt += 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get_json(self, url: str, **kwargs) -> Any:
+        return (await self.get(url, **kwargs)).json()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,56 @@
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable
+
+from app.constant.enum.job import JobStatusEnum
+from app.core.exceptions import NotFoundError
+from app.schema.job_schema import JobResponse
+
+logger = logging.getLogger(__name__)
+
+
+class JobRegistry:
+    """Progress of the background jobs started by this process.
+
+    Only the last ``max_jobs`` jobs are kept, a job of a given name runs at
+    most once at a time.
+    """
+
+    def __init__(self, max_jobs: int = 20) -> None:
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[uuid.UUID, JobResponse] = OrderedDict()
+
+    def start(self, name: str) -> tuple[JobResponse, bool]:
+        """The running job called ``name``, or a new one, and whether it was created."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.name == name and job.status in (JobStatusEnum.PENDING, JobStatusEnum.RUNNING):
+                    return job, False
+            job = JobResponse(id=uuid.uuid4(), name=name)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+            return job, True
+
+    def get(self, id: uuid.UUID) -> JobResponse:
+        job = self._jobs.get(id)
+        if job is None:
+            raise NotFoundError(detail=f"not found id : {id}")
+        return job
+
+    def run(self, job: JobResponse, func: Callable[[JobResponse], None]) -> None:
+        job.status = JobStatusEnum.RUNNING
+        job.started_at = datetime.utcnow()
+        try:
+            func(job)
+            job.status = JobStatusEnum.SUCCEEDED
+        except Exception as e:
+            logger.exception(f"Job {job.name} {job.id} failed")
+            job.status = JobStatusEnum.FAILED
+            job.detail = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
@@ -338,8 +338,14 @@ def create_ev_chargers_for_district(ev_charger_service, location_service, distri
 # Main script to create 10 locations
 def main():
     from app.services.location_service import LocationService
+    from app.util.spatial_index import SpatialIndex
+    from app.core.cache import create_directions_cache, create_result_cache
     from app.repository.location_repository import LocationRepository
-    from app.repository.elastic_repository import ElasticsearchRepository
+    from app.repository.elastic_repository import (
+        ElasticsearchRepository,
+        location_result_adapter,
+    )
+    from app.core.http_client import HttpClient
     from app.services.gg_map_service import GGMapService
     from app.repository.power_plug_type_repository import PowerPlugTypeRepository
     from app.services.power_plug_type_service import PowerPlugTypeService
@@ -364,8 +370,10 @@ def main():
     # Initialize the necessary services and repositories
     location_repository = LocationRepository(session_factory)
     es_repository = ElasticsearchRepository(es_client)
-    gg_map_service = GGMapService()
-    location_service = LocationService(location_repository, es_repository, gg_map_service)
+    gg_map_service = GGMapService(HttpClient(), create_directions_cache())
+    # invalidates the API's cache when it is shared through Redis
+    result_cache = create_result_cache(location_result_adapter, "locations")
+    location_service = LocationService(location_repository, es_repository, gg_map_service, SpatialIndex(), result_cache)
     power_plug_type_repository = PowerPlugTypeRepository(session_factory)
     power_plug_type_service = PowerPlugTypeService(power_plug_type_repository)
     # create_power_plug_types(power_plug_type_service)
@@ -385,7 +393,7 @@ def main():
     # create_locations_for_districts(location_service, amenities_ids)
     
     ev_charger_repository = EVChargerRepository(session_factory)
-    ev_charger_service = EVChargerService(ev_charger_repository, es_repository)
+    ev_charger_service = EVChargerService(ev_charger_repository)
 
     # Create EV chargers for locations in "Quận 1"
     create_ev_chargers_for_district(ev_charger_service, location_service, "Quận 3")
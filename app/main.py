@@ -1,10 +1,15 @@
+import asyncio
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from starlette.middleware.cors import CORSMiddleware
 
-from app.api.v1.routes import routers as v1_routers
+from app.api.v1.routes import router_list as v1_routers
 from app.core.config import configs
 from app.core.container import Container
+from app.core.database import track_queries
+from app.core.elastic_sync import ElasticSyncDispatcher
+from app.model.location_elastic import MAPPING_VERSION
 from app.util.class_object import singleton
 
 import logging
@@ -25,6 +30,8 @@ formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
 console.setFormatter(formatter)
 logging.getLogger().addHandler(console)
 
+logger = logging.getLogger(__name__)
+
 
 @singleton
 class AppCreator:
@@ -49,14 +56,113 @@ class AppCreator:
                 allow_credentials=True,
                 allow_methods=["*"],
                 allow_headers=["*"],
+                expose_headers=["X-Next-Cursor", "X-DB-Query-Count", "X-DB-Repeated-Queries"],
             )
 
+        # statements of each request, reported in the response headers and logged when slow, repeated or over budget
+        @self.app.middleware("http")
+        async def track_request_queries(request: Request, call_next):
+            with track_queries() as stats:
+                response = await call_next(request)
+            repeated = stats.repeated()
+            response.headers["X-DB-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Repeated-Queries"] = str(len(repeated))
+            if stats.count:
+                response.headers["Server-Timing"] = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+            label = f"{request.method} {request.url.path}"
+            for statement, count in repeated:
+                logger.warning(f"{label} ran {count} x {statement}, likely N+1 lazy loads")
+            if stats.over_budget:
+                logger.warning(f"{label} ran {stats.count} queries, over the budget of {configs.DB_REQUEST_QUERY_BUDGET}")
+            # DB_SLOW_QUERY_MS=0 logs every request, the ones without queries have no statement to show
+            if stats.count and stats.duration * 1000 >= configs.DB_SLOW_QUERY_MS:
+                statement, count = stats.statements.most_common(1)[0]
+                logger.warning(f"{label} ran {stats.count} queries in {stats.duration * 1000:.0f} ms, {count} x {statement}")
+            return response
+
+        self.spatial_index_refresh: asyncio.Task | None = None
+        self.elastic_migration: asyncio.Task | None = None
+        self.elastic_sync_dispatcher: ElasticSyncDispatcher | None = None
+
+        self.app.add_event_handler("startup", self.startup)
+        self.app.add_event_handler("shutdown", self.shutdown)
+
         # set routes
         @self.app.get("/")
         def root():
             return "service is working"
 
-        self.app.include_router(v1_routers, prefix=configs.API_V1_STR)
+        for router in v1_routers:
+            self.app.include_router(router, prefix=configs.API_V1_STR)
+
+    async def startup(self):
+        await self.put_search_templates()
+        await self.migrate_elastic_mapping()
+        if configs.ES_SYNC_INTERVAL_SECONDS > 0:
+            self.elastic_sync_dispatcher = self.container.elastic_sync_dispatcher()
+            self.elastic_sync_dispatcher.start()
+        if configs.SPATIAL_INDEX_ENABLED:
+            await self.warm_spatial_index()
+            if configs.SPATIAL_INDEX_REFRESH_SECONDS > 0:
+                self.spatial_index_refresh = asyncio.create_task(self.refresh_spatial_index())
+
+    async def put_search_templates(self):
+        # searches store the templates themselves when this fails
+        try:
+            await self.container.async_es_repository().put_search_templates()
+        except Exception as e:
+            logger.warning(f"Failed to store the Elasticsearch search templates: {e}")
+
+    async def migrate_elastic_mapping(self):
+        # searches keep the old index until the reindex swaps the alias, the version is checked again under the lock
+        try:
+            version = await asyncio.to_thread(self.container.es_repository().mapping_version, configs.ES_LOCATION_INDEX)
+        except Exception as e:
+            logger.warning(f"Failed to read the Elasticsearch mapping version: {e}")
+            return
+        if version is None or version >= MAPPING_VERSION:
+            return
+        job_registry = self.container.job_registry()
+        job, created = job_registry.start("sync-elastic-data")
+        if created:
+            # the workers race for the reindex lock, the others skip the migration
+            service = self.container.location_service()
+            self.elastic_migration = asyncio.create_task(
+                asyncio.to_thread(job_registry.run, job, lambda job: service.migrate_elastic_mapping(job, MAPPING_VERSION))
+            )
+
+    async def warm_spatial_index(self):
+        # nearby reads fall back to Elasticsearch and Postgres while the index is not loaded
+        try:
+            await asyncio.to_thread(self.container.location_service().warm_spatial_index)
+        except Exception as e:
+            logger.warning(f"Failed to load the spatial index: {e}")
+
+    async def refresh_spatial_index(self):
+        while True:
+            await asyncio.sleep(configs.SPATIAL_INDEX_REFRESH_SECONDS)
+            await self.warm_spatial_index()
+
+    async def shutdown(self):
+        if self.spatial_index_refresh is not None:
+            self.spatial_index_refresh.cancel()
+            self.spatial_index_refresh = None
+        # resolving a never started dispatcher would build the location service at shutdown
+        if self.elastic_sync_dispatcher is not None:
+            await asyncio.to_thread(self.elastic_sync_dispatcher.stop, configs.ES_SYNC_MAX_BACKOFF_SECONDS)
+            self.elastic_sync_dispatcher = None
+        # release pooled connections, a later startup gets fresh clients
+        self.container.http_client().close()
+        self.container.http_client.reset()
+        await self.container.async_http_client().aclose()
+        self.container.async_http_client.reset()
+        await self.container.location_result_cache().aclose()
+        self.container.location_result_cache.reset()
+        self.container.directions_cache.reset()
+        await self.container.async_elasticsearch_client().close()
+        self.container.async_elasticsearch_client.reset()
+        await self.container.async_db().dispose()
+        self.container.async_db.reset()
 
 
 app_creator = AppCreator()
@@ -8,6 +8,7 @@ from app.model.ev_charger_port import EVChargerPort
 from app.model.location import Location
 from app.model.location_amenities import LocationAmenities
 from app.model.location_search_history import LocationSearchHistory
+from app.model.location_sync_outbox import LocationSyncOutbox
 from app.model.power_output import PowerOutput
 from app.model.power_plug_type import PowerPlugType
 from app.model.user_favorite import UserFavorite
@@ -27,4 +28,5 @@ __all__ = [
     "LocationAmenities",
     "Amenities",
     "LocationSearchHistory",
+    "LocationSyncOutbox",
 ]
@@ -2,6 +2,7 @@ from datetime import date
 from typing import TYPE_CHECKING
 from uuid import UUID
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship
 
 from app.constant.enum.availability import AvailabilityEnum
@@ -23,4 +24,6 @@ class EVCharger(BaseModel, table=True):
     installation_date: date | None = Field(nullable=True)
     last_maintenance_date: date | None = Field(nullable=True)
 
+    __table_args__ = (Index("ix_evcharger_updated_at_id", "updated_at", "id"),)
+
     ev_charger_ports: list["EVChargerPort"] = Relationship(back_populates="ev_charger")
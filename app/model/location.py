@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import JSON, Column
+from sqlalchemy import DDL, JSON, Column, Index, event, func, text
 from sqlmodel import Field, Relationship
 
 from app.constant.enum.location import Country
@@ -39,6 +39,14 @@ class Location(BaseModel, table=True):
     total_charging_ports: int | None = Field(default=None, nullable=True)
     access: LocationAccess = Field(nullable=True, default=None)
     payment_methods: list | None = Field(default=None, sa_column=Column(JSON))
+    # IANA name, working hours are on its clocks
+    timezone: str | None = Field(default=None, nullable=True, max_length=64)
+
+    __table_args__ = (
+        Index("ix_location_updated_at_id", "updated_at", "id"),
+        # radius searches filter and sort on this expression
+        Index("ix_location_ll_to_earth", func.ll_to_earth(text("latitude"), text("longitude")), postgresql_using="gist"),
+    )
 
     ev_chargers: list["EVCharger"] = Relationship(back_populates="location")
     working_days: list["WorkingDay"] = Relationship(back_populates="location")
@@ -49,3 +57,11 @@ class Location(BaseModel, table=True):
     location_search_histories: list["LocationSearchHistory"] = Relationship(
         back_populates="location"
     )
+
+
+for extension in ("cube", "earthdistance"):
+    event.listen(
+        Location.__table__,
+        "before_create",
+        DDL(f"CREATE EXTENSION IF NOT EXISTS {extension}").execute_if(dialect="postgresql"),
+    )
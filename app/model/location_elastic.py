@@ -31,24 +31,37 @@ class LocationElastic(BaseModel):
     access: Optional[LocationAccess] = None
     payment_methods: Optional[List[str]] = None
     working_days: Optional[List[dict]] = None
+    timezone: Optional[str] = None
+    # minute-of-week ``{"gte", "lte"}`` ranges on the clocks of ``timezone``
+    opening_hours: Optional[List[dict]] = None
     charger_types: Optional[List[dict]] = None
+    station_count: Optional[int] = None
+    max_power_output: Optional[float] = None
     amenities: Optional[List[str]] = None
 
 
+# bumped on mapping changes, an index on an older version is rebuilt by the reindex
+MAPPING_VERSION = 3
+
+# text fields with a ``suggest`` search_as_you_type subfield for autocomplete, and their boost
+SEARCH_AS_YOU_TYPE_FIELDS = {"location_name": 2.0, "street": 1.0, "district": 1.0, "city": 1.0}
+search_as_you_type_field = {"type": "text", "fields": {"suggest": {"type": "search_as_you_type"}}}
+
 mapping = {
     "mappings": {
+        "_meta": {"version": MAPPING_VERSION},
         "properties": {
             "location": {"type": "geo_point"},
             "id": {"type": "keyword"},
             "here_id": {"type": "keyword"},
             "external_id": {"type": "keyword"},
-            "location_name": {"type": "text"},
+            "location_name": search_as_you_type_field,
             "latitude": {"type": "double"},
             "longitude": {"type": "double"},
-            "street": {"type": "text"},
+            "street": search_as_you_type_field,
             "house_number": {"type": "text"},
-            "district": {"type": "text"},
-            "city": {"type": "text"},
+            "district": search_as_you_type_field,
+            "city": search_as_you_type_field,
             "state": {"type": "text"},
             "county": {"type": "text"},
             "country": {"type": "keyword"},
@@ -71,6 +84,8 @@ mapping = {
                     "close_time": {"type": "date", "format": "HH:mm"},
                 },
             },
+            "timezone": {"type": "keyword"},
+            "opening_hours": {"type": "integer_range"},
             "charger_types": {
                 "type": "nested",
                 "properties": {
@@ -78,8 +93,10 @@ mapping = {
                     "power_output": {"type": "integer"},
                 },
             },
+            "station_count": {"type": "integer"},
+            "max_power_output": {"type": "float"},
             "amenities": {"type": "keyword"},
-        }
+        },
     }
 }
 
@@ -1,7 +1,7 @@
 import uuid
 from typing import TYPE_CHECKING
 
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint
 from sqlmodel import Field, Relationship
 
 from app.model.base_model import BaseModel
@@ -14,6 +14,9 @@ class LocationSearchHistory(BaseModel, table=True):
     location_id: uuid.UUID = Field(foreign_key="location.id", nullable=False)
     user_id: uuid.UUID = Field(index=True, nullable=False)
 
-    __table_args__ = (UniqueConstraint("location_id", "user_id", "deleted_at", name="uix_location_id_user_id_search_history"),)
+    __table_args__ = (
+        UniqueConstraint("location_id", "user_id", "deleted_at", name="uix_location_id_user_id_search_history"),
+        Index("ix_locationsearchhistory_updated_at_id", "updated_at", "id"),
+    )
 
     location: "Location" = Relationship(back_populates="location_search_histories")
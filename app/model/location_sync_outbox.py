@@ -0,0 +1,18 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlmodel import Field, SQLModel
+
+
+class LocationSyncOutbox(SQLModel, table=True):
+    """Locations whose Elasticsearch document has to be rebuilt.
+
+    Rows are written in the transaction of the change and consumed by
+    ``LocationService.sync_dirty_locations``. There is no foreign key, the
+    row of a removed location still has to drop its document.
+    """
+
+    id: int | None = Field(default=None, primary_key=True)
+    location_id: uuid.UUID = Field(nullable=False, index=True)
+    created_at: datetime = Field(nullable=False, sa_column_kwargs={"default": func.now()})
@@ -2,6 +2,7 @@ import datetime
 import uuid
 from typing import TYPE_CHECKING
 
+from sqlalchemy import UniqueConstraint
 from sqlmodel import Field, Relationship
 
 from app.model.base_model import BaseModel
@@ -16,4 +17,7 @@ class WorkingDay(BaseModel, table=True):
     close_time: datetime.time = Field(nullable=False)
 
     location_id: uuid.UUID = Field(foreign_key="location.id")
+
+    __table_args__ = (UniqueConstraint("location_id", "day", name="uix_working_day_location_id_day"),)
+
     location: "Location" = Relationship(back_populates="working_days")
@@ -0,0 +1,54 @@
+"""Import time and memory of an API worker: ``python -m app.profile_startup [top]``.
+
+``import app.main`` runs in a fresh interpreter with ``-X importtime``, the
+slowest modules by self time are printed with the total time and peak RSS.
+"""
+
+import json
+import re
+import subprocess
+import sys
+
+# heavy packages kept off the startup path, imported by the first request needing them
+LAZY_MODULES = ("numpy", "shapely", "pandas", "geopandas", "redis")
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app.main
+seconds = time.perf_counter() - start
+try:
+    import resource
+    # kilobytes on Linux
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+except ImportError:
+    rss_mb = None
+print(json.dumps({{"seconds": seconds, "rss_mb": rss_mb, "lazy_modules": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+IMPORT_TIME_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)")
+
+
+def measure_startup() -> dict:
+    """``seconds``, ``rss_mb`` and loaded ``lazy_modules`` of ``import app.main``, with the ``modules`` import times."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], capture_output=True, text=True, check=True)
+    startup = json.loads(result.stdout.strip().splitlines()[-1])
+    # (self microseconds, cumulative microseconds, module)
+    startup["modules"] = [
+        (int(match[1]), int(match[2]), match[3]) for match in map(IMPORT_TIME_PATTERN.match, result.stderr.splitlines()) if match
+    ]
+    return startup
+
+
+def main(top: int = 25) -> None:
+    startup = measure_startup()
+    print(f"{'self ms':>9} {'total ms':>9}  module")
+    for self_us, cumulative_us, module in sorted(startup["modules"], reverse=True)[:top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {module}")
+    print(f"\nimport app.main: {startup['seconds']:.2f}s, peak RSS: {startup['rss_mb'] or 0:.0f} MB")
+    if startup["lazy_modules"]:
+        print(f"lazy modules imported at startup: {', '.join(startup['lazy_modules'])}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -4,7 +4,10 @@ from app.repository.district_repository import DistrictRepository
 from app.repository.ev_charger_port_repository import EVChargerPortRepository
 from app.repository.ev_charger_repository import EVChargerRepository
 from app.repository.location_amenities_repository import LocationAmenitiesRepository
-from app.repository.location_repository import LocationRepository
+from app.repository.location_repository import (
+    AsyncLocationRepository,
+    LocationRepository,
+)
 from app.repository.location_search_history_repository import (
     LocationSearchHistoryRepository,
 )
@@ -14,6 +17,7 @@ from app.repository.user_favorite_repository import UserFavoriteRepository
 
 __all__ = [
     "LocationRepository",
+    "AsyncLocationRepository",
     "PowerOutputRepository",
     "PowerPlugTypeRepository",
     "EVChargerPortRepository",
@@ -10,7 +10,8 @@ from sqlalchemy.orm import Session, joinedload
 from app.core.config import configs
 from app.core.exceptions import DuplicatedError, NotFoundError
 from app.model.base_model import BaseModel
-from app.schema.base_schema import PaginationQuery
+from app.schema.base_schema import CountModeOptions, ListOrderOptions, PaginationQuery
+from app.util.pagination import count_query, cursor_filter, encode_cursor
 from app.util.query_builder import dict_to_sqlalchemy_filter_options
 
 T = TypeVar("T", bound=BaseModel)
@@ -32,15 +33,17 @@ class BaseRepository:
     def read_by_options(self, schema: U, eager=False):
         with self.session_factory() as session:
             schema_as_dict = schema.model_dump(exclude_none=True)
-            ordering = schema_as_dict.get("ordering", configs.ORDERING)
+            ordering = ListOrderOptions(schema_as_dict.get("ordering", configs.ORDERING)).value
             order_by = schema_as_dict.get("order_by", configs.ORDER_BY)
+            # id breaks ties so that pages, and cursors, are stable
             order_query = (
-                getattr(self.model, order_by).desc()
+                (getattr(self.model, order_by).desc(), self.model.id.desc())
                 if ordering == "desc"
-                else getattr(self.model, order_by).asc()
+                else (getattr(self.model, order_by).asc(), self.model.id.asc())
             )
             page = schema_as_dict.get("page", configs.PAGE)
             page_size = schema_as_dict.get("page_size", configs.PAGE_SIZE)
+            count_mode = schema_as_dict.get("count_mode", CountModeOptions.exact)
             filter_options = dict_to_sqlalchemy_filter_options(
                 self.model, schema.model_dump(exclude_none=True)
             )
@@ -51,20 +54,27 @@ class BaseRepository:
             filtered_query = query.filter(filter_options).filter(
                 not_(self.model.is_deleted)
             )
-            query = filtered_query.order_by(order_query)
+            query = filtered_query.order_by(*order_query)
             if page_size == "all":
                 query = query.all()
+            elif schema.cursor:
+                query = query.filter(cursor_filter(schema.cursor, self.model, order_by, ordering)).limit(page_size).all()
             else:
                 query = query.limit(page_size).offset((page - 1) * page_size).all()
-            total_count = filtered_query.count()
+            total_count = count_query(filtered_query.statement, session, count_mode)
+            next_cursor = None
+            if page_size != "all" and query and len(query) == page_size:
+                next_cursor = encode_cursor(order_by, ordering, getattr(query[-1], order_by), query[-1].id)
             return {
                 "founds": query,
+                "next_cursor": next_cursor,
                 "search_options": {
                     "page": page,
                     "page_size": page_size,
                     "ordering": ordering,
                     "total_count": total_count,
                     "order_by": order_by,
+                    "count_mode": count_mode,
                 },
             }
 
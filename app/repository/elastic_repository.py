@@ -1,36 +1,145 @@
-import re
+import logging
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
 
-import pytz
-from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk
+from elasticsearch import AsyncElasticsearch, Elasticsearch
+from elasticsearch import NotFoundError as ElasticsearchNotFoundError
+from elasticsearch.helpers import bulk, streaming_bulk
+from pydantic import TypeAdapter
 
-from app.constant.enum.status import LocationStatusEnum
 from app.core.config import configs
-from app.core.exceptions import NotFoundError
+from app.core.exceptions import NotFoundError, ValidationError
 from app.model.location_elastic import mapping as location_elastic_mapping
-from app.schema.google_api_schema import Coordinate
 from app.schema.location_schema import (
     LocationByRadiusQuery,
+    LocationCluster,
+    LocationClusterQuery,
     LocationResponse,
+    LocationSearchPage,
     SearchLocation,
 )
+from app.util.elastic_query_builder import (
+    LOCATION_CLUSTERS_FILTER_PATH,
+    LOCATION_RESPONSE_FILTER_PATH,
+    NEARBY_FILTER_PATH,
+    SEARCH_LOCATION_TEMPLATE,
+    SEARCH_LOCATION_TEMPLATE_ID,
+    SEARCH_PAGE_FILTER_PATH,
+    build_location_clusters_params,
+    build_location_on_route_query,
+    build_locations_by_ids_query,
+    build_nearby_location_query,
+    build_search_location_params,
+    encode_search_cursor,
+)
+from app.util.working_hours import StatusClock
+
+logger = logging.getLogger(__name__)
+
+location_response_list_adapter = TypeAdapter(List[LocationResponse])
+# nearby results and search pages share the result cache
+location_result_adapter = TypeAdapter(Union[List[LocationResponse], LocationSearchPage])
+
+SEARCH_TEMPLATES = {SEARCH_LOCATION_TEMPLATE_ID: SEARCH_LOCATION_TEMPLATE}
 
 
 class ElasticsearchRepository:
     def __init__(self, es_client: Elasticsearch) -> None:
         self.es_client = es_client
 
-    def bulk_create_documents(self, index_name: str, body: list[dict[str, Any]]) -> None:
+    def bulk_create_documents(self, index_name: str, body: list[dict[str, Any]], refresh: bool = True) -> None:
         if not self.es_client.indices.exists(index=index_name):
             self.es_client.indices.create(index=index_name, body=location_elastic_mapping)
 
         try:
-            bulk(self.es_client, body, refresh=True)
+            bulk(self.es_client, body, refresh=refresh)
         except Exception as e:
             raise RuntimeError(f"Failed to bulk create document: {e}")
 
+    def sync_documents(self, index_name: str, actions: list[dict[str, Any]]) -> None:
+        """Apply externally versioned index and delete ``actions`` in one bulk request.
+
+        Documents already at the same or a newer version (409) or already gone (404)
+        are left as they are, replaying a batch is harmless. The indices a reindex
+        is filling get the same actions, the swap would lose them otherwise.
+        """
+        if not self.es_client.indices.exists(index=index_name):
+            self.es_client.indices.create(index=index_name, body=location_elastic_mapping)
+
+        actions = actions + [{**action, "_index": index} for index in self.reindexing_indices(index_name) for action in actions]
+        try:
+            bulk(self.es_client, actions, refresh=False, ignore_status=(404, 409))
+        except Exception as e:
+            raise RuntimeError(f"Failed to sync documents: {e}")
+
+    def reindexing_indices(self, alias: str) -> list[str]:
+        """The versioned indices of ``alias`` being filled by a reindex, in any process."""
+        reindex_alias = reindexing_alias(alias)
+        if not self.es_client.indices.exists_alias(name=reindex_alias):
+            return []
+        return list(self.es_client.indices.get_alias(name=reindex_alias).keys())
+
+    def create_versioned_index(self, alias: str) -> str:
+        """Create an empty index to be served later under ``alias``, refreshes are off while it fills up.
+
+        The index is flagged by the reindexing alias until the swap, syncs write to it
+        too. Delete tombstones are kept long enough for a synced delete to win over
+        the older copy of the document the reindex streams afterwards.
+        """
+        index_name = f"{alias}_{datetime.utcnow():%Y%m%d%H%M%S%f}"
+        self.es_client.indices.create(
+            index=index_name,
+            body={
+                **location_elastic_mapping,
+                "settings": {"refresh_interval": "-1", "gc_deletes": configs.ES_REINDEX_GC_DELETES},
+                "aliases": {reindexing_alias(alias): {}},
+            },
+        )
+        return index_name
+
+    def streaming_bulk(self, actions: Iterable[dict[str, Any]], chunk_size: int = 500) -> Iterator[bool]:
+        """Send ``actions`` chunk by chunk, yields whether each one succeeded.
+
+        A version conflict is a success, a sync already wrote a newer document.
+        """
+        for ok, item in streaming_bulk(self.es_client, actions, chunk_size=chunk_size, raise_on_error=False, max_retries=3):
+            ok = ok or next(iter(item.values())).get("status") == 409
+            if not ok:
+                logger.warning(f"Failed to index document: {item}")
+            yield ok
+
+    def swap_alias(self, alias: str, index_name: str) -> None:
+        """Serve ``alias`` from ``index_name`` only, in one atomic update, then drop the replaced indices."""
+        self.es_client.indices.put_settings(index=index_name, settings={"refresh_interval": None, "gc_deletes": None})
+        self.es_client.indices.refresh(index=index_name)
+
+        actions: list[dict[str, Any]] = [
+            {"add": {"index": index_name, "alias": alias}},
+            {"remove": {"index": index_name, "alias": reindexing_alias(alias)}},
+        ]
+        old_indices = []
+        if self.es_client.indices.exists_alias(name=alias):
+            old_indices = [index for index in self.es_client.indices.get_alias(name=alias).keys() if index != index_name]
+            actions += [{"remove": {"index": index, "alias": alias}} for index in old_indices]
+        elif self.es_client.indices.exists(index=alias):
+            # index created before aliases were used, dropped in the same update
+            actions.append({"remove_index": {"index": alias}})
+        self.es_client.indices.update_aliases(actions=actions)
+
+        for index in old_indices:
+            self.es_client.indices.delete(index=index, ignore_unavailable=True)
+
+    def mapping_version(self, alias: str) -> int | None:
+        """Mapping version of the index served under ``alias``, ``None`` when there is none yet."""
+        if not self.es_client.indices.exists(index=alias):
+            return None
+        mappings = next(iter(self.es_client.indices.get_mapping(index=alias).values()))["mappings"]
+        # indices created before the mapping was versioned have no _meta
+        return mappings.get("_meta", {}).get("version", 1)
+
+    def delete_index(self, index_name: str) -> None:
+        self.es_client.indices.delete(index=index_name, ignore_unavailable=True)
+
     def create_document(self, index_name: str, doc_id: str, body: dict) -> dict:
         if not self.es_client.indices.exists(index=index_name):
             self.es_client.indices.create(index=index_name, body=location_elastic_mapping)
@@ -62,317 +171,268 @@ class ElasticsearchRepository:
         except Exception as e:
             raise RuntimeError(f"Failed to delete document: {e}")
 
-    def change_station_count(self, index: str, doc_id: str, number_of_station: int = 1) -> None:
-        try:
-            update_body = {
-                "script": {
-                    "source": """
-                        if (ctx._source.station_count == null) {
-                            ctx._source.station_count = 1;
-                        } else {
-                            ctx._source.station_count += params.number_of_station;
-                        }
-                    """,
-                    "params": {"number_of_station": number_of_station},
-                }
-            }
-            self.es_client.update(index=index, id=doc_id, body=update_body)
-        except Exception as e:
-            raise RuntimeError(f"Failed to update document: {e}")
+    def put_search_templates(self) -> None:
+        for template_id, source in SEARCH_TEMPLATES.items():
+            self.es_client.put_script(id=template_id, script={"lang": "mustache", "source": source})
 
-    def add_charger_type_and_power_output(self, index: str, doc_id: str, charger_types, number_of_station: int = 0) -> None:
+    def search_location(
+        self,
+        searchlocation: SearchLocation,
+        is_fuzzi: bool = False,
+        charger_type: List[str] = [],
+        amenities: List[str] = [],
+    ) -> LocationSearchPage:
+        params = build_search_location_params(searchlocation, is_fuzzi, charger_type, amenities)
+        if params is None:
+            return LocationSearchPage(founds=[])
+        from_cursor = params["pit"] is not None
         try:
-            if not self.es_client.exists(index=index, id=doc_id):
-                raise RuntimeError(f"Document with ID {doc_id} does not exist in index {index}.")
-
-            update_body = {
-                "script": {
-                    "source": """
-                                    if (ctx._source.charger_types == null) {
-                                        ctx._source.charger_types = params.charger_types;
-                                    } else {
-                                        ctx._source.charger_types.addAll(params.charger_types);
-                                    }
-
-                                    if (ctx._source.station_count == null) {
-                                        ctx._source.station_count = params.number_of_station;
-                                    } else {
-                                        ctx._source.station_count += params.number_of_station;
-                                    }
-                                """,
-                    "params": {"charger_types": charger_types, "number_of_station": number_of_station},
-                }
-            }
+            if params["paged"] and not from_cursor:
+                pit = self.es_client.open_point_in_time(index=configs.ES_LOCATION_INDEX, keep_alive=configs.ES_PIT_KEEP_ALIVE)
+                params["pit"] = {"id": pit["id"], "keep_alive": configs.ES_PIT_KEEP_ALIVE}
+            response = self.__search_template(SEARCH_LOCATION_TEMPLATE_ID, params)
+        except ElasticsearchNotFoundError as e:
+            if from_cursor:
+                raise ValidationError(detail="Cursor expired")
+            raise NotFoundError(detail=str(e))
+        except Exception as e:
+            raise NotFoundError(detail=str(e))
 
-            self.es_client.update(index=index, id=doc_id, body=update_body)
+        page = search_page(response, params)
+        if params["paged"] and page.next_cursor is None:
+            self.close_point_in_time(response.get("pit_id", params["pit"]["id"]))
+        return page
 
+    def close_point_in_time(self, pit_id: str) -> None:
+        # a client still paging a cached cursor gets "Cursor expired" once the last page was read
+        try:
+            self.es_client.close_point_in_time(id=pit_id)
         except Exception as e:
-            raise RuntimeError(f"Failed to update document: {e}")
+            logger.warning(f"Failed to close point in time: {e}")
 
-    def check_special_chars(self, value: str, max_special_chars: int = 2) -> bool:
-        if value is None:
-            return False
-        special_chars = re.findall(r"[^\w\s]", value)
-        return len(special_chars) > max_special_chars
+    def search_location_clusters(
+        self,
+        schema: LocationClusterQuery,
+        charger_type: List[str] = [],
+        amenities: List[str] = [],
+    ) -> List[LocationCluster]:
+        params = build_location_clusters_params(schema, charger_type, amenities)
+        try:
+            response = self.__search_template(SEARCH_LOCATION_TEMPLATE_ID, params, LOCATION_CLUSTERS_FILTER_PATH)
+        except Exception as e:
+            raise NotFoundError(detail=str(e))
+        return process_location_clusters(response)
 
-    def check_special_word(self, value: str) -> bool:
-        if value is None:
-            return False
-        words = re.findall(r"\b\w+\b", value)
-        return any(len(word) > 9 for word in words)
+    def search_nearby_location(self, schema: LocationByRadiusQuery) -> List[LocationResponse]:
+        return self.__search_locations(build_nearby_location_query(schema), NEARBY_FILTER_PATH, with_distance=True)
+
+    def __search_template(self, template_id: str, params: dict, filter_path: list[str] = SEARCH_PAGE_FILTER_PATH):
+        request = {
+            # a point in time search names its indices through the point in time
+            "index": None if params.get("pit") else configs.ES_LOCATION_INDEX,
+            "id": template_id,
+            "params": params,
+            "filter_path": filter_path,
+        }
+        try:
+            return self.es_client.search_template(**request)
+        except ElasticsearchNotFoundError:
+            # the template was not stored yet, e.g. Elasticsearch was down at startup
+            self.put_search_templates()
+            return self.es_client.search_template(**request)
+
+    def __search_locations(
+        self, es_query: dict, filter_path: list[str] = LOCATION_RESPONSE_FILTER_PATH, with_distance: bool = False
+    ) -> List[LocationResponse]:
+        try:
+            response = self.es_client.search(index=configs.ES_LOCATION_INDEX, body=es_query, filter_path=filter_path)
+            results = process_search_results_location_list(get_hits(response), with_distance)
+        except Exception as e:
+            raise NotFoundError(detail=str(e))
 
-    def __calculate_status(self, working_hours: list, current_day: int, current_time) -> str:
+        return results
 
-        if not working_hours:
-            return LocationStatusEnum.CLOSE
+    def search_location_on_route(self, polygon: list[list[float]]) -> list[dict]:
+        try:
+            response = self.es_client.search(
+                index=configs.ES_LOCATION_INDEX, body=build_location_on_route_query(polygon), filter_path=LOCATION_RESPONSE_FILTER_PATH
+            )
+        except Exception as e:
+            raise NotFoundError(detail=str(e))
+        return route_candidates(response)
 
-        working_hours.sort(key=lambda x: x["day"])
+    def read_locations_by_ids(self, ids: list[str]) -> List[LocationResponse]:
+        if not ids:
+            return []
+        return self.__search_locations(build_locations_by_ids_query(ids))
 
-        left, right, mid = 0, working_hours.__len__() - 1, 0
+    def wipe_data(self, index: str):
+        if self.es_client.indices.exists_alias(name=index):
+            # an alias can not be deleted through its name, drop the indices behind it
+            indices = list(self.es_client.indices.get_alias(name=index).keys())
+            return self.es_client.indices.delete(index=",".join(indices))
+        if self.es_client.indices.exists(index=index):
+            response = self.es_client.indices.delete(index=index)
+            return response
+        return None
 
-        while left <= right:
-            mid = (left + right) // 2
-            if working_hours[mid]["day"] == current_day:
-                break
-            elif working_hours[mid]["day"] < current_day:
-                left = mid + 1
-            else:
-                right = mid - 1
 
-        if working_hours[mid]["day"] != current_day:
-            return LocationStatusEnum.CLOSE
+class AsyncElasticsearchRepository:
+    """Read side of ``ElasticsearchRepository`` for the async endpoints."""
 
-        start = datetime.strptime(working_hours[mid]["open_time"], configs.TIME_FORMAT)
-        end = datetime.strptime(working_hours[mid]["close_time"], configs.TIME_FORMAT)
+    def __init__(self, es_client: AsyncElasticsearch) -> None:
+        self.es_client = es_client
 
-        if start.time() <= current_time <= end.time():
-            return LocationStatusEnum.OPEN
-        else:
-            return LocationStatusEnum.CLOSE
+    async def put_search_templates(self) -> None:
+        for template_id, source in SEARCH_TEMPLATES.items():
+            await self.es_client.put_script(id=template_id, script={"lang": "mustache", "source": source})
 
-    def search_location(
+    async def search_location(
         self,
         searchlocation: SearchLocation,
         is_fuzzi: bool = False,
         charger_type: List[str] = [],
         amenities: List[str] = [],
-    ) -> List[LocationResponse]:
-        query = searchlocation.query
-        station_count = searchlocation.station_count
-        power_output_gte = searchlocation.power_output_gte
-        power_output_lte = searchlocation.power_output_lte
-        radius = searchlocation.radius
-
-        if self.check_special_chars(query):
-            return []
-        if self.check_special_word(query):
-            return []
-
-        must_queries = []
-
-        if charger_type:
-            should_clauses = [{"match_phrase": {"charger_types.type": ctype}} for ctype in charger_type]
-            must_queries.append(
-                {"nested": {"path": "charger_types", "query": {"bool": {"should": should_clauses, "minimum_should_match": 1}}}}
-            )
-
-        if power_output_gte is not None or power_output_lte is not None:
-            must_queries.append(
-                {
-                    "nested": {
-                        "path": "charger_types",
-                        "query": {
-                            "bool": {
-                                "must": [{"range": {"charger_types.power_output": {"gte": power_output_gte, "lte": power_output_lte}}}]
-                            }
-                        },
-                    }
-                }
-            )
-
-        if station_count:
-            must_queries.append({"range": {"station_count": {"gte": station_count}}})
+    ) -> LocationSearchPage:
+        params = build_search_location_params(searchlocation, is_fuzzi, charger_type, amenities)
+        if params is None:
+            return LocationSearchPage(founds=[])
+        from_cursor = params["pit"] is not None
+        try:
+            if params["paged"] and not from_cursor:
+                pit = await self.es_client.open_point_in_time(index=configs.ES_LOCATION_INDEX, keep_alive=configs.ES_PIT_KEEP_ALIVE)
+                params["pit"] = {"id": pit["id"], "keep_alive": configs.ES_PIT_KEEP_ALIVE}
+            response = await self.__search_template(SEARCH_LOCATION_TEMPLATE_ID, params)
+        except ElasticsearchNotFoundError as e:
+            if from_cursor:
+                raise ValidationError(detail="Cursor expired")
+            raise NotFoundError(detail=str(e))
+        except Exception as e:
+            raise NotFoundError(detail=str(e))
 
-        if radius is not None:
-            must_queries.append(
-                {"geo_distance": {"distance": f"{radius}km", "location": {"lat": searchlocation.lat, "lon": searchlocation.lon}}}
-            )
+        page = search_page(response, params)
+        if params["paged"] and page.next_cursor is None:
+            await self.close_point_in_time(response.get("pit_id", params["pit"]["id"]))
+        return page
 
-        if amenities:
-            must_queries.append({"terms": {"amenities": amenities}})
-
-        es_query = {
-            "query": {
-                "bool": {
-                    "must": must_queries,
-                    **(
-                        {
-                            "should": [
-                                {"wildcard": {"location_name": {"value": f"{query}*", "boost": 2.0}}},
-                                {"wildcard": {"street": {"value": f"{query}*", "boost": 1.0}}},
-                                {
-                                    "multi_match": {
-                                        "query": query,
-                                        "fields": ["location_name", "street", "district", "city", "country"],
-                                        **({"fuzziness": "AUTO"} if is_fuzzi else {}),
-                                    }
-                                },
-                            ],
-                            "minimum_should_match": 1,
-                        }
-                        if query is not None
-                        else {"filter": {"match_all": {}}}
-                    ),
-                }
-            },
-            **(
-                {"sort": [{"_geo_distance": {"location": {"lat": searchlocation.lat, "lon": searchlocation.lon}, "order": "asc"}}]}
-                if searchlocation.lat is not None and searchlocation.lon is not None
-                else {}
-            ),
-            "size": 10 if query is not None else 500,
-        }
+    async def close_point_in_time(self, pit_id: str) -> None:
+        # a client still paging a cached cursor gets "Cursor expired" once the last page was read
+        try:
+            await self.es_client.close_point_in_time(id=pit_id)
+        except Exception as e:
+            logger.warning(f"Failed to close point in time: {e}")
 
+    async def search_location_clusters(
+        self,
+        schema: LocationClusterQuery,
+        charger_type: List[str] = [],
+        amenities: List[str] = [],
+    ) -> List[LocationCluster]:
+        params = build_location_clusters_params(schema, charger_type, amenities)
         try:
-            response = self.es_client.search(index=configs.ES_LOCATION_INDEX, body=es_query)
-            hits = response["hits"]["hits"]
-            results = self.__process_search_results_location_list(hits)
+            response = await self.__search_template(SEARCH_LOCATION_TEMPLATE_ID, params, LOCATION_CLUSTERS_FILTER_PATH)
         except Exception as e:
             raise NotFoundError(detail=str(e))
+        return process_location_clusters(response)
 
-        return results
+    async def search_nearby_location(self, schema: LocationByRadiusQuery) -> List[LocationResponse]:
+        return await self.__search_locations(build_nearby_location_query(schema), NEARBY_FILTER_PATH, with_distance=True)
 
-    def search_nearby_location(self, schema: LocationByRadiusQuery) -> List[LocationResponse]:
+    async def search_location_on_route(self, polygon: list[list[float]]) -> list[dict]:
+        try:
+            response = await self.es_client.search(
+                index=configs.ES_LOCATION_INDEX, body=build_location_on_route_query(polygon), filter_path=LOCATION_RESPONSE_FILTER_PATH
+            )
+        except Exception as e:
+            raise NotFoundError(detail=str(e))
+        return route_candidates(response)
 
-        es_query = {
-            "query": {
-                "geo_distance": {"distance": str(schema.radius) + "km", "location": {"lat": schema.user_lat, "lon": schema.user_long}}
-            }
+    async def read_locations_by_ids(self, ids: list[str]) -> List[LocationResponse]:
+        if not ids:
+            return []
+        return await self.__search_locations(build_locations_by_ids_query(ids))
+
+    async def __search_template(self, template_id: str, params: dict, filter_path: list[str] = SEARCH_PAGE_FILTER_PATH):
+        request = {
+            # a point in time search names its indices through the point in time
+            "index": None if params.get("pit") else configs.ES_LOCATION_INDEX,
+            "id": template_id,
+            "params": params,
+            "filter_path": filter_path,
         }
         try:
-            response = self.es_client.search(index=configs.ES_LOCATION_INDEX, body=es_query)
-            hits = response["hits"]["hits"]
-            results = self.__process_search_results_location_list(hits)
+            return await self.es_client.search_template(**request)
+        except ElasticsearchNotFoundError:
+            # the template was not stored yet, e.g. Elasticsearch was down at startup
+            await self.put_search_templates()
+            return await self.es_client.search_template(**request)
+
+    async def __search_locations(
+        self, es_query: dict, filter_path: list[str] = LOCATION_RESPONSE_FILTER_PATH, with_distance: bool = False
+    ) -> List[LocationResponse]:
+        try:
+            response = await self.es_client.search(index=configs.ES_LOCATION_INDEX, body=es_query, filter_path=filter_path)
+            results = process_search_results_location_list(get_hits(response), with_distance)
         except Exception as e:
             raise NotFoundError(detail=str(e))
 
         return results
 
-    def __process_search_results_location_list(self, hits) -> List[LocationResponse]:
-        results = []
 
-        current_day = datetime.now(pytz.utc).isoweekday()
-        current_time = datetime.now().time()
+def reindexing_alias(alias: str) -> str:
+    return f"{alias}_reindexing"
 
-        for hit in hits:
-            source = hit["_source"]
-            working_hours = source.get("working_days", [])
 
-            status = self.__calculate_status(working_hours, current_day, current_time)
-            source["status"] = status
+def process_search_results_location_list(hits, with_distance: bool = False) -> List[LocationResponse]:
+    """``with_distance`` hits are sorted by ``_geo_distance`` in kilometers, their sort value is the distance."""
+    clock = StatusClock()
 
-            results.append(LocationResponse(**source))
+    sources = []
+    for hit in hits:
+        source = hit["_source"]
+        source["status"] = clock.status(source.pop("opening_hours", None), source.get("timezone"))
+        if with_distance:
+            source["distance"] = hit["sort"][0]
+        sources.append(source)
 
-        return results
+    # one validation call for the whole list instead of a model per hit
+    return location_response_list_adapter.validate_python(sources)
 
-    def update_charger_type_and_power_output(self, index, location_id, charger_types, types_to_remove) -> None:
-        try:
-            if not self.es_client.exists(index=index, id=location_id):
-                raise RuntimeError(f"Document with ID {location_id} does not exist in index {index}.")
-
-            update_body = {
-                "script": {
-                    "source": """
-
-                                if (ctx._source.charger_types == null) {
-                                    ctx._source.charger_types = params.charger_types;
-                                } else {
-                                    def types_to_remove = params.types_to_remove;
-
-                                    for (def type_to_remove : types_to_remove) {
-                                        for (int i = 0; i < ctx._source.charger_types.size(); i++) {
-                                            def charger = ctx._source.charger_types[i];
-                                            if (charger.power_output == type_to_remove.power_output && charger.type == type_to_remove.type) {
-                                                ctx._source.charger_types.remove(i);
-                                                break;
-                                            }
-                                        }
-                                    }
-
-                                    ctx._source.charger_types.addAll(params.charger_types);
-                                }
-                                """,
-                    "params": {"types_to_remove": types_to_remove, "charger_types": charger_types},
-                }
-            }
-
-            self.es_client.update(index=index, id=location_id, body=update_body)
 
-        except Exception as e:
-            raise RuntimeError(f"Failed to update document: {e}")
+def search_page(response, params: dict) -> LocationSearchPage:
+    """Results of a search template response, a full page of a paged search points to the next one."""
+    hits = get_hits(response)
+    next_cursor = None
+    if params["paged"] and hits and len(hits) == params["size"]:
+        next_cursor = encode_search_cursor(response.get("pit_id", params["pit"]["id"]), hits[-1]["sort"])
+    return LocationSearchPage(founds=process_search_results_location_list(hits), next_cursor=next_cursor)
 
-    def delete_charger_type_and_power_output(self, index, location_id, charger_types, number_of_station: int = 1) -> None:
-        try:
-            if not self.es_client.exists(index=index, id=location_id):
-                raise RuntimeError(f"Document with ID {location_id} does not exist in index {index}.")
-
-            update_body = {
-                "script": {
-                    "source": """
-
-                                if (ctx._source.charger_types != null) {
-                                    def types_to_remove = params.types_to_remove;
-
-                                    for (def type_to_remove : types_to_remove) {
-                                        for (int i = 0; i < ctx._source.charger_types.size(); i++) {
-                                            def charger = ctx._source.charger_types[i];
-                                            if (charger.power_output == type_to_remove.power_output && charger.type == type_to_remove.type) {
-                                                ctx._source.charger_types.remove(i);
-                                                break;
-                                            }
-                                        }
-                                    }
-
-                                    ctx._source.station_count -= params.number_of_station;
-                                }
-                                """,
-                    "params": {"types_to_remove": charger_types, "number_of_station": number_of_station},
-                }
-            }
-
-            self.es_client.update(index=index, id=location_id, body=update_body)
 
-        except Exception as e:
-            raise RuntimeError(f"Failed to update document: {e}")
+def route_candidates(response) -> list[dict]:
+    candidates = [hit["_source"] for hit in get_hits(response)]
+    if len(candidates) == configs.ES_ROUTE_MAX_LOCATIONS:
+        logger.warning(f"Route corridor truncated to {configs.ES_ROUTE_MAX_LOCATIONS} locations")
+    return candidates
 
-    def search_location_on_direction(self, coordinates: list[Coordinate]) -> List[LocationResponse]:
-
-        es_query = {
-            "query": {
-                "bool": {
-                    "filter": {
-                        "geo_polygon": {
-                            "location": {"points": [{"lat": coordinate.lat, "lon": coordinate.lng} for coordinate in coordinates]}
-                        }
-                    },
-                }
-            }
-        }
 
-        try:
-            response = self.es_client.search(index=configs.ES_LOCATION_INDEX, body=es_query)
-            hits = response["hits"]["hits"]
-            results = self.__process_search_results_location_list(hits)
-        except Exception as e:
-            raise NotFoundError(detail=str(e))
+def process_location_clusters(response) -> List[LocationCluster]:
+    buckets = response.get("aggregations", {}).get("clusters", {}).get("buckets", [])
+    return [
+        LocationCluster(
+            key=bucket["key"],
+            count=bucket["doc_count"],
+            latitude=bucket["centroid"]["location"]["lat"],
+            longitude=bucket["centroid"]["location"]["lon"],
+            station_count=int(bucket["station_count"]["value"]),
+            max_power_output=bucket["max_power_output"]["value"],
+        )
+        for bucket in buckets
+    ]
 
-        return results
 
-    def wipe_data(self, index: str):
-        if self.es_client.indices.exists(index=index):
-            response = self.es_client.indices.delete(index=index)
-            return response
-        return None
+def get_hits(response) -> list:
+    # ``filter_path`` drops the ``hits`` key altogether when nothing matched
+    return response.get("hits", {}).get("hits", [])
 
 
 def get_search_result(response):
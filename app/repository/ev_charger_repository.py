@@ -2,13 +2,16 @@ from contextlib import AbstractContextManager
 from typing import Callable
 import logging
 
-from sqlalchemy import and_, select
+from datetime import datetime
+
+from sqlalchemy import and_, not_, select, update
 from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
 
 from app.core.exceptions import NotFoundError
 from app.model.ev_charger import EVCharger
 from app.model.ev_charger_port import EVChargerPort
 from app.repository.base_repository import BaseRepository
+from app.repository.location_sync_outbox_repository import mark_locations_dirty
 from app.schema.base_schema import FindResult
 from app.schema.ev_charger_schema import (
     CreateEVCharger,
@@ -113,6 +116,7 @@ class EVChargerRepository(BaseRepository):
             ev_charger = EVCharger(**schema.model_dump(exclude={"ev_charger_ports"}))
 
             session.add(ev_charger)
+            mark_locations_dirty(session, [ev_charger.location_id])
             session.commit()
             session.refresh(ev_charger)
 
@@ -123,6 +127,7 @@ class EVChargerRepository(BaseRepository):
                 ]
 
                 session.add_all(port_list)
+                mark_locations_dirty(session, [ev_charger.location_id])
                 session.commit()
 
             logger.info(f"Created EV charger with ID {ev_charger.id}.")
@@ -203,6 +208,27 @@ class EVChargerRepository(BaseRepository):
                     "version": EVCharger.version + 1,
                 }
             )
+            # the charger may have moved, both documents change
+            mark_locations_dirty(session, [ev_charger.location_id, schema.location_id])
             session.commit()
             logger.info(f"Updated EV charger with ID {id}.")
             return self.read_by_id(id), ports
+
+    def soft_delete_by_id(self, id: str):
+        with self.session_factory() as session:
+            delete_query = (
+                update(EVCharger)
+                .returning(EVCharger.location_id)
+                .filter(and_(EVCharger.id == id, not_(EVCharger.is_deleted)))
+                .values(
+                    is_deleted=True,
+                    deleted_at=datetime.utcnow(),
+                )
+            )
+            location_id = session.execute(delete_query).scalar()
+            if not location_id:
+                raise NotFoundError(detail=f"not found id : {id}")
+            mark_locations_dirty(session, [location_id])
+            session.commit()
+
+            return self.read_by_id_without_deleted(id)
@@ -1,36 +1,108 @@
-from contextlib import AbstractContextManager
+import uuid
+from contextlib import AbstractAsyncContextManager, AbstractContextManager, contextmanager
 from datetime import datetime
-from typing import Callable
+from typing import Callable, Iterator
 import logging
 
-from sqlalchemy import and_, delete, insert, not_, or_, select, update
+from sqlalchemy import (
+    and_,
+    delete,
+    func,
+    insert,
+    literal_column,
+    not_,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
 
-from app.core.exceptions import DuplicatedError, NotFoundError
+from app.core.exceptions import DuplicatedError, NotFoundError, ValidationError
 from app.model.ev_charger import EVCharger
 from app.model.ev_charger_port import EVChargerPort
 from app.model.location import Location
 from app.model.location_amenities import LocationAmenities
 from app.model.location_search_history import LocationSearchHistory
+from app.model.location_sync_outbox import LocationSyncOutbox
 from app.model.power_output import PowerOutput
 from app.model.power_plug_type import PowerPlugType
 from app.model.user_favorite import UserFavorite
 from app.model.working_day import WorkingDay
 from app.repository.base_repository import BaseRepository
+from app.repository.location_sync_outbox_repository import (
+    claim_dirty_locations,
+    mark_locations_dirty,
+)
 from app.schema.base_schema import FindResult
+from app.schema.ev_charger_schema import CreateBulkEVCharger
 from app.schema.location_schema import (
     CreateEditLocation,
     DetailedLocationResponse,
     FindLocation,
     LocationByRadiusQuery,
+    LocationResponse,
     LocationResponseWithAmenities,
+    LocationResponseWithoutEVChargers,
 )
 from app.util.pagination import paginate
 from app.util.query_builder import dict_to_sqlalchemy_filter_options
 
 logger = logging.getLogger(__name__)
 
+BULK_UPSERT_CHUNK_SIZE = 500
+# SQLSTATE of unique constraint violations
+UNIQUE_VIOLATION = "23505"
+# key of the advisory lock held by the Elasticsearch reindex, "location" in ASCII
+REINDEX_LOCK_KEY = 0x6C6F636174696F6E
+
+
+def detailed_location_options():
+    """Eager loads covering every relationship of ``DetailedLocationResponse``."""
+    return (
+        selectinload(Location.ev_chargers.and_(EVCharger.is_deleted.__eq__(False)))
+        .selectinload(EVCharger.ev_charger_ports.and_(EVChargerPort.is_deleted.__eq__(False)))
+        .options(
+            joinedload(EVChargerPort.power_output.and_(PowerOutput.is_deleted.__eq__(False))),
+            joinedload(EVChargerPort.power_plug_type.and_(PowerPlugType.is_deleted.__eq__(False))),
+        ),
+        selectinload(Location.working_days.and_(WorkingDay.is_deleted.__eq__(False))),
+        location_amenities_option(),
+    )
+
+
+def location_amenities_option():
+    """Eager load of the ``location_amenities`` of ``LocationResponseWithAmenities``, amenities included."""
+    return selectinload(Location.location_amenities.and_(LocationAmenities.is_deleted.__eq__(False))).joinedload(LocationAmenities.amenities)
+
+
+def radius_query(schema: LocationByRadiusQuery):
+    """Closest active locations within ``schema.radius`` km, nearest first.
+
+    Filters and sorts on the ``ll_to_earth(latitude, longitude)`` gist index,
+    the cube ``<->`` order matches the great circle distance order.
+    """
+    center = func.ll_to_earth(schema.user_lat, schema.user_long)
+    location_point = func.ll_to_earth(Location.latitude, Location.longitude)
+    distance = func.earth_distance(center, location_point)
+    query = select(Location, distance.label("distance")).filter(not_(Location.is_deleted))
+    if schema.radius is not None:
+        radius_in_meters = schema.radius * 1000
+        query = query.filter(
+            func.earth_box(center, radius_in_meters).op("@>")(location_point),
+            distance.__le__(radius_in_meters),
+        )
+    return query.order_by(location_point.op("<->")(center)).limit(schema.limit)
+
+
+def radius_response(location: Location, distance: float) -> LocationResponse:
+    response = LocationResponse.model_validate(location, from_attributes=True)
+    response.distance = distance / 1000
+    return response
+
 
 class LocationRepository(BaseRepository):
     def __init__(self, session_factory: Callable[..., AbstractContextManager[Session]]):
@@ -45,39 +117,10 @@ class LocationRepository(BaseRepository):
         disable_pagination: bool = False,
     ):
         with self.session_factory() as session:
-            query = select(Location).options(
-                selectinload(
-                    Location.location_amenities.and_(
-                        LocationAmenities.is_deleted.__eq__(False)
-                    )
-                ),
-            )
             if detailed:
-                query.options(
-                    selectinload(
-                        Location.ev_chargers.and_(EVCharger.is_deleted.__eq__(False))
-                    )
-                    .selectinload(
-                        EVCharger.ev_charger_ports.and_(
-                            EVChargerPort.is_deleted.__eq__(False)
-                        )
-                    )
-                    .options(
-                        joinedload(
-                            EVChargerPort.power_output.and_(
-                                EVChargerPort.is_deleted.__eq__(False)
-                            )
-                        ),
-                        joinedload(
-                            EVChargerPort.power_plug_type.and_(
-                                PowerPlugType.is_deleted.__eq__(False)
-                            )
-                        ),
-                    ),
-                    selectinload(
-                        Location.working_days.and_(WorkingDay.is_deleted.__eq__(False))
-                    ),
-                )
+                query = select(Location).options(*detailed_location_options())
+            else:
+                query = select(Location).options(location_amenities_option())
             filter_options = dict_to_sqlalchemy_filter_options(
                 self.model, schema.model_dump(exclude_none=True, exclude={"text_value"})
             )
@@ -116,6 +159,20 @@ class LocationRepository(BaseRepository):
             )
 
     def read_by_id(self, id: str):
+        with self.session_factory() as session:
+            query = (
+                select(Location)
+                .options(*detailed_location_options())
+                .filter(and_(Location.id.__eq__(id), Location.is_deleted.__eq__(False)))
+            )
+            rs = session.execute(query).scalar()
+            if not rs:
+                raise NotFoundError(detail=f"not found id : {id}")
+            return DetailedLocationResponse.model_validate(rs, from_attributes=True)
+
+    def read_by_ids(self, ids: list[str]) -> list[DetailedLocationResponse]:
+        if not ids:
+            return []
         with self.session_factory() as session:
             query = (
                 select(Location)
@@ -129,16 +186,8 @@ class LocationRepository(BaseRepository):
                         )
                     )
                     .options(
-                        joinedload(
-                            EVChargerPort.power_output.and_(
-                                PowerOutput.is_deleted.__eq__(False)
-                            )
-                        ),
-                        joinedload(
-                            EVChargerPort.power_plug_type.and_(
-                                PowerPlugType.is_deleted.__eq__(False)
-                            )
-                        ),
+                        joinedload(EVChargerPort.power_output),
+                        joinedload(EVChargerPort.power_plug_type),
                     ),
                     selectinload(
                         Location.working_days.and_(WorkingDay.is_deleted.__eq__(False))
@@ -147,38 +196,77 @@ class LocationRepository(BaseRepository):
                         Location.location_amenities.and_(
                             LocationAmenities.is_deleted.__eq__(False)
                         )
-                    ),
+                    ).joinedload(LocationAmenities.amenities),
                 )
-                .filter(and_(Location.id.__eq__(id), Location.is_deleted.__eq__(False)))
+                .filter(and_(Location.id.in_(ids), Location.is_deleted.__eq__(False)))
             )
-            rs = session.execute(query).scalar()
-            if not rs:
-                raise NotFoundError(detail=f"not found id : {id}")
-            return DetailedLocationResponse.model_validate(rs, from_attributes=True)
+            rs = session.execute(query).scalars().all()
+            return [
+                DetailedLocationResponse.model_validate(location, from_attributes=True)
+                for location in rs
+            ]
 
-    def read_by_radius(self, schema: LocationByRadiusQuery):
+    def read_by_radius(self, schema: LocationByRadiusQuery) -> list[LocationResponse]:
         with self.session_factory() as session:
-            query = select(Location)
+            rs = session.execute(radius_query(schema)).all()
+            return [radius_response(location, distance) for location, distance in rs]
 
-            if schema.radius is not None:
-                radius_in_lat_long = schema.radius / 100  # Estimation, low accuracy
-                query = query.filter(
-                    and_(
-                        not_(Location.is_deleted),
-                        Location.latitude.__ge__(schema.user_lat - radius_in_lat_long),
-                        Location.longitude.__ge__(
-                            schema.user_long - radius_in_lat_long
-                        ),
-                        Location.latitude.__le__(schema.user_lat + radius_in_lat_long),
-                        Location.longitude.__le__(
-                            schema.user_long + radius_in_lat_long
-                        ),
-                    )
+    def read_active_locations(self) -> list[LocationResponseWithoutEVChargers]:
+        with self.session_factory() as session:
+            query = (
+                select(Location)
+                .options(
+                    selectinload(Location.working_days.and_(WorkingDay.is_deleted.__eq__(False))),
+                    location_amenities_option(),
                 )
+                .filter(not_(Location.is_deleted))
+            )
+            return [LocationResponseWithoutEVChargers.model_validate(location, from_attributes=True) for location in session.scalars(query)]
 
-            rs = session.execute(query).scalars().all()
+    def count_active_locations(self) -> int:
+        with self.session_factory() as session:
+            return session.scalar(select(func.count()).select_from(Location).filter(not_(Location.is_deleted)))
+
+    @contextmanager
+    def reindex_lock(self) -> Iterator[bool]:
+        """Hold the reindex advisory lock while the block runs, yields whether it was acquired.
+
+        The lock belongs to a transaction left open until the block ends, it is
+        released as well when the process dies mid reindex.
+        """
+        with self.session_factory() as session:
+            yield session.scalar(select(func.pg_try_advisory_xact_lock(REINDEX_LOCK_KEY)))
+
+    def stream_active_locations(self, batch_size: int) -> Iterator[DetailedLocationResponse]:
+        """Every active location, fetched ``batch_size`` rows at a time from a server side cursor."""
+        with self.session_factory() as session:
+            query = (
+                select(Location)
+                .options(*detailed_location_options())
+                .filter(not_(Location.is_deleted))
+                .execution_options(yield_per=batch_size)
+            )
+            for location in session.scalars(query):
+                yield DetailedLocationResponse.model_validate(location, from_attributes=True)
 
-            return rs
+    def read_versions(self, ids: list[str]) -> dict[str, int | None]:
+        """Version of each of ``ids``, ``None`` for the ones without a row, deleted rows included."""
+        if not ids:
+            return {}
+        with self.session_factory() as session:
+            versions = dict(session.execute(select(Location.id, Location.version).filter(Location.id.in_(ids))).all())
+            return {id: versions.get(uuid.UUID(id)) for id in ids}
+
+    def claim_dirty_location_ids(self, batch_size: int) -> list[str]:
+        with self.session_factory() as session:
+            location_ids = claim_dirty_locations(session, batch_size)
+            session.commit()
+            return location_ids
+
+    def mark_dirty(self, location_ids: list[str]) -> None:
+        with self.session_factory() as session:
+            mark_locations_dirty(session, location_ids)
+            session.commit()
 
     def create(self, schema: CreateEditLocation):
         # Check if location with the same here_id already exists, if so, update it
@@ -207,6 +295,7 @@ class LocationRepository(BaseRepository):
             )
             try:
                 session.add(location)
+                mark_locations_dirty(session, [location.id])
                 session.commit()
                 session.refresh(location)
             except IntegrityError as e:
@@ -218,6 +307,7 @@ class LocationRepository(BaseRepository):
                     for amenity_id in schema.amenities_id
                 ]
                 session.add_all(amentities_list)
+                mark_locations_dirty(session, [location.id])
                 session.commit()
 
             logger.info(f"Location with here_id {schema.here_id} created successfully.")
@@ -273,6 +363,7 @@ class LocationRepository(BaseRepository):
                     )
                     .values(is_deleted=True, deleted_at=datetime.utcnow())
                 )
+                mark_locations_dirty(session, [id])
 
                 session.commit()
 
@@ -298,11 +389,394 @@ class LocationRepository(BaseRepository):
                         for amenity_id in upsert_location_amenities_id
                     ]
                 )
+                mark_locations_dirty(session, [id])
                 session.commit()
 
             logger.info(f"Location with id {id} updated successfully.")
             return self.read_by_id(id)
 
+    def bulk_upsert(
+        self,
+        locations: list[CreateEditLocation],
+        ev_chargers: list[CreateBulkEVCharger],
+    ) -> dict[str, tuple[uuid.UUID, bool]]:
+        """Upsert a whole HERE page in one transaction.
+
+        Locations, working days, EV chargers and ports are written with
+        multi-row ``INSERT ... ON CONFLICT (here_id) DO UPDATE`` statements.
+        Amenities are left untouched since HERE does not provide them.
+        Locations without a ``here_id`` and ports with an incomplete power
+        output are skipped. Chargers and ports missing from the payload of
+        their location are soft deleted.
+        Returns ``{location here_id: (location id, inserted)}``.
+        """
+        # ON CONFLICT cannot touch the same row twice in one statement
+        locations_by_here_id = {
+            location.here_id: location for location in locations if location.here_id
+        }
+        skipped = sum(not location.here_id for location in locations)
+        if skipped:
+            # they would all collapse into one row, reported as failed by the caller
+            logger.warning(f"Skipped {skipped} locations without a here_id.")
+        if not locations_by_here_id:
+            return {}
+
+        with self.session_factory() as session:
+            try:
+                upserted = self._bulk_upsert_locations(
+                    session, list(locations_by_here_id.values())
+                )
+                location_ids = {
+                    here_id: location_id for here_id, (location_id, _) in upserted.items()
+                }
+                self._bulk_upsert_working_days(
+                    session, locations_by_here_id, location_ids
+                )
+                self._bulk_upsert_ev_chargers(session, ev_chargers, location_ids)
+                mark_locations_dirty(session, location_ids.values())
+                session.commit()
+            except IntegrityError as e:
+                # only unique violations are conflicts, NOT NULL or foreign key errors are bad data
+                if getattr(e.orig, "pgcode", None) == UNIQUE_VIOLATION:
+                    raise DuplicatedError(detail=str(e.orig))
+                raise ValidationError(detail=str(e.orig))
+
+        logger.info(f"Bulk upserted {len(upserted)} locations.")
+        return upserted
+
+    @staticmethod
+    def _upsert_assignments(stmt, model, keys) -> dict:
+        """``ON CONFLICT`` assignments of ``keys``, a ``NULL`` from HERE keeps the stored value like ``exclude_none`` updates."""
+        columns = model.__table__.c
+        return {
+            key: func.coalesce(stmt.excluded[key], columns[key])
+            for key in keys
+            if key not in ("id", "here_id", "is_deleted", "version")
+        }
+
+    @staticmethod
+    def _chunks(rows: list, size: int = BULK_UPSERT_CHUNK_SIZE):
+        for i in range(0, len(rows), size):
+            yield rows[i : i + size]
+
+    def _bulk_upsert_locations(
+        self, session: Session, locations: list[CreateEditLocation]
+    ) -> dict[str, tuple[uuid.UUID, bool]]:
+        rows = [
+            {
+                **location.model_dump(exclude={"working_days", "amenities_id"}),
+                "id": uuid.uuid4(),
+                "is_deleted": False,
+                "version": 1,
+            }
+            for location in locations
+        ]
+        upserted: dict[str, tuple[uuid.UUID, bool]] = {}
+        for chunk in self._chunks(rows):
+            stmt = pg_insert(Location).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Location.here_id],
+                set_={
+                    **self._upsert_assignments(stmt, Location, chunk[0]),
+                    "version": Location.version + 1,
+                    "updated_at": func.now(),
+                },
+            ).returning(
+                Location.here_id,
+                Location.id,
+                # xmax is only zero for freshly inserted tuples
+                literal_column("xmax = 0").label("inserted"),
+            )
+            for here_id, location_id, inserted in session.execute(stmt):
+                upserted[here_id] = (location_id, inserted)
+        return upserted
+
+    def _bulk_upsert_working_days(
+        self,
+        session: Session,
+        locations_by_here_id: dict[str, CreateEditLocation],
+        location_ids: dict[str, uuid.UUID],
+    ) -> None:
+        rows = [
+            {
+                **day.model_dump(),
+                "id": uuid.uuid4(),
+                "location_id": location_ids[here_id],
+                "is_deleted": False,
+                "version": 1,
+            }
+            for here_id, location in locations_by_here_id.items()
+            for day in location.working_days
+        ]
+        for chunk in self._chunks(rows):
+            stmt = pg_insert(WorkingDay).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[WorkingDay.location_id, WorkingDay.day],
+                set_={
+                    "open_time": stmt.excluded.open_time,
+                    "close_time": stmt.excluded.close_time,
+                    "is_deleted": False,
+                    "deleted_at": None,
+                    "version": WorkingDay.version + 1,
+                    "updated_at": func.now(),
+                },
+            )
+            session.execute(stmt)
+
+        kept_days = [(row["location_id"], row["day"]) for row in rows]
+        session.execute(
+            update(WorkingDay)
+            .filter(
+                WorkingDay.location_id.in_(list(location_ids.values())),
+                not_(WorkingDay.is_deleted),
+                not_(tuple_(WorkingDay.location_id, WorkingDay.day).in_(kept_days)),
+            )
+            .values(is_deleted=True, deleted_at=datetime.utcnow())
+        )
+
+    @staticmethod
+    def _power_plug_type_key(schema) -> tuple[str, str]:
+        return schema.power_model.value, schema.plug_type
+
+    def _resolve_power_plug_types(
+        self, session: Session, ev_chargers: list[CreateBulkEVCharger]
+    ) -> dict[tuple[str, str], uuid.UUID]:
+        schemas = {
+            self._power_plug_type_key(port.power_plug_type): port.power_plug_type
+            for ev_charger in ev_chargers
+            for port in ev_charger.ev_charger_ports
+        }
+        if not schemas:
+            return {}
+        existing = session.execute(
+            select(
+                PowerPlugType.power_model, PowerPlugType.plug_type, PowerPlugType.id
+            ).filter(
+                tuple_(PowerPlugType.power_model, PowerPlugType.plug_type).in_(
+                    list(schemas.keys())
+                ),
+                not_(PowerPlugType.is_deleted),
+            )
+        ).all()
+        resolved = {(power_model, plug_type): id for power_model, plug_type, id in existing}
+        missing = [
+            {
+                **schema.model_dump(mode="json"),
+                "id": uuid.uuid4(),
+                "is_deleted": False,
+                "version": 1,
+            }
+            for key, schema in schemas.items()
+            if key not in resolved
+        ]
+        if missing:
+            session.execute(insert(PowerPlugType), missing)
+            resolved.update(
+                {(row["power_model"], row["plug_type"]): row["id"] for row in missing}
+            )
+        return resolved
+
+    def _resolve_power_outputs(
+        self, session: Session, ev_chargers: list[CreateBulkEVCharger]
+    ) -> dict[tuple[float, int, int], uuid.UUID]:
+        schemas = {
+            (
+                port.power_output.output_value,
+                port.power_output.voltage,
+                port.power_output.amperage,
+            ): port.power_output
+            for ev_charger in ev_chargers
+            for port in ev_charger.ev_charger_ports
+        }
+        if not schemas:
+            return {}
+        existing = session.execute(
+            select(
+                PowerOutput.output_value,
+                PowerOutput.voltage,
+                PowerOutput.amperage,
+                PowerOutput.id,
+            ).filter(
+                tuple_(
+                    PowerOutput.output_value, PowerOutput.voltage, PowerOutput.amperage
+                ).in_(list(schemas.keys())),
+                not_(PowerOutput.is_deleted),
+            )
+        ).all()
+        resolved = {
+            (output_value, voltage, amperage): id
+            for output_value, voltage, amperage, id in existing
+        }
+        missing = [
+            {
+                **schema.model_dump(mode="json"),
+                "id": uuid.uuid4(),
+                "is_deleted": False,
+                "version": 1,
+            }
+            for key, schema in schemas.items()
+            if key not in resolved
+        ]
+        if missing:
+            session.execute(insert(PowerOutput), missing)
+            resolved.update(
+                {
+                    (row["output_value"], row["voltage"], row["amperage"]): row["id"]
+                    for row in missing
+                }
+            )
+        return resolved
+
+    @staticmethod
+    def _valid_ports(ev_charger: CreateBulkEVCharger) -> list:
+        """Ports of ``ev_charger`` that satisfy the port and power output NOT NULL columns."""
+        ports = []
+        for port in ev_charger.ev_charger_ports:
+            power_output = port.power_output
+            if not port.here_id or None in (
+                power_output.output_value,
+                power_output.voltage,
+                power_output.amperage,
+            ):
+                logger.warning(
+                    f"Skipped port {port.here_id} of EV charger {ev_charger.here_id}: incomplete power output."
+                )
+                continue
+            ports.append(port)
+        return ports
+
+    def _bulk_upsert_ev_chargers(
+        self,
+        session: Session,
+        ev_chargers: list[CreateBulkEVCharger],
+        location_ids: dict[str, uuid.UUID],
+    ) -> None:
+        ev_chargers_by_here_id = {
+            ev_charger.here_id: ev_charger.model_copy(
+                update={"ev_charger_ports": self._valid_ports(ev_charger)}
+            )
+            for ev_charger in ev_chargers
+            if ev_charger.here_id and ev_charger.location_here_id in location_ids
+        }
+        if not ev_chargers_by_here_id:
+            return
+
+        rows = [
+            {
+                **ev_charger.model_dump(
+                    exclude={"location_here_id", "ev_charger_ports"}
+                ),
+                "id": uuid.uuid4(),
+                "location_id": location_ids[ev_charger.location_here_id],
+                "is_deleted": False,
+                "version": 1,
+            }
+            for ev_charger in ev_chargers_by_here_id.values()
+        ]
+        ev_charger_ids: dict[str, uuid.UUID] = {}
+        for chunk in self._chunks(rows):
+            stmt = pg_insert(EVCharger).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[EVCharger.here_id],
+                set_={
+                    **self._upsert_assignments(stmt, EVCharger, chunk[0]),
+                    "is_deleted": False,
+                    "deleted_at": None,
+                    "version": EVCharger.version + 1,
+                    "updated_at": func.now(),
+                },
+            ).returning(EVCharger.here_id, EVCharger.id)
+            ev_charger_ids.update(dict(session.execute(stmt).all()))
+
+        power_plug_type_ids = self._resolve_power_plug_types(
+            session, list(ev_chargers_by_here_id.values())
+        )
+        power_output_ids = self._resolve_power_outputs(
+            session, list(ev_chargers_by_here_id.values())
+        )
+        port_rows = {
+            port.here_id: {
+                "id": uuid.uuid4(),
+                "here_id": port.here_id,
+                "ev_charger_id": ev_charger_ids[ev_charger.here_id],
+                "power_plug_type_id": power_plug_type_ids[
+                    self._power_plug_type_key(port.power_plug_type)
+                ],
+                "power_output_id": power_output_ids[
+                    (
+                        port.power_output.output_value,
+                        port.power_output.voltage,
+                        port.power_output.amperage,
+                    )
+                ],
+                "is_deleted": False,
+                "version": 1,
+            }
+            for ev_charger in ev_chargers_by_here_id.values()
+            for port in ev_charger.ev_charger_ports
+        }
+        for chunk in self._chunks(list(port_rows.values())):
+            stmt = pg_insert(EVChargerPort).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[EVChargerPort.here_id],
+                set_={
+                    "ev_charger_id": stmt.excluded.ev_charger_id,
+                    "power_plug_type_id": stmt.excluded.power_plug_type_id,
+                    "power_output_id": stmt.excluded.power_output_id,
+                    "is_deleted": False,
+                    "deleted_at": None,
+                    "version": EVChargerPort.version + 1,
+                    "updated_at": func.now(),
+                },
+            )
+            session.execute(stmt)
+
+        self._soft_delete_vanished_ev_chargers(session, ev_chargers_by_here_id, ev_charger_ids, location_ids)
+        # Ports which disappeared from the HERE payload are soft deleted, a charger
+        # without any valid port parsed keeps its ports rather than losing them all
+        ev_charger_ids_with_ports = [
+            ev_charger_ids[ev_charger.here_id] for ev_charger in ev_chargers_by_here_id.values() if ev_charger.ev_charger_ports
+        ]
+        if ev_charger_ids_with_ports:
+            session.execute(
+                update(EVChargerPort)
+                .filter(
+                    EVChargerPort.ev_charger_id.in_(ev_charger_ids_with_ports),
+                    not_(EVChargerPort.is_deleted),
+                    EVChargerPort.here_id.not_in(list(port_rows.keys())),
+                )
+                .values(is_deleted=True, deleted_at=datetime.utcnow())
+            )
+
+    @staticmethod
+    def _soft_delete_vanished_ev_chargers(
+        session: Session,
+        ev_chargers_by_here_id: dict[str, CreateBulkEVCharger],
+        ev_charger_ids: dict[str, uuid.UUID],
+        location_ids: dict[str, uuid.UUID],
+    ) -> None:
+        """Soft delete the chargers, and their ports, HERE no longer lists for a location.
+
+        Only locations with at least one charger in the payload are reconciled.
+        """
+        reconciled_location_ids = list({location_ids[ev_charger.location_here_id] for ev_charger in ev_chargers_by_here_id.values()})
+        vanished_ids = session.scalars(
+            select(EVCharger.id).filter(
+                EVCharger.location_id.in_(reconciled_location_ids),
+                not_(EVCharger.is_deleted),
+                EVCharger.here_id.not_in(list(ev_charger_ids.keys())),
+            )
+        ).all()
+        if not vanished_ids:
+            return
+        deleted_at = datetime.utcnow()
+        session.execute(
+            update(EVChargerPort)
+            .filter(EVChargerPort.ev_charger_id.in_(vanished_ids), not_(EVChargerPort.is_deleted))
+            .values(is_deleted=True, deleted_at=deleted_at)
+        )
+        session.execute(update(EVCharger).filter(EVCharger.id.in_(vanished_ids)).values(is_deleted=True, deleted_at=deleted_at))
+
     def _delete_amenities_by_list_id(self, id_list):
         with self.session_factory() as session:
             session.query(LocationAmenities).filter(
@@ -369,13 +843,13 @@ class LocationRepository(BaseRepository):
                     .values(is_deleted=True, deleted_at=datetime.utcnow())
                 )
                 session.execute(delete_ev_chargers_query)
-            if rs.location_search_histories.__len__() > 0:
-                delete_location_search_histories_query = (
-                    update(LocationSearchHistory)
-                    .filter(LocationSearchHistory.location_id.__eq__(id))
-                    .values(is_deleted=True, deleted_at=datetime.utcnow())
-                )
-                session.execute(delete_location_search_histories_query)
+            # a no-op without histories, cheaper than lazy loading them to check
+            delete_location_search_histories_query = (
+                update(LocationSearchHistory)
+                .filter(LocationSearchHistory.location_id.__eq__(id))
+                .values(is_deleted=True, deleted_at=datetime.utcnow())
+            )
+            session.execute(delete_location_search_histories_query)
             delete_query = (
                 update(Location)
                 .filter(Location.id.__eq__(id))
@@ -385,6 +859,7 @@ class LocationRepository(BaseRepository):
                 )
             )
             session.execute(delete_query)
+            mark_locations_dirty(session, [id])
             session.commit()
 
     def wipe_locations_data(self):
@@ -410,4 +885,36 @@ class LocationRepository(BaseRepository):
             location_delete_stmt = delete(Location)
             session.execute(location_delete_stmt)
 
+            # the index is wiped along, nothing is left to sync
+            location_sync_outbox_delete_stmt = delete(LocationSyncOutbox)
+            session.execute(location_sync_outbox_delete_stmt)
+
             session.commit()
+
+
+class AsyncLocationRepository:
+    """Read only ``LocationRepository`` counterpart running on ``AsyncSession``.
+
+    Relationships can not be lazy loaded here, queries eager load everything
+    the response schemas read.
+    """
+
+    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]]):
+        self.session_factory = session_factory
+
+    async def read_by_id(self, id: str) -> DetailedLocationResponse:
+        async with self.session_factory() as session:
+            query = (
+                select(Location)
+                .options(*detailed_location_options())
+                .filter(and_(Location.id.__eq__(id), Location.is_deleted.__eq__(False)))
+            )
+            rs = (await session.execute(query)).scalar()
+            if not rs:
+                raise NotFoundError(detail=f"not found id : {id}")
+            return DetailedLocationResponse.model_validate(rs, from_attributes=True)
+
+    async def read_by_radius(self, schema: LocationByRadiusQuery) -> list[LocationResponse]:
+        async with self.session_factory() as session:
+            rs = (await session.execute(radius_query(schema))).all()
+            return [radius_response(location, distance) for location, distance in rs]
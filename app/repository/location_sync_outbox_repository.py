@@ -0,0 +1,57 @@
+import uuid
+from typing import Callable, Iterable
+
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.model.location import Location
+from app.model.location_sync_outbox import LocationSyncOutbox
+
+LOCATIONS_DIRTY = "locations_dirty"
+
+_dirty_listeners: list[Callable[[], None]] = []
+
+
+def mark_locations_dirty(session: Session, location_ids: Iterable[uuid.UUID | str]) -> None:
+    """Queue the documents of ``location_ids`` for a rebuild, committed along with ``session``.
+
+    The location versions are bumped as well, they are the external versions
+    of the documents.
+    """
+    ids = [uuid.UUID(location_id) for location_id in {str(location_id) for location_id in location_ids}]
+    if ids:
+        session.execute(update(Location).filter(Location.id.in_(ids)).values(version=Location.version + 1))
+        session.execute(insert(LocationSyncOutbox), [{"location_id": id} for id in ids])
+        session.info[LOCATIONS_DIRTY] = True
+
+
+def add_dirty_listener(listener: Callable[[], None]) -> Callable[[], None]:
+    """Call ``listener`` after each commit queuing locations, returns the function removing it."""
+    _dirty_listeners.append(listener)
+    return lambda: _dirty_listeners.remove(listener)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_dirty_listeners(session: Session) -> None:
+    if session.info.pop(LOCATIONS_DIRTY, False):
+        for listener in list(_dirty_listeners):
+            listener()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty_flag(session: Session) -> None:
+    session.info.pop(LOCATIONS_DIRTY, None)
+
+
+def claim_dirty_locations(session: Session, batch_size: int) -> list[str]:
+    """Remove up to ``batch_size`` queued rows, oldest first, and return their distinct location ids.
+
+    Rows locked by another worker are skipped, each row goes to a single worker.
+    """
+    batch = (
+        select(LocationSyncOutbox.id).order_by(LocationSyncOutbox.id).limit(batch_size).with_for_update(skip_locked=True).scalar_subquery()
+    )
+    location_ids = session.scalars(
+        delete(LocationSyncOutbox).filter(LocationSyncOutbox.id.in_(batch)).returning(LocationSyncOutbox.location_id)
+    ).all()
+    return list(dict.fromkeys(str(location_id) for location_id in location_ids))
@@ -1,13 +1,13 @@
 from contextlib import AbstractContextManager
 from typing import Callable
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, select
 from sqlalchemy.orm import Session, joinedload
 
 from app.model.location import Location
 from app.model.user_favorite import UserFavorite
 from app.repository.base_repository import BaseRepository
-from app.schema.base_schema import FindResult, SearchOptions
+from app.schema.base_schema import CountModeOptions, FindResult, SearchOptions
 from app.schema.location_schema import LocationResponse
 from app.schema.user_favorite_schema import (
     DetailedUserFavorite,
@@ -15,7 +15,7 @@ from app.schema.user_favorite_schema import (
     FindUserFavoriteByUser,
     UserFavoriteByUserResponse,
 )
-from app.util.pagination import paginate
+from app.util.pagination import count_query, paginate
 
 
 class UserFavoriteRepository(BaseRepository):
@@ -44,9 +44,10 @@ class UserFavoriteRepository(BaseRepository):
             )
 
             paginated_query = query.offset(schema.offset).limit(schema.limit)
-            total = session.query(func.count()).select_from(query.subquery()).scalar()
+            count_mode = schema.count_mode or CountModeOptions.exact
+            total = count_query(query, session, count_mode)
 
-            if schema.page_size * (schema.page - 1) > total:
+            if count_mode == CountModeOptions.exact and schema.page_size * (schema.page - 1) > total:
                 raise ValueError("Page out of range")
 
             rs = session.execute(paginated_query).unique().scalars().all()
@@ -58,6 +59,11 @@ class UserFavoriteRepository(BaseRepository):
                     else []
                 ),
                 search_options=SearchOptions(
-                    total_count=total, page=schema.page, page_size=schema.page_size, ordering=schema.ordering, order_by=schema.order_by
+                    total_count=total,
+                    page=schema.page,
+                    page_size=schema.page_size,
+                    ordering=schema.ordering,
+                    order_by=schema.order_by,
+                    count_mode=count_mode,
                 ),
             )
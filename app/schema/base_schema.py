@@ -19,6 +19,12 @@ class ListOrderOptions(str, enum.Enum):
     asc = "asc"
 
 
+class CountModeOptions(str, enum.Enum):
+    exact = "exact"
+    estimate = "estimate"
+    none = "none"
+
+
 UPDATED_AT = "updated_at"
 
 
@@ -27,6 +33,9 @@ class PaginationQuery(BaseModel):
     page: Optional[int] = Field(default=1, ge=1)
     page_size: Optional[int] = Field(default=configs.PAGE_SIZE, ge=1)
     order_by: Optional[str] = UPDATED_AT
+    count_mode: Optional[CountModeOptions] = CountModeOptions.exact
+    # keyset mode, takes the ``next_cursor`` of the previous page instead of ``page``
+    cursor: Optional[str] = None
 
     @property
     def limit(self) -> int:
@@ -59,6 +68,7 @@ T = TypeVar("T")
 class FindResult(BaseModel, Generic[T]):
     founds: Optional[List[T]]
     search_options: Optional[SearchOptions]
+    next_cursor: Optional[str] = None
 
 
 class FindDateRange(BaseModel):
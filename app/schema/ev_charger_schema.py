@@ -8,6 +8,8 @@ from pydantic import BaseModel, ConfigDict
 
 from app.constant.enum.availability import AvailabilityEnum
 from app.schema.base_schema import ModelBaseInfo, PaginationQuery
+from app.schema.power_output_schema import CreatePowerOutput
+from app.schema.power_plug_type_schema import CreatePowerPlugType
 from app.util.schema import AllOptional
 
 
@@ -36,6 +38,20 @@ class CreateEVCharger(_BaseEVCharger):
     ev_charger_ports: list[CreatePort] | None = None
 
 
+class CreateBulkPort(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    here_id: str
+    power_plug_type: CreatePowerPlugType
+    power_output: CreatePowerOutput
+
+
+class CreateBulkEVCharger(_BaseEVCharger):
+    model_config = ConfigDict(from_attributes=True)
+    location_id: UUID | None = None
+    location_here_id: str
+    ev_charger_ports: list[CreateBulkPort] = []
+
+
 class UpsertPort(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     power_plug_type_id: uuid.UUID | None
@@ -1,8 +1,13 @@
 from pydantic import BaseModel, Field
 
+from app.core.config import configs
+
 
 class DirectionRequest(BaseModel):
     start_lat: float = Field(ge=-90, le=90, examples=10.7961894, description="Latitude of start point")
     start_long: float = Field(ge=-180, le=180, examples=106.633319, description="Longitude of start point")
     end_lat: float = Field(ge=-90, le=90, examples=10.7961894, description="Latitude of end point")
     end_long: float = Field(ge=-180, le=180, examples=106.633319, description="Longitude of end point")
+    # stations along the route are paged in route order
+    page: int = Field(default=1, ge=1)
+    page_size: int = Field(default=configs.ES_SEARCH_PAGE_SIZE, ge=1, le=configs.ES_SEARCH_MAX_PAGE_SIZE)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 
-from app.schema.ev_charger_schema import LocationResponse
+from app.schema.location_schema import RouteLocationResponse
 
 
 class Coordinate(BaseModel):
@@ -9,6 +9,9 @@ class Coordinate(BaseModel):
 
 
 class RouteResponse(BaseModel):
-    locations: list[LocationResponse] = []
+    locations: list[RouteLocationResponse] = []
     coordinates: list[Coordinate] = []
     overview_polyline: str | None = None
+    # stations of the whole corridor, ``next_page`` is unset on the last page
+    total_locations: int = 0
+    next_page: int | None = None
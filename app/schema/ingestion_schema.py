@@ -0,0 +1,16 @@
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+from app.constant.enum.ingestion import IngestionStatusEnum
+
+
+class IngestionItemResult(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    external_id: str | None = None
+    here_id: str | None = None
+    status: IngestionStatusEnum
+    location_id: UUID | None = None
+    ev_charger_count: int = 0
+    detail: str | None = None
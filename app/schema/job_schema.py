@@ -0,0 +1,18 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.constant.enum.job import JobStatusEnum
+
+
+class JobResponse(BaseModel):
+    id: UUID
+    name: str
+    status: JobStatusEnum = JobStatusEnum.PENDING
+    processed: int = 0
+    failed: int = 0
+    total: int | None = None
+    detail: str | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
@@ -2,17 +2,20 @@ import datetime
 from collections import Counter
 from typing import TYPE_CHECKING, Annotated
 
+import pytz
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 from app.constant.enum.location import Country
 from app.constant.enum.location_access import LocationAccess
 from app.constant.regex import PHONE_NUMBER_REGEX
+from app.core.config import configs
 from app.core.exceptions import ValidationError
 from app.schema.amenities_schema import AmenitiesResponse
 from app.schema.base_schema import ModelBaseInfo, PaginationQuery
 from app.schema.ev_charger_schema import EVChargerResponseWithEVChargerPort
 from app.schema.working_day_schema import WorkingDayResponse
 from app.util.schema import AllOptional
+from app.util.working_hours import guess_timezone
 
 if TYPE_CHECKING:
     from app.schema.location_amenities_schema import LocationAmenitiesResponse
@@ -43,10 +46,13 @@ class _BaseLocation(BaseModel):
     total_charging_ports: int | None = None
     access: LocationAccess | None = None
     payment_methods: list | None = None
+    timezone: str | None = None
 
 
 class LocationResponse(_BaseLocation, ModelBaseInfo):
     status: str | None = None
+    # kilometers from the searched point, only set by radius searches
+    distance: float | None = None
 
 
 class LocationAmenitiesResponse(ModelBaseInfo):
@@ -63,17 +69,31 @@ class LocationResponseWithAmenities(LocationResponse):
 
 
 class DetailedLocationResponse(LocationResponse):
+    version: int | None = None
     ev_chargers: list[EVChargerResponseWithEVChargerPort]
     working_days: list[WorkingDayResponse]
     location_amenities: list[LocationAmenitiesResponse] | None = None
 
 
+class RouteLocationResponse(LocationResponse):
+    # kilometers along the route to its closest point to the location
+    distance_along_route: float | None = None
+    # kilometers from the route to the location and back
+    detour_distance: float | None = None
+
+
+class LocationSearchPage(BaseModel):
+    founds: list[LocationResponse]
+    next_cursor: str | None = None
+
+
 class LocationByRadiusQuery(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     user_lat: float
     user_long: float
     radius: float = 10
+    limit: int = Field(default=100, ge=1, le=1000)
 
     @field_validator("radius")
     def validate_radius(cls, v: float | None):
@@ -198,6 +218,19 @@ class CreateEditLocation(_BaseLocation):
             return v
         raise ValueError("Longitude must be a valid value between -180 and 180.")
 
+    @field_validator("timezone")
+    def validate_timezone(cls, v: str | None) -> str | None:
+        # open_at filters only know the common names, not the deprecated aliases
+        if v is not None and v not in pytz.common_timezones_set:
+            raise ValueError("Timezone must be an IANA timezone name.")
+        return v
+
+    @model_validator(mode="after")
+    def default_timezone(self):
+        if self.timezone is None and self.latitude is not None and self.longitude is not None:
+            self.timezone = guess_timezone(self.country, self.latitude, self.longitude)
+        return self
+
     @model_validator(mode="after")
     def validate_working_days(self):
         working_days = self.working_days
@@ -220,6 +253,12 @@ class SearchLocation(BaseModel):
     lon: float | None = Field(ge=-180, le=180, default=None)
     radius: float | None = None
     query: str | None = None
+    # only the locations open at that instant, naive datetimes are UTC
+    open_at: datetime.datetime | None = None
+    open_now: bool = False
+    # searches without ``query`` are paged, ``cursor`` is the X-Next-Cursor of the previous page
+    page_size: int | None = Field(default=None, ge=1, le=configs.ES_SEARCH_MAX_PAGE_SIZE)
+    cursor: str | None = None
 
     @field_validator("radius")
     def validate_radius(cls, v: float | None):
@@ -256,6 +295,35 @@ class SearchLocation(BaseModel):
         return values
 
 
+class LocationClusterQuery(BaseModel):
+    min_lat: float = Field(ge=-90, le=90)
+    min_lon: float = Field(ge=-180, le=180)
+    max_lat: float = Field(ge=-90, le=90)
+    max_lon: float = Field(ge=-180, le=180)
+    zoom: int = Field(ge=0, le=29)
+    station_count: int | None = None
+    power_output_gte: float | None = None
+    power_output_lte: float | None = None
+    open_now: bool = False
+
+    @model_validator(mode="after")
+    def validate_bounding_box(self):
+        # a box crossing the antimeridian has min_lon > max_lon
+        if self.min_lat > self.max_lat:
+            raise ValidationError("min_lat must be lower than or equal to max_lat.")
+        return self
+
+
+class LocationCluster(BaseModel):
+    # geotile "zoom/x/y" key
+    key: str
+    count: int
+    latitude: float
+    longitude: float
+    station_count: int = 0
+    max_power_output: float | None = None
+
+
 # CRUD
 
 
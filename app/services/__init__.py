@@ -3,10 +3,10 @@ from app.services.city_service import CityService
 from app.services.district_service import DistrictService
 from app.services.ev_charger_port_service import EVChargerPortService
 from app.services.ev_charger_service import EVChargerService
-from app.services.gg_map_service import GGMapService
+from app.services.gg_map_service import AsyncGGMapService, GGMapService
 from app.services.location_amenities_service import LocationAmenitiesService
 from app.services.location_search_history_service import LocationSearchHistoryService
-from app.services.location_service import LocationService
+from app.services.location_service import AsyncLocationService, LocationService
 from app.services.media_service import MediaService
 from app.services.power_output_service import PowerOutputService
 from app.services.power_plug_type_service import PowerPlugTypeService
@@ -14,11 +14,13 @@ from app.services.user_favorite_service import UserFavoriteService
 
 __all__ = [
     "LocationService",
+    "AsyncLocationService",
     "PowerOutputService",
     "PowerPlugTypeService",
     "EVChargerService",
     "EVChargerPortService",
     "GGMapService",
+    "AsyncGGMapService",
     "UserFavoriteService",
     "CityService",
     "DistrictService",
@@ -1,41 +1,98 @@
-import requests
+import httpx
 from fastapi import HTTPException, status
 
+from app.core.cache import ResultCache
 from app.core.config import configs
+from app.core.http_client import AsyncHttpClient, HttpClient
 from app.schema.gg_map_schema import DirectionRequest
 from app.schema.google_api_schema import RouteResponse
+from app.util.geohash import geohash_cell
+
+GG_MAP_BASE_URL = "https://maps.googleapis.com/maps/api"
+DIRECTIONS_MODE = "driving"
+# a route or no route at all, any other status is an error which must not be cached
+DIRECTIONS_STATUSES = ("OK", "ZERO_RESULTS")
+
+
+def snap_direction(direction: DirectionRequest) -> tuple[str, DirectionRequest]:
+    """Directions cache key of a request, with the request snapped to the geohash cell centers it is asked upstream for."""
+    precision = configs.DIRECTIONS_CACHE_GEOHASH_PRECISION
+    start, start_lat, start_long = geohash_cell(direction.start_lat, direction.start_long, precision)
+    end, end_lat, end_long = geohash_cell(direction.end_lat, direction.end_long, precision)
+    direction = direction.model_copy(update={"start_lat": start_lat, "start_long": start_long, "end_lat": end_lat, "end_long": end_long})
+    return f"{DIRECTIONS_MODE}:{start}:{end}", direction
+
+
+def _direction_params(direction: DirectionRequest) -> dict:
+    return {
+        "origin": f"{direction.start_lat},{direction.start_long}",
+        "destination": f"{direction.end_lat},{direction.end_long}",
+        "key": configs.GOOGLE_MAPS_API_KEY,
+        "mode": DIRECTIONS_MODE,
+    }
+
+
+def _parse_directions(data: dict):
+    if data.get("status") not in DIRECTIONS_STATUSES:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=data.get("error_message") or data.get("status"))
+    routes = data.get("routes")
+    if not routes:
+        return RouteResponse()
+    directions = []
+    steps = routes[0].get("legs")[0].get("steps")
+
+    directions.append(steps[0].get("start_location"))
+    for step in steps:
+        directions.append(step.get("end_location"))
+
+    overview_polyline = routes[0].get("overview_polyline").get("points")
+
+    return RouteResponse(coordinates=directions, overview_polyline=overview_polyline)
 
 
 class GGMapService:
-    def __init__(self) -> None:
-        self.base_url = "https://maps.googleapis.com/maps/api"
-        pass
+    def __init__(self, http_client: HttpClient, directions_cache: ResultCache) -> None:
+        self.base_url = GG_MAP_BASE_URL
+        self.http_client = http_client
+        self.directions_cache = directions_cache
 
     def get_directions(self, direction: DirectionRequest):
-        direction_url = f"{self.base_url}/directions/json"
+        # concurrent misses of a key each call upstream, only ``AsyncGGMapService`` coalesces them
+        key, direction = snap_direction(direction)
+        directions = self.directions_cache.get(("directions", key))
+        if directions is None:
+            directions = self.__fetch_directions(direction)
+            self.directions_cache.set(("directions", key), directions)
+        return directions
 
-        params = {
-            "origin": f"{direction.start_lat},{direction.start_long}",
-            "destination": f"{direction.end_lat},{direction.end_long}",
-            "key": configs.GOOGLE_MAPS_API_KEY,
-            "mode": "driving",
-        }
+    def __fetch_directions(self, direction: DirectionRequest):
+        direction_url = f"{self.base_url}/directions/json"
 
         try:
-            response = requests.get(direction_url, params=params)
+            data = self.http_client.get_json(direction_url, params=_direction_params(direction))
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-            directions = []
-            if response.json().get("routes").__len__() == 0:
-                return directions
-            steps = response.json().get("routes")[0].get("legs")[0].get("steps")
+        return _parse_directions(data)
 
-            directions.append(steps[0].get("start_location"))
-            for step in steps:
-                directions.append(step.get("end_location"))
 
-            overview_polyline = response.json().get("routes")[0].get("overview_polyline").get("points")
+class AsyncGGMapService:
+    def __init__(self, http_client: AsyncHttpClient, directions_cache: ResultCache) -> None:
+        self.base_url = GG_MAP_BASE_URL
+        self.http_client = http_client
+        self.directions_cache = directions_cache
 
-            return RouteResponse(coordinates=directions, overview_polyline=overview_polyline)
+    async def get_directions(self, direction: DirectionRequest):
+        # identical concurrent requests share one upstream call
+        key, direction = snap_direction(direction)
+        return await self.directions_cache.get_or_compute(("directions", key), lambda: self.__fetch_directions(direction))
 
-        except requests.exceptions.RequestException as e:
+    async def __fetch_directions(self, direction: DirectionRequest):
+        direction_url = f"{self.base_url}/directions/json"
+
+        try:
+            data = await self.http_client.get_json(direction_url, params=_direction_params(direction))
+        except httpx.HTTPError as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+        return _parse_directions(data)
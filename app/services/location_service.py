@@ -1,26 +1,195 @@
-from typing import Any, List
+import asyncio
+import json
+import logging
+import math
+from collections import Counter
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, List
 
+import pytz
+
+from app.constant.enum.ingestion import IngestionStatusEnum
+from app.core.cache import ResultCache
 from app.core.config import configs
 from app.model.location_elastic import LocationElastic
-from app.repository import LocationRepository
-from app.repository.elastic_repository import ElasticsearchRepository
-from app.schema.base_schema import FindResult
+from app.repository import AsyncLocationRepository, LocationRepository
+from app.repository.elastic_repository import (
+    AsyncElasticsearchRepository,
+    ElasticsearchRepository,
+)
 from app.schema.ev_charger_port_schema import (
     DetailedEVChargerPortResponseWithoutEVCharger,
 )
-from app.schema.ev_charger_schema import EVChargerResponseWithEVChargerPort
+from app.schema.ev_charger_schema import (
+    CreateBulkEVCharger,
+    EVChargerResponseWithEVChargerPort,
+)
 from app.schema.gg_map_schema import DirectionRequest
+from app.schema.google_api_schema import RouteResponse
+from app.schema.ingestion_schema import IngestionItemResult
+from app.schema.job_schema import JobResponse
 from app.schema.location_schema import (
     CreateEditLocation,
     DetailedLocationResponse,
-    FindLocation,
     LocationByRadiusQuery,
+    LocationCluster,
+    LocationClusterQuery,
     LocationResponse,
+    LocationResponseWithoutEVChargers,
+    LocationSearchPage,
+    RouteLocationResponse,
     SearchLocation,
 )
 from app.services.base_service import BaseService
-from app.services.gg_map_service import GGMapService
-from app.util.calculate_polygon import create_polygon_from_line
+from app.services.gg_map_service import AsyncGGMapService, GGMapService, snap_direction
+from app.util.geohash import geohash_cell
+from app.util.spatial_index import SpatialIndex
+from app.util.working_hours import (
+    StatusClock,
+    location_timezone,
+    opening_ranges,
+    utc_minute,
+)
+
+if TYPE_CHECKING:
+    from app.util.calculate_polygon import RouteCorridor
+
+logger = logging.getLogger(__name__)
+
+
+def spatial_index_entry(
+    location: DetailedLocationResponse | LocationResponseWithoutEVChargers,
+) -> tuple[str, float, float, tuple[LocationResponse, list[dict], str]]:
+    """``SpatialIndex`` point of a location, the payload keeps its opening hours for the status."""
+    timezone = location_timezone(location)
+    # the guessed timezone, like the Elasticsearch documents the index stands in for
+    response = LocationResponse.model_validate(
+        {**location.model_dump(include=set(LocationResponse.model_fields)), "timezone": timezone}
+    )
+    payload = (
+        response,
+        opening_ranges(location.working_days or []),
+        timezone,
+    )
+    return str(location.id), location.latitude, location.longitude, payload
+
+
+def search_spatial_index(
+    spatial_index: SpatialIndex, schema: LocationByRadiusQuery
+) -> list[LocationResponse]:
+    matches = spatial_index.within(
+        schema.user_lat, schema.user_long, schema.radius, schema.limit
+    )
+
+    clock = StatusClock()
+    return [
+        response.model_copy(
+            update={
+                "distance": distance,
+                "status": clock.status(opening_hours, timezone),
+            }
+        )
+        for (response, opening_hours, timezone), distance in matches
+    ]
+
+
+def normalize_center(lat: float, lon: float) -> tuple[float, float]:
+    # nearby centers share the result of their geohash cell center
+    _, lat, lon = geohash_cell(lat, lon, configs.RESULT_CACHE_GEOHASH_PRECISION)
+    return lat, lon
+
+
+def normalize_radius(radius: float) -> float:
+    # rounded up, the bucket covers the requested radius
+    bucket = configs.RESULT_CACHE_RADIUS_BUCKET_KM
+    return math.ceil(radius / bucket) * bucket
+
+
+def normalize_search(
+    searchlocation: SearchLocation,
+    is_fuzzi: bool,
+    charger_type: List[str],
+    amenities: List[str],
+) -> tuple[str, SearchLocation, List[str], List[str]]:
+    """Result cache key of a search, with the normalized search and filters to run for it."""
+    update: dict[str, Any] = {}
+    if searchlocation.lat is not None and searchlocation.lon is not None:
+        update["lat"], update["lon"] = normalize_center(searchlocation.lat, searchlocation.lon)
+    if searchlocation.radius is not None:
+        update["radius"] = normalize_radius(searchlocation.radius)
+    # the open filter changes once a minute
+    if searchlocation.open_now:
+        update["open_at"], update["open_now"] = utc_minute(datetime.now(pytz.utc)), False
+    elif searchlocation.open_at is not None:
+        update["open_at"] = utc_minute(searchlocation.open_at)
+    searchlocation = searchlocation.model_copy(update=update)
+    charger_type, amenities = sorted(set(charger_type)), sorted(set(amenities))
+    key = json.dumps(
+        ["search", searchlocation.model_dump(mode="json"), is_fuzzi, charger_type, amenities],
+        sort_keys=True,
+    )
+    return key, searchlocation, charger_type, amenities
+
+
+def normalize_nearby(schema: LocationByRadiusQuery) -> tuple[str, LocationByRadiusQuery]:
+    """Result cache key of a nearby query, with the normalized query to run for it."""
+    user_lat, user_long = normalize_center(schema.user_lat, schema.user_long)
+    schema = schema.model_copy(
+        update={
+            "user_lat": user_lat,
+            "user_long": user_long,
+            "radius": normalize_radius(schema.radius),
+        }
+    )
+    return json.dumps(["nearby", schema.model_dump()], sort_keys=True), schema
+
+
+def route_corridor(directions: RouteResponse) -> "RouteCorridor | None":
+    # numpy and shapely are only loaded by the first route search, not at startup
+    from app.util.calculate_polygon import RouteCorridor, route_points
+
+    points = route_points(directions.overview_polyline, directions.coordinates)
+    if not points:
+        return None
+    return RouteCorridor(points, configs.ROUTE_CORRIDOR_KM, configs.ROUTE_SIMPLIFY_TOLERANCE_M)
+
+
+def order_along_route(corridor: "RouteCorridor", candidates: list[dict]) -> list[tuple[str, float, float]]:
+    """``(id, km along the route, km off the route)`` of the candidates within the corridor, in route order."""
+    located = corridor.positions(
+        [candidate["latitude"] for candidate in candidates],
+        [candidate["longitude"] for candidate in candidates],
+    )
+    positions = [(candidate["id"], *position) for candidate, position in zip(candidates, located) if position is not None]
+    return sorted(positions, key=lambda position: position[1])
+
+
+def route_page(positions: list[tuple[str, float, float]], direction: DirectionRequest) -> list[tuple[str, float, float]]:
+    offset = (direction.page - 1) * direction.page_size
+    return positions[offset : offset + direction.page_size]
+
+
+def set_route_locations(
+    directions: RouteResponse,
+    positions: list[tuple[str, float, float]],
+    page: list[tuple[str, float, float]],
+    locations: list[LocationResponse],
+    direction: DirectionRequest,
+) -> RouteResponse:
+    by_id = {str(location.id): location for location in locations}
+    route_locations = [
+        RouteLocationResponse(
+            **by_id[id].model_dump(),
+            distance_along_route=round(along, 3),
+            detour_distance=round(2 * offset, 3),
+        )
+        for id, along, offset in page
+        # deleted since the corridor search
+        if id in by_id
+    ]
+    next_page = direction.page + 1 if direction.page * direction.page_size < len(positions) else None
+    # the route is shared through the directions cache
+    return directions.model_copy(update={"locations": route_locations, "total_locations": len(positions), "next_page": next_page})
 
 
 class LocationService(BaseService):
@@ -29,10 +198,14 @@ class LocationService(BaseService):
         location_repository: LocationRepository,
         es_repository: ElasticsearchRepository,
         gg_map_service: GGMapService,
+        spatial_index: SpatialIndex,
+        result_cache: ResultCache,
     ):
         self.location_repository = location_repository
         self.es_repository = es_repository
         self.gg_map_service = gg_map_service
+        self.spatial_index = spatial_index
+        self.result_cache = result_cache
         super().__init__(location_repository)
 
     def get_by_id(self, id: str):
@@ -62,53 +235,208 @@ class LocationService(BaseService):
                 self.__get_ev_charger_port_details(ev_charger.ev_charger_ports)
             )
             station_count += 1
-        return {"charger_types": charger_types, "station_count": station_count}
+        return {
+            "charger_types": charger_types,
+            "station_count": station_count,
+            "max_power_output": max(
+                (charger_type["power_output"] for charger_type in charger_types),
+                default=None,
+            ),
+        }
 
-    def sync_elastic_data(self) -> None:
-        self.es_repository.wipe_data(configs.ES_LOCATION_INDEX)
-        locations_data: FindResult[DetailedLocationResponse] = (
-            self.location_repository.read_by_options(
-                FindLocation(), detailed=True, disable_pagination=True
+    def _build_location_document(self, location: DetailedLocationResponse) -> dict:
+        return {
+            **LocationElastic(
+                id=str(location.id),
+                **location.model_dump(exclude={"id"}),
+                location=f"{location.latitude}, {location.longitude}",
+            ).model_dump(exclude={"ev_chargers", "working_days"}),
+            "timezone": location_timezone(location),
+            "opening_hours": opening_ranges(location.working_days),
+            "working_days": [
+                {
+                    "day": wd.day,
+                    "open_time": wd.open_time.strftime(configs.TIME_FORMAT),
+                    "close_time": wd.close_time.strftime(configs.TIME_FORMAT),
+                }
+                for wd in location.working_days
+            ],
+            "amenities": [
+                location_amenities.amenities.amenities_types
+                for location_amenities in location.location_amenities
+            ],
+            **self.__get_ev_charger_port_details_with_count(location.ev_chargers),
+        }
+
+    def _index_action(self, index_name: str, location: DetailedLocationResponse) -> dict:
+        # external versions let Elasticsearch drop a rebuild older than the stored document
+        return {
+            "_index": index_name,
+            "_id": str(location.id),
+            "_source": self._build_location_document(location),
+            "version": location.version,
+            "version_type": "external",
+        }
+
+    def warm_spatial_index(self) -> None:
+        self.spatial_index.load(
+            spatial_index_entry(location)
+            for location in self.location_repository.read_active_locations()
+        )
+        logger.info(f"Spatial index loaded with {len(self.spatial_index)} locations")
+
+    def _index_location(self, location: DetailedLocationResponse) -> None:
+        # before the first load the index is not served, the load picks the change up
+        if self.spatial_index.ready:
+            self.spatial_index.upsert(*spatial_index_entry(location))
+
+    def sync_dirty_locations(self) -> int:
+        """Rebuild the documents of the locations queued in the outbox, returns how many were synced."""
+        synced = 0
+        while location_ids := self.location_repository.claim_dirty_location_ids(
+            configs.ES_SYNC_BATCH_SIZE
+        ):
+            try:
+                locations = self.location_repository.read_by_ids(location_ids)
+                actions = [
+                    self._index_action(configs.ES_LOCATION_INDEX, location)
+                    for location in locations
+                ]
+                # the documents of the removed locations go away
+                active_ids = {str(location.id) for location in locations}
+                versions = self.location_repository.read_versions(
+                    [
+                        location_id
+                        for location_id in location_ids
+                        if location_id not in active_ids
+                    ]
+                )
+                actions += [
+                    {
+                        "_op_type": "delete",
+                        "_index": configs.ES_LOCATION_INDEX,
+                        "_id": location_id,
+                        # a hard deleted row has no version left, delete unconditionally
+                        **(
+                            {"version": version, "version_type": "external"}
+                            if version is not None
+                            else {}
+                        ),
+                    }
+                    for location_id, version in versions.items()
+                ]
+                self.es_repository.sync_documents(configs.ES_LOCATION_INDEX, actions)
+                self.result_cache.invalidate()
+            except Exception:
+                # the claimed rows are gone, queue the ids again for the next run
+                self.location_repository.mark_dirty(location_ids)
+                raise
+            synced += len(location_ids)
+        return synced
+
+    def sync_elastic_data(self, job: JobResponse | None = None) -> None:
+        """Rebuild the location index in a new index, searches keep the old one until the alias swap.
+
+        One process at a time rebuilds it, the others fail instead of racing on the swap.
+        """
+        with self.location_repository.reindex_lock() as acquired:
+            if not acquired:
+                raise RuntimeError("Another process is already reindexing the locations")
+            self._reindex(job)
+
+    def migrate_elastic_mapping(self, job: JobResponse | None, mapping_version: int) -> None:
+        """Rebuild the location index when it is served with a mapping older than ``mapping_version``.
+
+        Every worker calls it at startup, only the first one reindexes. The others
+        skip it, and the version is read again under the lock in case a reindex just
+        finished.
+        """
+        with self.location_repository.reindex_lock() as acquired:
+            if not acquired:
+                logger.info("Another process is reindexing the locations, skipped the mapping migration")
+                return
+            version = self.es_repository.mapping_version(configs.ES_LOCATION_INDEX)
+            if version is None or version >= mapping_version:
+                return
+            logger.info(f"Reindexing {configs.ES_LOCATION_INDEX} from mapping version {version} to {mapping_version}")
+            self._reindex(job)
+
+    def _reindex(self, job: JobResponse | None) -> None:
+        index_name = self.es_repository.create_versioned_index(configs.ES_LOCATION_INDEX)
+        if job is not None:
+            job.total = self.location_repository.count_active_locations()
+
+        actions = (
+            self._index_action(index_name, location)
+            for location in self.location_repository.stream_active_locations(
+                configs.ES_REINDEX_BATCH_SIZE
             )
         )
+        failed = 0
+        try:
+            for ok in self.es_repository.streaming_bulk(
+                actions, chunk_size=configs.ES_REINDEX_BATCH_SIZE
+            ):
+                failed += not ok
+                if job is not None:
+                    job.processed += 1
+                    job.failed = failed
+            if failed:
+                raise RuntimeError(f"Failed to index {failed} locations")
+        except Exception:
+            self.es_repository.delete_index(index_name)
+            raise
 
-        locations_elastic = [
-            {
-                "_index": configs.ES_LOCATION_INDEX,
-                "_id": str(location.id),
-                "_source": {
-                    **LocationElastic(
-                        id=str(location.id),
-                        **location.model_dump(exclude={"id"}),
-                        location=f"{location.latitude}, {location.longitude}",
-                    ).model_dump(exclude={"ev_chargers", "working_days"}),
-                    "working_days": [
-                        {
-                            "day": wd.day,
-                            "open_time": wd.open_time.strftime(configs.TIME_FORMAT),
-                            "close_time": wd.close_time.strftime(configs.TIME_FORMAT),
-                        }
-                        for wd in location.working_days
-                    ],
-                    "amenities": [
-                        location_amenities.amenities.amenities_types
-                        for location_amenities in location.location_amenities
-                    ],
-                    **self.__get_ev_charger_port_details_with_count(
-                        location.ev_chargers
-                    ),
-                },
-            }
-            for location in locations_data.founds
-        ]
-        self.es_repository.bulk_create_documents(
-            configs.ES_LOCATION_INDEX, locations_elastic
+        self.es_repository.swap_alias(configs.ES_LOCATION_INDEX, index_name)
+        self.result_cache.invalidate()
+
+    def bulk_upsert(
+        self,
+        locations: list[CreateEditLocation],
+        ev_chargers: list[CreateBulkEVCharger],
+    ) -> dict[str, IngestionItemResult]:
+        upserted = self.location_repository.bulk_upsert(locations, ev_chargers)
+
+        ev_charger_count = Counter(
+            ev_charger.location_here_id for ev_charger in ev_chargers
         )
+        results = {
+            here_id: IngestionItemResult(
+                here_id=here_id,
+                status=(
+                    IngestionStatusEnum.INSERTED
+                    if inserted
+                    else IngestionStatusEnum.UPDATED
+                ),
+                location_id=location_id,
+                ev_charger_count=ev_charger_count[here_id],
+            )
+            for here_id, (location_id, inserted) in upserted.items()
+        }
+
+        # the page is committed, a failure from here on leaves its locations dirty in the outbox for the next sync
+        try:
+            locations_data = self.location_repository.read_by_ids(
+                [str(location_id) for location_id, _ in upserted.values()]
+            )
+            for location in locations_data:
+                self._index_location(location)
+            self.sync_dirty_locations()
+        except Exception as e:
+            logger.warning(f"Failed to index bulk upserted locations: {e}")
+            for result in results.values():
+                result.detail = "Stored but not indexed in Elasticsearch."
+
+        return results
 
     def get_by_radius(self, schema: LocationByRadiusQuery):
+        if self.spatial_index.ready:
+            return search_spatial_index(self.spatial_index, schema)
         return self.location_repository.read_by_radius(schema)
 
     def search_nearby_location(self, schema: LocationByRadiusQuery):
+        if self.spatial_index.ready:
+            return search_spatial_index(self.spatial_index, schema)
         return self.es_repository.search_nearby_location(schema)
 
     def search_by_elastic(
@@ -117,84 +445,142 @@ class LocationService(BaseService):
         is_fuzzi: bool,
         charger_type: List[str],
         amenities: List[str],
-    ) -> List[LocationResponse]:
+    ) -> LocationSearchPage:
         return self.es_repository.search_location(
             searchlocation, is_fuzzi, charger_type, amenities
         )
 
+    def get_clusters(
+        self,
+        schema: LocationClusterQuery,
+        charger_type: List[str],
+        amenities: List[str],
+    ) -> List[LocationCluster]:
+        return self.es_repository.search_location_clusters(schema, charger_type, amenities)
+
     def add(self, schema: CreateEditLocation):
         location = self.location_repository.create(schema)
-
-        location_elastic = LocationElastic(
-            id=str(location.id),
-            **location.model_dump(exclude={"id"}),
-            location=f"{location.latitude}, {location.longitude}",
-        )
-        self.es_repository.create_document(
-            index_name=configs.ES_LOCATION_INDEX,
-            doc_id=str(location.id),
-            body={
-                **location_elastic.model_dump(
-                    exclude={"ev_chargers", "working_days", "location_amenities"}
-                ),
-                "working_days": [
-                    {
-                        "day": wd.day,
-                        "open_time": wd.open_time.strftime(configs.TIME_FORMAT),
-                        "close_time": wd.close_time.strftime(configs.TIME_FORMAT),
-                    }
-                    for wd in schema.working_days
-                ],
-                "amenities": [
-                    location_amenities.amenities.amenities_types
-                    for location_amenities in location.location_amenities
-                ],
-            },
-        )
+        self._index_location(location)
 
         return location
 
     def patch(self, id: str, schema: CreateEditLocation):
         location = self.location_repository.update(id, schema)
-        update_fields = {
-            **location.model_dump(
-                exclude={"ev_chargers", "working_days", "location_amenities"}
-            ),
-            "working_days": [
-                {
-                    "day": wd.day,
-                    "open_time": wd.open_time.strftime(configs.TIME_FORMAT),
-                    "close_time": wd.close_time.strftime(configs.TIME_FORMAT),
-                }
-                for wd in location.working_days
-            ],
-            "amenities": [
-                location_amenities.amenities.amenities_types
-                for location_amenities in location.location_amenities
-            ],
-        }
-
-        self.es_repository.update_document(
-            index=configs.ES_LOCATION_INDEX, doc_id=id, update_fields=update_fields
-        )
+        self._index_location(location)
         return location
 
     def soft_remove_by_id(self, id):
 
         self._repository.soft_delete_by_id(id)
-        self.es_repository.delete_document(configs.ES_LOCATION_INDEX, doc_id=str(id))
+        self.spatial_index.remove(str(id))
 
     def get_location_by_direction(self, direction: DirectionRequest):
-        directions = self.gg_map_service.get_directions(direction)
+        directions, corridor = self.get_route_corridor(direction)
+        if corridor is None:
+            return directions
 
-        coordinates = create_polygon_from_line(directions.coordinates)
+        candidates = self.es_repository.search_location_on_route(corridor.polygon)
+        positions = order_along_route(corridor, candidates)
+        page = route_page(positions, direction)
+        locations = self.es_repository.read_locations_by_ids([id for id, _, _ in page])
 
-        locations = self.es_repository.search_location_on_direction(coordinates)
+        return set_route_locations(directions, positions, page, locations, direction)
 
-        directions.locations = locations
-
-        return directions
+    def get_route_corridor(self, direction: DirectionRequest) -> tuple[RouteResponse, "RouteCorridor | None"]:
+        # the corridor is cached alongside the route it is built from, unlike the async
+        # service concurrent misses each build it
+        key, _ = snap_direction(direction)
+        cache = self.gg_map_service.directions_cache
+        entry = cache.get(("corridor", key))
+        if entry is None:
+            directions = self.gg_map_service.get_directions(direction)
+            entry = directions, route_corridor(directions)
+            cache.set(("corridor", key), entry)
+        return entry
 
     def wipe_locations_data(self):
         self.location_repository.wipe_locations_data()
         self.es_repository.wipe_data(configs.ES_LOCATION_INDEX)
+        self.spatial_index.clear()
+        self.result_cache.invalidate()
+
+
+class AsyncLocationService:
+    """Read paths of ``LocationService`` which do not block the event loop."""
+
+    def __init__(
+        self,
+        location_repository: AsyncLocationRepository,
+        es_repository: AsyncElasticsearchRepository,
+        gg_map_service: AsyncGGMapService,
+        spatial_index: SpatialIndex,
+        result_cache: ResultCache,
+    ):
+        self.location_repository = location_repository
+        self.es_repository = es_repository
+        self.gg_map_service = gg_map_service
+        self.spatial_index = spatial_index
+        self.result_cache = result_cache
+
+    async def get_by_id(self, id: str):
+        return await self.location_repository.read_by_id(id)
+
+    async def get_by_radius(self, schema: LocationByRadiusQuery):
+        if self.spatial_index.ready:
+            return search_spatial_index(self.spatial_index, schema)
+        return await self.location_repository.read_by_radius(schema)
+
+    async def search_nearby_location(self, schema: LocationByRadiusQuery):
+        if self.spatial_index.ready:
+            return search_spatial_index(self.spatial_index, schema)
+        key, schema = normalize_nearby(schema)
+        return await self.result_cache.get_or_compute(
+            key, lambda: self.es_repository.search_nearby_location(schema)
+        )
+
+    async def search_by_elastic(
+        self,
+        searchlocation: SearchLocation,
+        is_fuzzi: bool,
+        charger_type: List[str],
+        amenities: List[str],
+    ) -> LocationSearchPage:
+        key, searchlocation, charger_type, amenities = normalize_search(
+            searchlocation, is_fuzzi, charger_type, amenities
+        )
+        return await self.result_cache.get_or_compute(
+            key,
+            lambda: self.es_repository.search_location(
+                searchlocation, is_fuzzi, charger_type, amenities
+            ),
+        )
+
+    async def get_clusters(
+        self,
+        schema: LocationClusterQuery,
+        charger_type: List[str],
+        amenities: List[str],
+    ) -> List[LocationCluster]:
+        return await self.es_repository.search_location_clusters(schema, charger_type, amenities)
+
+    async def get_location_by_direction(self, direction: DirectionRequest):
+        directions, corridor = await self.get_route_corridor(direction)
+        if corridor is None:
+            return directions
+
+        candidates = await self.es_repository.search_location_on_route(corridor.polygon)
+        positions = await asyncio.to_thread(order_along_route, corridor, candidates)
+        page = route_page(positions, direction)
+        locations = await self.es_repository.read_locations_by_ids([id for id, _, _ in page])
+
+        return set_route_locations(directions, positions, page, locations, direction)
+
+    async def get_route_corridor(self, direction: DirectionRequest) -> tuple[RouteResponse, "RouteCorridor | None"]:
+        # the corridor is cached alongside the route it is built from
+        key, _ = snap_direction(direction)
+        return await self.gg_map_service.directions_cache.get_or_compute(("corridor", key), lambda: self.__route_corridor(direction))
+
+    async def __route_corridor(self, direction: DirectionRequest) -> tuple[RouteResponse, "RouteCorridor | None"]:
+        directions = await self.gg_map_service.get_directions(direction)
+        # The corridor geometry is CPU bound, run it off the event loop
+        return directions, await asyncio.to_thread(route_corridor, directions)
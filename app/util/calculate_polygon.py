@@ -1,16 +1,66 @@
-from geopandas import GeoSeries
-from shapely import LineString
-from shapely.geometry import mapping
-
-from app.schema.google_api_schema import Coordinate
-
-
-def create_polygon_from_line(coordinates: list[Coordinate]):
-    line_string = LineString([(c.lat, c.lng) for c in coordinates])
-    geo_series = GeoSeries(line_string)
-    buffered_line = geo_series.buffer(0.01, join_style="bevel", resolution=1, cap_style="square")
-    poly = buffered_line.array[0]
-    polygon: list[Coordinate] = []
-    for lat, lon in mapping(poly)["coordinates"][0]:
-        polygon.append(Coordinate(lat=lat, lng=lon))
-    return polygon
+import numpy as np
+import shapely
+from shapely.geometry.polygon import orient
+
+from app.util.polyline import decode_polyline
+
+EARTH_RADIUS_M = 6371008.8
+
+
+class RouteCorridor:
+    """Route line simplified and buffered in meters, with the position of points along it.
+
+    Points go through a sinusoidal projection centered on the route, distances
+    stay close to the ground ones for routes spanning a few thousand kilometers.
+    """
+
+    def __init__(self, points: list[tuple[float, float]], width_km: float, tolerance_m: float) -> None:
+        lats, lngs = np.array(points, dtype=float).T
+        self.central_lng = float(lngs.mean())
+        self.width_m = width_km * 1000
+        self.tolerance_m = tolerance_m
+        projected = self._project(lats, lngs)
+        # Douglas-Peucker, a single point route is a circle around it
+        if len(projected) > 1:
+            self.line = shapely.linestrings(projected).simplify(tolerance_m, preserve_topology=False)
+        else:
+            self.line = shapely.points(projected[0])
+        # Counterclockwise GeoJSON ``[lng, lat]`` ring holding the corridor
+        self.polygon = self._polygon()
+
+    def _project(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        x = np.radians(lngs - self.central_lng) * np.cos(np.radians(lats)) * EARTH_RADIUS_M
+        return np.column_stack((x, np.radians(lats) * EARTH_RADIUS_M))
+
+    def _unproject(self, xy: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        lats = np.degrees(xy[:, 1] / EARTH_RADIUS_M)
+        # the poles have a single longitude
+        cos_lats = np.maximum(np.cos(np.radians(lats)), 1e-9)
+        return lats, self.central_lng + np.degrees(xy[:, 0] / (EARTH_RADIUS_M * cos_lats))
+
+    def _polygon(self) -> list[list[float]]:
+        area = self.line.buffer(self.width_m, quad_segs=2).simplify(self.tolerance_m)
+        # holes of looping routes are dropped, ``positions`` filters their points out
+        lats, lngs = self._unproject(shapely.get_coordinates(orient(area, 1.0).exterior))
+        return np.column_stack((lngs, lats)).tolist()
+
+    def positions(self, lats: list[float], lngs: list[float]) -> list[tuple[float, float] | None]:
+        """Kilometers along the route to the closest point to each point and off the route, ``None`` outside the corridor."""
+        if not lats:
+            return []
+        points = shapely.points(self._project(np.asarray(lats, dtype=float), np.asarray(lngs, dtype=float)))
+        offsets = shapely.distance(self.line, points)
+        if isinstance(self.line, shapely.LineString):
+            alongs = shapely.line_locate_point(self.line, points)
+        else:
+            alongs = np.zeros(len(points))
+        return [
+            (along / 1000, offset / 1000) if offset <= self.width_m else None for along, offset in zip(alongs.tolist(), offsets.tolist())
+        ]
+
+
+def route_points(overview_polyline: str | None, coordinates: list) -> list[tuple[float, float]]:
+    # the step end points only are a coarse fallback of the overview polyline
+    if overview_polyline:
+        return decode_polyline(overview_polyline)
+    return [(coordinate.lat, coordinate.lng) for coordinate in coordinates]
@@ -0,0 +1,264 @@
+import base64
+import binascii
+import datetime
+import json
+import re
+from typing import Any, List
+
+import pytz
+
+from app.core.config import configs
+from app.core.exceptions import ValidationError
+from app.model.location_elastic import SEARCH_AS_YOU_TYPE_FIELDS
+from app.schema.location_schema import (
+    LocationByRadiusQuery,
+    LocationClusterQuery,
+    LocationResponse,
+    SearchLocation,
+)
+from app.util.working_hours import timezones_by_week_minute, utc_minute
+
+SPECIAL_CHAR_PATTERN = re.compile(r"[^\w\s]")
+LONG_WORD_PATTERN = re.compile(r"\w{10,}")
+
+SEARCH_LOCATION_TEMPLATE_ID = "location-search"
+
+# the document fields read by ``LocationResponse``, opening hours give its status
+LOCATION_RESPONSE_SOURCE = [field for field in LocationResponse.model_fields if field not in ("status", "distance")] + ["opening_hours"]
+LOCATION_RESPONSE_FILTER_PATH = ["hits.hits._source"]
+# paged searches also read the sort values of the last hit and the refreshed point in time
+SEARCH_PAGE_FILTER_PATH = LOCATION_RESPONSE_FILTER_PATH + ["hits.hits.sort", "pit_id"]
+NEARBY_FILTER_PATH = LOCATION_RESPONSE_FILTER_PATH + ["hits.hits.sort"]
+LOCATION_CLUSTERS_FILTER_PATH = ["aggregations.clusters.buckets"]
+# route candidates are ordered along the route before the page is read in full
+ROUTE_CANDIDATE_SOURCE = ["id", "latitude", "longitude"]
+
+# clusters are this many zoom levels finer than the map tiles, 8x8 per tile
+CLUSTER_PRECISION_OFFSET = 3
+
+# the shingle subfields of each search_as_you_type field, the last query term matches as a prefix
+AUTOCOMPLETE_FIELDS = [
+    f"{field}.suggest{suffix}^{boost}" for field, boost in SEARCH_AS_YOU_TYPE_FIELDS.items() for suffix in ("", "._2gram", "._3gram")
+]
+
+DISTANCE_SORT = '{"_geo_distance": {"location": {"lat": {{lat}}, "lon": {{lon}}}, "order": "asc"}}'
+
+# Stored mustache template, the optional clauses are rendered from flags set by
+# ``build_search_location_params``. Lists are flagged apart, a list section
+# would repeat once per item. The trailing ``match_all`` closes the comma list.
+SEARCH_LOCATION_TEMPLATE = (
+    """{
+  "size": {{size}},
+  {{#pit}}"pit": {{#toJson}}pit{{/toJson}},{{/pit}}
+  {{#has_search_after}}"search_after": {{#toJson}}search_after{{/toJson}},{{/has_search_after}}
+  "_source": """
+    + json.dumps(LOCATION_RESPONSE_SOURCE)
+    + """,
+  "query": {
+    "bool": {
+      "filter": [
+        {{#has_charger_types}}{"nested": {"path": "charger_types", "query": {"terms": {"charger_types.type": {{#toJson}}charger_types{{/toJson}}}}}},{{/has_charger_types}}
+        {{#power_output_range}}{"nested": {"path": "charger_types", "query": {"range": {"charger_types.power_output": {{#toJson}}power_output_range{{/toJson}}}}}},{{/power_output_range}}
+        {{#station_count}}{"range": {"station_count": {"gte": {{station_count}}}}},{{/station_count}}
+        {{#bounding_box}}{"geo_bounding_box": {"location": {{#toJson}}bounding_box{{/toJson}}}},{{/bounding_box}}
+        {{#has_radius}}{"geo_distance": {"distance": "{{radius}}km", "location": {"lat": {{lat}}, "lon": {{lon}}}}},{{/has_radius}}
+        {{#has_amenities}}{"terms": {"amenities": {{#toJson}}amenities{{/toJson}}}},{{/has_amenities}}
+        {{#open_at_filter}}{{#toJson}}open_at_filter{{/toJson}},{{/open_at_filter}}
+        {"match_all": {}}
+      ]
+      {{#query}},
+      "should": [
+        {"multi_match": {"query": "{{query}}", "type": "bool_prefix", "fields": """
+    + json.dumps(AUTOCOMPLETE_FIELDS)
+    + """}},
+        {"multi_match": {"query": "{{query}}", "fields": ["location_name", "street", "district", "city", "country"]{{#fuzzy}}, "fuzziness": "AUTO"{{/fuzzy}}}}
+      ],
+      "minimum_should_match": 1
+      {{/query}}
+    }
+  }
+  {{#aggs}},
+  "aggs": {{#toJson}}aggs{{/toJson}}
+  {{/aggs}}
+  {{#paged}},
+  "sort": [{{#sort_by_distance}}"""
+    + DISTANCE_SORT
+    + """, {{/sort_by_distance}}{"_shard_doc": "asc"}]
+  {{/paged}}
+  {{^paged}}{{#sort_by_distance}},
+  "sort": ["""
+    + DISTANCE_SORT
+    + """]
+  {{/sort_by_distance}}{{/paged}}
+}"""
+)
+
+
+def check_special_chars(value: str, max_special_chars: int = 2) -> bool:
+    if value is None:
+        return False
+    return len(SPECIAL_CHAR_PATTERN.findall(value)) > max_special_chars
+
+
+def check_special_word(value: str) -> bool:
+    if value is None:
+        return False
+    return LONG_WORD_PATTERN.search(value) is not None
+
+
+def build_open_at_filter(at: datetime.datetime) -> dict[str, Any]:
+    """Locations open at ``at``, each group of timezones showing the same local time checks its minute of the week."""
+    return {
+        "bool": {
+            "should": [
+                {"bool": {"filter": [{"terms": {"timezone": timezones}}, {"term": {"opening_hours": minute}}]}}
+                for minute, timezones in timezones_by_week_minute(utc_minute(at))
+            ],
+            "minimum_should_match": 1,
+        }
+    }
+
+
+def encode_search_cursor(pit_id: str, search_after: list) -> str:
+    payload = json.dumps([pit_id, search_after], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[str, list]:
+    """Return the ``(point in time id, sort values of the last hit)`` the cursor points after."""
+    try:
+        pit_id, search_after = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValidationError(detail="Invalid cursor")
+    if not isinstance(pit_id, str) or not isinstance(search_after, list):
+        raise ValidationError(detail="Invalid cursor")
+    return pit_id, search_after
+
+
+def build_search_location_params(
+    searchlocation: SearchLocation,
+    is_fuzzi: bool = False,
+    charger_type: List[str] = [],
+    amenities: List[str] = [],
+) -> dict[str, Any] | None:
+    """Return the ``SEARCH_LOCATION_TEMPLATE`` params, or ``None`` when the query can not match anything.
+
+    Searches without ``query`` are ``paged`` in ``_shard_doc`` order, or by distance. The
+    caller opens the point in time of their first page, the next ones come from the cursor.
+    """
+    query = searchlocation.query
+
+    if check_special_chars(query):
+        return None
+    if check_special_word(query):
+        return None
+
+    paged = query is None
+    pit_id, search_after = None, None
+    if searchlocation.cursor is not None:
+        if not paged:
+            raise ValidationError(detail="Only searches without query are paged")
+        pit_id, search_after = decode_search_cursor(searchlocation.cursor)
+
+    open_at = searchlocation.open_at or (datetime.datetime.now(pytz.utc) if searchlocation.open_now else None)
+    has_coordinates = searchlocation.lat is not None and searchlocation.lon is not None
+    power_output_range = {
+        bound: value
+        for bound, value in (("gte", searchlocation.power_output_gte), ("lte", searchlocation.power_output_lte))
+        if value is not None
+    }
+    return {
+        "size": searchlocation.page_size or (configs.ES_SEARCH_PAGE_SIZE if paged else 10),
+        "paged": paged,
+        "pit": {"id": pit_id, "keep_alive": configs.ES_PIT_KEEP_ALIVE} if pit_id is not None else None,
+        "has_search_after": search_after is not None,
+        "search_after": search_after,
+        "query": query,
+        "fuzzy": is_fuzzi,
+        "has_charger_types": bool(charger_type),
+        "charger_types": charger_type,
+        "power_output_range": power_output_range or None,
+        "station_count": searchlocation.station_count,
+        "has_radius": searchlocation.radius is not None and has_coordinates,
+        "radius": searchlocation.radius,
+        "has_amenities": bool(amenities),
+        "amenities": amenities,
+        "open_at_filter": build_open_at_filter(open_at) if open_at is not None else None,
+        "lat": searchlocation.lat,
+        "lon": searchlocation.lon,
+        "sort_by_distance": has_coordinates,
+    }
+
+
+def build_location_clusters_params(
+    schema: LocationClusterQuery,
+    charger_type: List[str] = [],
+    amenities: List[str] = [],
+) -> dict[str, Any]:
+    """``SEARCH_LOCATION_TEMPLATE`` params counting the locations of the box per map tile instead of returning them."""
+    filters = SearchLocation(
+        station_count=schema.station_count,
+        power_output_gte=schema.power_output_gte,
+        power_output_lte=schema.power_output_lte,
+        open_now=schema.open_now,
+    )
+    bounding_box = {
+        "top_left": {"lat": schema.max_lat, "lon": schema.min_lon},
+        "bottom_right": {"lat": schema.min_lat, "lon": schema.max_lon},
+    }
+    return {
+        **build_search_location_params(filters, charger_type=charger_type, amenities=amenities),
+        "size": 0,
+        "paged": False,
+        "bounding_box": bounding_box,
+        "aggs": {
+            "clusters": {
+                "geotile_grid": {
+                    "field": "location",
+                    "precision": min(schema.zoom + CLUSTER_PRECISION_OFFSET, 29),
+                    "size": configs.ES_CLUSTER_MAX_TILES,
+                    "bounds": bounding_box,
+                },
+                "aggs": {
+                    "centroid": {"geo_centroid": {"field": "location"}},
+                    "station_count": {"sum": {"field": "station_count"}},
+                    "max_power_output": {"max": {"field": "max_power_output"}},
+                },
+            }
+        },
+    }
+
+
+def build_nearby_location_query(schema: LocationByRadiusQuery) -> dict[str, Any]:
+    """Nearest first locations within the radius, the same page the spatial index answers."""
+    location = {"lat": schema.user_lat, "lon": schema.user_long}
+    return {
+        "size": schema.limit,
+        "track_total_hits": False,
+        "_source": LOCATION_RESPONSE_SOURCE,
+        "query": {"bool": {"filter": {"geo_distance": {"distance": str(schema.radius) + "km", "location": location}}}},
+        # the sort value is the distance in kilometers
+        "sort": [{"_geo_distance": {"location": location, "order": "asc", "unit": "km"}}],
+    }
+
+
+def build_location_on_route_query(polygon: list[list[float]]) -> dict[str, Any]:
+    """Ids and coordinates of the locations in the ``[lng, lat]`` ring of a route corridor, ordered by the caller."""
+    return {
+        "size": configs.ES_ROUTE_MAX_LOCATIONS,
+        "track_total_hits": False,
+        "_source": ROUTE_CANDIDATE_SOURCE,
+        "query": {
+            "bool": {
+                "filter": {"geo_shape": {"location": {"shape": {"type": "polygon", "coordinates": [polygon]}, "relation": "intersects"}}},
+            }
+        },
+    }
+
+
+def build_locations_by_ids_query(ids: list[str]) -> dict[str, Any]:
+    return {
+        "size": len(ids),
+        "_source": LOCATION_RESPONSE_SOURCE,
+        "query": {"bool": {"filter": {"terms": {"id": ids}}}},
+    }
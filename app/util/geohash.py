@@ -0,0 +1,27 @@
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_cell(lat: float, lon: float, precision: int) -> tuple[str, float, float]:
+    """Geohash of the ``precision`` characters cell holding the point, with the cell center."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    char = 0
+    even = True
+    while len(chars) < precision:
+        # bits alternate between longitude and latitude, longitude first
+        value, interval = (lon, lon_range) if even else (lat, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        if value >= middle:
+            char = char << 1 | 1
+            interval[0] = middle
+        else:
+            char = char << 1
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[char])
+            bits = char = 0
+    return "".join(chars), (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
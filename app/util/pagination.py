@@ -1,35 +1,155 @@
-from typing import Tuple, Type, TypeVar
+import base64
+import binascii
+import json
+from typing import Any, Tuple, Type, TypeVar
 
-from sqlalchemy import Select, not_
+from pydantic import TypeAdapter
+from pydantic import ValidationError as PydanticValidationError
+from pydantic_core import to_jsonable_python
+from sqlalchemy import (
+    Select,
+    and_,
+    func,
+    literal,
+    literal_column,
+    not_,
+    or_,
+    select,
+    tuple_,
+)
 from sqlalchemy.orm import Session
 
 from app.core.config import configs
+from app.core.exceptions import ValidationError
 from app.model.base_model import BaseModel
-from app.schema.base_schema import FindResult, PaginationQuery, SearchOptions
+from app.schema.base_schema import (
+    CountModeOptions,
+    FindResult,
+    ListOrderOptions,
+    PaginationQuery,
+    SearchOptions,
+)
 
 T = TypeVar("T", bound=BaseModel)
 
 U = TypeVar("U", bound=PaginationQuery)
 
 
+def count_query(query: Select, session: Session, count_mode: CountModeOptions = CountModeOptions.exact) -> int | None:
+    """Count the rows of ``query`` without loading them.
+
+    ``estimate`` asks the Postgres planner instead of counting, ``none`` skips the count.
+    """
+    if count_mode == CountModeOptions.none:
+        return None
+    # eager loads and ordering are not rendered in the subquery
+    count_source = query.order_by(None).subquery()
+    if count_mode == CountModeOptions.estimate and session.get_bind().dialect.name == "postgresql":
+        return _estimate_count(select(literal_column("1")).select_from(count_source), session)
+    return session.execute(select(func.count()).select_from(count_source)).scalar_one()
+
+
+def _estimate_count(query: Select, session: Session) -> int:
+    compiled = query.compile(dialect=session.get_bind().dialect)
+    plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def encode_cursor(order_by: str, ordering: str, value: Any, id: Any) -> str:
+    payload = json.dumps([order_by, ordering, to_jsonable_python(value), to_jsonable_python(id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, model: Type[T], order_by: str, ordering: str) -> tuple[Any, Any]:
+    """Return the ``(order_by value, id)`` of the last row the cursor points after."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        cursor_order_by, cursor_ordering, value, id = payload
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValidationError(detail="Invalid cursor")
+    if cursor_order_by != order_by or cursor_ordering != ordering:
+        raise ValidationError(detail="Cursor does not match order_by and ordering")
+    try:
+        return _column_value(model, order_by, value), _column_value(model, "id", id)
+    except PydanticValidationError:
+        raise ValidationError(detail="Invalid cursor")
+
+
+def _column_value(model: Type[T], name: str, value: Any) -> Any:
+    field = model.model_fields.get(name)
+    if value is None or field is None:
+        return value
+    return TypeAdapter(field.annotation).validate_python(value)
+
+
+def _keyset_filter(order_column, id_column, ordering: str, value: Any, id: Any):
+    # typed binds, so that the column types convert the cursor values
+    id = literal(id, id_column.type)
+    # Postgres sorts NULLs first in descending and last in ascending order
+    if value is None:
+        if ordering == ListOrderOptions.desc:
+            return or_(and_(order_column.is_(None), id_column < id), order_column.is_not(None))
+        return and_(order_column.is_(None), id_column > id)
+    keyset = tuple_(literal(value, order_column.type), id)
+    if ordering == ListOrderOptions.desc:
+        return tuple_(order_column, id_column) < keyset
+    return or_(tuple_(order_column, id_column) > keyset, order_column.is_(None))
+
+
+def cursor_filter(cursor: str, model: Type[T], order_by: str, ordering: str):
+    """Filter of the rows after ``cursor`` in ``(order_by, id)`` order."""
+    value, id = decode_cursor(cursor, model, order_by, ordering)
+    return _keyset_filter(getattr(model, order_by), model.id, ordering, value, id)
+
+
 def paginate(
     query: Select[Tuple[T]], schema: U, session: Session, model: Type[T], soft_delete_visibility: bool = False, paginate: bool = True
 ) -> FindResult[T]:
     schema_as_dict = schema.model_dump(exclude_none=True)
     ordering = schema_as_dict.get("ordering", configs.ORDERING)
     order_by = schema_as_dict.get("order_by", configs.ORDER_BY)
-    order_query = getattr(model, order_by).desc() if ordering == "desc" else getattr(model, order_by).asc()
-    paginated_query = query
+    count_mode = schema_as_dict.get("count_mode", CountModeOptions.exact)
+    ordering = ListOrderOptions(ordering).value
+    order_column = getattr(model, order_by)
+    # id breaks ties so that pages, and cursors, are stable
+    order_query = (order_column.desc(), model.id.desc()) if ordering == "desc" else (order_column.asc(), model.id.asc())
+    filtered_query = query
     if not soft_delete_visibility:
-        paginated_query = query.filter(not_(model.is_deleted))
-    paginated_query = paginated_query.order_by(order_query)
-    total = session.execute(paginated_query).unique().scalars().all().__len__()
-    if paginate:
+        filtered_query = query.filter(not_(model.is_deleted))
+    paginated_query = filtered_query.order_by(*order_query)
+    if not paginate:
+        founds = list(session.execute(paginated_query).unique().scalars().all())
+        total = len(founds)
+    elif schema.cursor:
+        paginated_query = paginated_query.filter(cursor_filter(schema.cursor, model, order_by, ordering)).limit(schema.limit)
+        founds = list(session.execute(paginated_query).unique().scalars().all())
+        total = count_query(filtered_query, session, count_mode)
+    else:
         paginated_query = paginated_query.offset(schema.offset).limit(schema.limit)
-        if schema.page_size * (schema.page - 1) > total:
-            raise ValueError("Page out of range")
+        founds = list(session.execute(paginated_query).unique().scalars().all())
+        if 0 < len(founds) < schema.limit or (not founds and schema.offset == 0):
+            # a partial page is the last one, it gives the total away
+            total = schema.offset + len(founds)
+        else:
+            total = count_query(filtered_query, session, count_mode)
+            if count_mode == CountModeOptions.exact and schema.offset > total:
+                raise ValueError("Page out of range")
+
+    next_cursor = None
+    if paginate and founds and len(founds) == schema.limit:
+        next_cursor = encode_cursor(order_by, ordering, getattr(founds[-1], order_by), founds[-1].id)
 
     return FindResult(
-        founds=list(session.execute(paginated_query).unique().scalars().all()),
-        search_options=SearchOptions(total_count=total, page=schema.page, page_size=schema.page_size, ordering=ordering, order_by=order_by),
+        founds=founds,
+        next_cursor=next_cursor,
+        search_options=SearchOptions(
+            total_count=total,
+            page=schema.page,
+            page_size=schema.page_size,
+            ordering=ordering,
+            order_by=order_by,
+            count_mode=count_mode,
+        ),
     )
@@ -0,0 +1,22 @@
+def decode_polyline(points: str, precision: int = 5) -> list[tuple[float, float]]:
+    """``(lat, lng)`` pairs of a Google encoded polyline, e.g. the ``overview_polyline`` of a route."""
+    factor = 10**precision
+    coordinates = []
+    index = lat = lng = 0
+    while index < len(points):
+        deltas = []
+        for _ in range(2):
+            # 5 bits chunks, least significant first, 0x20 flags a next chunk
+            shift = result = 0
+            while True:
+                chunk = ord(points[index]) - 63
+                index += 1
+                result |= (chunk & 0x1F) << shift
+                shift += 5
+                if chunk < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coordinates.append((lat / factor, lng / factor))
+    return coordinates
@@ -0,0 +1,149 @@
+import math
+import threading
+from typing import TYPE_CHECKING, Any, Hashable, Iterable
+
+# numpy is imported by the methods measuring distances, the index is disabled by default
+if TYPE_CHECKING:
+    import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def haversine_km(lat: float, lon: float, lats: "np.ndarray", lons: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class SpatialIndex:
+    """In memory point index over a grid of ``cell_degrees`` wide cells.
+
+    A query only measures the points of the cells overlapping its bounding
+    box, with vectorized haversine distances. The index is not ``ready``
+    until the first ``load``, callers fall back to their data store until then.
+    """
+
+    def __init__(self, cell_degrees: float = 0.1) -> None:
+        self.cell_degrees = cell_degrees
+        self._lon_cells = math.ceil(360 / cell_degrees)
+        self._lock = threading.Lock()
+        self._points: dict[Hashable, tuple[float, float, Any]] = {}
+        self._cells: dict[tuple[int, int], set[Hashable]] = {}
+        # per cell (payloads, coordinates) arrays, rebuilt after the cell changes
+        self._cell_arrays: dict[tuple[int, int], tuple[list[Any], "np.ndarray"]] = {}
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees) % self._lon_cells
+
+    def load(self, points: Iterable[tuple[Hashable, float, float, Any]]) -> None:
+        """Replace the whole content, ``points`` are ``(key, lat, lon, payload)``."""
+        new_points = {}
+        new_cells: dict[tuple[int, int], set[Hashable]] = {}
+        for key, lat, lon, payload in points:
+            new_points[key] = (lat, lon, payload)
+            new_cells.setdefault(self._cell(lat, lon), set()).add(key)
+        with self._lock:
+            self._points, self._cells, self._cell_arrays = new_points, new_cells, {}
+            self.ready = True
+
+    def upsert(self, key: Hashable, lat: float, lon: float, payload: Any) -> None:
+        with self._lock:
+            self._discard(key)
+            self._points[key] = (lat, lon, payload)
+            cell = self._cell(lat, lon)
+            self._cells.setdefault(cell, set()).add(key)
+            self._cell_arrays.pop(cell, None)
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._points, self._cells, self._cell_arrays = {}, {}, {}
+
+    def _discard(self, key: Hashable) -> None:
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        cell = self._cell(point[0], point[1])
+        self._cell_arrays.pop(cell, None)
+        keys = self._cells.get(cell)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def _candidate_cells(self, lat: float, lon: float, radius_km: float) -> Iterable[tuple[int, int]]:
+        lat_delta = radius_km / KM_PER_DEGREE
+        min_row = math.floor(max(lat - lat_delta, -90) / self.cell_degrees)
+        max_row = math.floor(min(lat + lat_delta, 90) / self.cell_degrees)
+        # the box widens towards the poles, take whole rows once it wraps around
+        cos_lat = math.cos(math.radians(min(abs(lat) + lat_delta, 90)))
+        lon_delta = radius_km / (KM_PER_DEGREE * cos_lat) if cos_lat > 1e-9 else 360
+        if lon_delta >= 180:
+            cols = None
+        else:
+            first_col = math.floor((lon - lon_delta) / self.cell_degrees)
+            last_col = math.floor((lon + lon_delta) / self.cell_degrees)
+            cols = {col % self._lon_cells for col in range(first_col, last_col + 1)}
+
+        cell_count = (max_row - min_row + 1) * (len(cols) if cols is not None else self._lon_cells)
+        if cell_count > len(self._cells):
+            return [cell for cell in self._cells if min_row <= cell[0] <= max_row and (cols is None or cell[1] in cols)]
+        if cols is None:
+            cols = range(self._lon_cells)
+        return [(row, col) for row in range(min_row, max_row + 1) for col in cols]
+
+    def within(self, lat: float, lon: float, radius_km: float, limit: int | None = None) -> list[tuple[Any, float]]:
+        """``(payload, distance in km)`` of the points within ``radius_km``, nearest first."""
+        payloads: list[Any] = []
+        arrays = []
+        with self._lock:
+            for cell in self._candidate_cells(lat, lon, radius_km):
+                if cell not in self._cells:
+                    continue
+                cell_payloads, cell_coordinates = self._arrays(cell)
+                payloads.extend(cell_payloads)
+                arrays.append(cell_coordinates)
+        if not payloads:
+            return []
+
+        import numpy as np
+
+        coordinates = np.concatenate(arrays)
+        distances = haversine_km(lat, lon, coordinates[:, 0], coordinates[:, 1])
+        matches = np.flatnonzero(distances <= radius_km)
+        matches = matches[np.argsort(distances[matches], kind="stable")]
+        if limit is not None:
+            matches = matches[:limit]
+        return [(payloads[i], float(distances[i])) for i in matches]
+
+    def _arrays(self, cell: tuple[int, int]) -> tuple[list[Any], "np.ndarray"]:
+        arrays = self._cell_arrays.get(cell)
+        if arrays is None:
+            import numpy as np
+
+            points = [self._points[key] for key in self._cells[cell]]
+            arrays = ([point[2] for point in points], np.array([(point[0], point[1]) for point in points], dtype=float))
+            self._cell_arrays[cell] = arrays
+        return arrays
+
+    def nearest(self, lat: float, lon: float, k: int) -> list[tuple[Any, float]]:
+        """The ``k`` closest points, nearest first."""
+        radius_km = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            matches = self.within(lat, lon, radius_km, k)
+            # everything within the radius was measured, the k closest are among them
+            if len(matches) >= min(k, len(self._points)) or radius_km >= MAX_DISTANCE_KM:
+                return matches
+            radius_km = min(radius_km * 2, MAX_DISTANCE_KM)
@@ -0,0 +1,129 @@
+import datetime
+import functools
+import math
+from typing import Iterable
+
+import pytz
+
+from app.constant.enum.status import LocationStatusEnum
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def week_minute(day: int, time: datetime.time) -> int:
+    """Minutes since Monday 00:00, ``day`` is the ISO weekday."""
+    return (day - 1) * MINUTES_PER_DAY + time.hour * 60 + time.minute
+
+
+def opening_ranges(working_days: Iterable) -> list[dict[str, int]]:
+    """Inclusive minute-of-week ``{"gte", "lte"}`` ranges of the working days, in local time.
+
+    A day closing before it opens closes the next day, Sunday nights wrap to Monday.
+    """
+    ranges = []
+    for working_day in working_days:
+        start = week_minute(working_day.day, working_day.open_time)
+        end = week_minute(working_day.day, working_day.close_time)
+        if end < start:
+            end += MINUTES_PER_DAY
+        if end >= MINUTES_PER_WEEK:
+            ranges.append({"gte": start, "lte": MINUTES_PER_WEEK - 1})
+            ranges.append({"gte": 0, "lte": end - MINUTES_PER_WEEK})
+        else:
+            ranges.append({"gte": start, "lte": end})
+    return sorted(ranges, key=lambda opening_range: opening_range["gte"])
+
+
+def local_week_minute(timezone: str, at: datetime.datetime | None = None) -> int:
+    """Minute of the week at ``at`` (now by default) on the clocks of ``timezone``."""
+    local = (at or datetime.datetime.now(pytz.utc)).astimezone(pytz.timezone(timezone))
+    return week_minute(local.isoweekday(), local.time())
+
+
+def utc_minute(at: datetime.datetime) -> datetime.datetime:
+    """``at`` in UTC truncated to the minute, naive datetimes are taken as UTC."""
+    at = at.replace(tzinfo=pytz.utc) if at.tzinfo is None else at.astimezone(pytz.utc)
+    return at.replace(second=0, microsecond=0)
+
+
+@functools.lru_cache(maxsize=16)
+def timezones_by_week_minute(at: datetime.datetime) -> tuple[tuple[int, tuple[str, ...]], ...]:
+    """The common timezones grouped by their minute of the week at ``at``, a few dozen groups."""
+    groups: dict[int, list[str]] = {}
+    for timezone in pytz.common_timezones:
+        groups.setdefault(local_week_minute(timezone, at), []).append(timezone)
+    return tuple((minute, tuple(timezones)) for minute, timezones in sorted(groups.items()))
+
+
+def is_open(ranges: Iterable[dict[str, int]], minute: int) -> bool:
+    return any(opening_range["gte"] <= minute <= opening_range["lte"] for opening_range in ranges)
+
+
+class StatusClock:
+    """Open/closed status of locations at one instant, the local time of each timezone is computed once."""
+
+    def __init__(self, at: datetime.datetime | None = None) -> None:
+        self.at = at or datetime.datetime.now(pytz.utc)
+        self._minutes: dict[str, int] = {}
+
+    def minute(self, timezone: str) -> int:
+        minute = self._minutes.get(timezone)
+        if minute is None:
+            minute = self._minutes[timezone] = local_week_minute(timezone, self.at)
+        return minute
+
+    def status(self, ranges: Iterable[dict[str, int]] | None, timezone: str | None) -> LocationStatusEnum:
+        if ranges and is_open(ranges, self.minute(timezone or "UTC")):
+            return LocationStatusEnum.OPEN
+        return LocationStatusEnum.CLOSE
+
+
+def location_timezone(location) -> str:
+    # rows stored before locations had a timezone
+    return location.timezone or guess_timezone(location.country, location.latitude, location.longitude)
+
+
+def _parse_coordinate(value: str, degree_digits: int) -> float:
+    # ISO 6709 ``±DDMM[SS]`` or ``±DDDMM[SS]``
+    sign = -1 if value[0] == "-" else 1
+    digits = value[1:]
+    degrees = int(digits[:degree_digits])
+    minutes = int(digits[degree_digits : degree_digits + 2])
+    seconds = int(digits[degree_digits + 2 :] or 0)
+    return sign * (degrees + minutes / 60 + seconds / 3600)
+
+
+@functools.cache
+def _zones() -> list[tuple[str, float, float, str]]:
+    """``(country code, lat, lon, timezone)`` of the tz database zone table."""
+    zones = []
+    with pytz.open_resource("zone.tab") as zone_tab:
+        for line in zone_tab.read().decode().splitlines():
+            if line.startswith("#"):
+                continue
+            code, coordinates, timezone = line.split("\t")[:3]
+            split = max(coordinates.rfind("+"), coordinates.rfind("-"))
+            lat = _parse_coordinate(coordinates[:split], 2)
+            lon = _parse_coordinate(coordinates[split:], 3)
+            zones.append((code, lat, lon, timezone))
+    return zones
+
+
+@functools.cache
+def _country_codes() -> dict[str, str]:
+    return {name: code for code, name in pytz.country_names.items()}
+
+
+def guess_timezone(country: str | None, latitude: float, longitude: float) -> str:
+    """Timezone of the closest tz database zone of ``country``, of any country when it is not known."""
+    code = _country_codes().get(getattr(country, "value", country))
+    zones = [zone for zone in _zones() if zone[0] == code] or _zones()
+    lat, lon = math.radians(latitude), math.radians(longitude)
+
+    def distance(zone: tuple[str, float, float, str]) -> float:
+        # cosine of the central angle, larger is closer
+        zone_lat, zone_lon = math.radians(zone[1]), math.radians(zone[2])
+        return -(math.sin(lat) * math.sin(zone_lat) + math.cos(lat) * math.cos(zone_lat) * math.cos(lon - zone_lon))
+
+    return min(zones, key=distance)[3]
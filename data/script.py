@@ -324,8 +324,14 @@ def create_ev_chargers_from_json(
 
 def main():
     from app.services.location_service import LocationService
+    from app.util.spatial_index import SpatialIndex
+    from app.core.cache import create_directions_cache, create_result_cache
     from app.repository.location_repository import LocationRepository
-    from app.repository.elastic_repository import ElasticsearchRepository
+    from app.repository.elastic_repository import (
+        ElasticsearchRepository,
+        location_result_adapter,
+    )
+    from app.core.http_client import HttpClient
     from app.services.gg_map_service import GGMapService
     from app.repository.power_plug_type_repository import PowerPlugTypeRepository
     from app.services.power_plug_type_service import PowerPlugTypeService
@@ -351,9 +357,11 @@ def main():
     # Initialize the necessary services and repositories
     location_repository = LocationRepository(session_factory)
     es_repository = ElasticsearchRepository(es_client)
-    gg_map_service = GGMapService()
+    gg_map_service = GGMapService(HttpClient(), create_directions_cache())
+    # invalidates the API's cache when it is shared through Redis
+    result_cache = create_result_cache(location_result_adapter, "locations")
     location_service = LocationService(
-        location_repository, es_repository, gg_map_service
+        location_repository, es_repository, gg_map_service, SpatialIndex(), result_cache
     )
 
     power_plug_type_repository = PowerPlugTypeRepository(session_factory)
@@ -363,7 +371,7 @@ def main():
     power_output_service = PowerOutputService(power_output_repository)
 
     ev_charger_repository = EVChargerRepository(session_factory)
-    ev_charger_service = EVChargerService(ev_charger_repository, es_repository)
+    ev_charger_service = EVChargerService(ev_charger_repository)
 
     ev_charger_port_repository = EVChargerPortRepository(session_factory)
     ev_charger_port_service = EVChargerPortService(ev_charger_port_repository)
@@ -0,0 +1,36 @@
+"""added-updated_at-id-keyset-indexes
+
+Revision ID: 3c9e5f1d7a42
+Revises: 856ab2ede78a
+Create Date: 2026-10-18 14:05:27.318640
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9e5f1d7a42"
+down_revision: Union[str, None] = "856ab2ede78a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination seeks on ``(updated_at, id)``
+    op.create_index("ix_location_updated_at_id", "location", ["updated_at", "id"])
+    op.create_index("ix_evcharger_updated_at_id", "evcharger", ["updated_at", "id"])
+    op.create_index(
+        "ix_locationsearchhistory_updated_at_id",
+        "locationsearchhistory",
+        ["updated_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_locationsearchhistory_updated_at_id", table_name="locationsearchhistory")
+    op.drop_index("ix_evcharger_updated_at_id", table_name="evcharger")
+    op.drop_index("ix_location_updated_at_id", table_name="location")
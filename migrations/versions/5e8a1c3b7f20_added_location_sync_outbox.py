@@ -0,0 +1,42 @@
+"""added-location-sync-outbox
+
+Revision ID: 5e8a1c3b7f20
+Revises: 7d2b8e4f9c13
+Create Date: 2026-10-18 20:41:17.306254
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e8a1c3b7f20"
+down_revision: Union[str, None] = "7d2b8e4f9c13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "locationsyncoutbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("location_id", sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_locationsyncoutbox_location_id"),
+        "locationsyncoutbox",
+        ["location_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_locationsyncoutbox_location_id"), table_name="locationsyncoutbox")
+    op.drop_table("locationsyncoutbox")
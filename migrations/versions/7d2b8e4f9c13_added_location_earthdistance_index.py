@@ -0,0 +1,29 @@
+"""added-location-earthdistance-index
+
+Revision ID: 7d2b8e4f9c13
+Revises: 3c9e5f1d7a42
+Create Date: 2026-10-18 15:32:09.842715
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7d2b8e4f9c13"
+down_revision: Union[str, None] = "3c9e5f1d7a42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS cube")
+    op.execute("CREATE EXTENSION IF NOT EXISTS earthdistance")
+    op.execute("CREATE INDEX ix_location_ll_to_earth ON location " "USING gist (ll_to_earth(latitude, longitude))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_location_ll_to_earth", table_name="location")
@@ -0,0 +1,34 @@
+"""added-here_id-and-working_day-unique-constraints
+
+Revision ID: 856ab2ede78a
+Revises: b1566b196b48
+Create Date: 2026-10-18 09:12:41.503118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "856ab2ede78a"
+down_revision: Union[str, None] = "b1566b196b48"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Targets for the ``INSERT ... ON CONFLICT`` statements of the bulk ingestion
+    op.create_unique_constraint("location_here_id_key", "location", ["here_id"])
+    op.create_unique_constraint("evcharger_here_id_key", "evcharger", ["here_id"])
+    op.create_unique_constraint("evchargerport_here_id_key", "evchargerport", ["here_id"])
+    op.create_unique_constraint("uix_working_day_location_id_day", "workingday", ["location_id", "day"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("uix_working_day_location_id_day", "workingday", type_="unique")
+    op.drop_constraint("evchargerport_here_id_key", "evchargerport", type_="unique")
+    op.drop_constraint("evcharger_here_id_key", "evcharger", type_="unique")
+    op.drop_constraint("location_here_id_key", "location", type_="unique")
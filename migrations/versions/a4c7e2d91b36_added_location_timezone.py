@@ -0,0 +1,32 @@
+"""added-location-timezone
+
+Revision ID: a4c7e2d91b36
+Revises: 5e8a1c3b7f20
+Create Date: 2026-10-18 23:12:40.518302
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4c7e2d91b36"
+down_revision: Union[str, None] = "5e8a1c3b7f20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "location",
+        sa.Column("timezone", sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("location", "timezone")
@@ -3,7 +3,6 @@ import sys
 import time
 import logging
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, scoped_session
 from elasticsearch import Elasticsearch
 
@@ -12,7 +11,7 @@ from elasticsearch import Elasticsearch
 root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(root_dir)
 
-from server.services.here.here_api import get_here_ev_data
+from server.services.here.here_api import get_here_ev_data, http_client
 from server.services.ev_data.location_upsert import create_locations_from_data
 from server.services.ev_data.ev_charger_upsert import create_ev_chargers_from_data
 from server.services.here.here_grid_fetch import (
@@ -68,7 +67,11 @@ def create_ev_chargers(
 
 
 def scheduled_job(
-    location_service, ev_charger_service, power_plug_type_service, power_output_service
+    location_service,
+    ev_charger_service,
+    power_plug_type_service,
+    power_output_service,
+    fingerprint_store=None,
 ):
     try:
         fetch_and_upsert_la_ev_data(
@@ -76,7 +79,10 @@ def scheduled_job(
             ev_charger_service,
             power_plug_type_service,
             power_output_service,
+            fingerprint_store=fingerprint_store,
         )
+        # the writes above only queued their locations, index them in bulk
+        location_service.sync_dirty_locations()
         logger.info("Scheduled job completed successfully.")
     except Exception as e:
         logger.error(f"Error during scheduled job: {e}", exc_info=True)
@@ -85,8 +91,15 @@ def scheduled_job(
 
 if __name__ == "__main__":
     from app.services.location_service import LocationService
+    from server.services.ev_data.fingerprint_store import FingerprintStore
+    from app.util.spatial_index import SpatialIndex
+    from app.core.cache import create_directions_cache, create_result_cache
+    from app.core.database import create_db_engine
     from app.repository.location_repository import LocationRepository
-    from app.repository.elastic_repository import ElasticsearchRepository
+    from app.repository.elastic_repository import (
+        ElasticsearchRepository,
+        location_result_adapter,
+    )
     from app.services.gg_map_service import GGMapService
     from app.repository.power_plug_type_repository import PowerPlugTypeRepository
     from app.services.power_plug_type_service import PowerPlugTypeService
@@ -97,7 +110,7 @@ if __name__ == "__main__":
 
     # Create the database engine and session factory
     DATABASE_URI = configs.DATABASE_URI
-    engine = create_engine(DATABASE_URI, echo=True)
+    engine = create_db_engine(DATABASE_URI)
     session_factory = scoped_session(
         sessionmaker(autocommit=False, autoflush=False, bind=engine)
     )
@@ -110,9 +123,11 @@ if __name__ == "__main__":
     # Initialize the necessary services and repositories
     location_repository = LocationRepository(session_factory)
     es_repository = ElasticsearchRepository(es_client)
-    gg_map_service = GGMapService()
+    gg_map_service = GGMapService(http_client, create_directions_cache())
+    # invalidates the API's cache when it is shared through Redis
+    result_cache = create_result_cache(location_result_adapter, "locations")
     location_service = LocationService(
-        location_repository, es_repository, gg_map_service
+        location_repository, es_repository, gg_map_service, SpatialIndex(), result_cache
     )
 
     power_plug_type_repository = PowerPlugTypeRepository(session_factory)
@@ -122,7 +137,10 @@ if __name__ == "__main__":
     power_output_service = PowerOutputService(power_output_repository)
 
     ev_charger_repository = EVChargerRepository(session_factory)
-    ev_charger_service = EVChargerService(ev_charger_repository, es_repository)
+    ev_charger_service = EVChargerService(ev_charger_repository)
+
+    # Persists across scheduler runs, unchanged HERE items skip every write
+    fingerprint_store = FingerprintStore()
 
     # min = int(os.getenv("MINUTE_INTERVAL", "10"))
     min = 1
@@ -133,9 +151,13 @@ if __name__ == "__main__":
             ev_charger_service=ev_charger_service,
             power_plug_type_service=power_plug_type_service,
             power_output_service=power_output_service,
+            fingerprint_store=fingerprint_store,
         ),
         "interval",
         minutes=min,
+        # A crawl can outlast the interval, never run two of them at once
+        max_instances=1,
+        coalesce=True,
     )
     scheduler.start()
     logger.info(f"Scheduler started with interval of {min} minutes.")
@@ -145,4 +167,6 @@ if __name__ == "__main__":
             time.sleep(60)
     except (KeyboardInterrupt, SystemExit):
         scheduler.shutdown()
+        fingerprint_store.close()
+        http_client.close()
         logger.info("Scheduler stopped.")
@@ -0,0 +1,84 @@
+import logging
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.constant.enum.ingestion import IngestionStatusEnum
+from app.core.exceptions import DuplicatedError, ValidationError
+from app.schema.ingestion_schema import IngestionItemResult
+from server.services.ev_data.ev_charger_upsert import build_bulk_ev_chargers
+from server.services.ev_data.location_upsert import build_location_schema
+
+logger = logging.getLogger(__name__)
+
+
+def upsert_here_page(location_service, data: dict) -> list[IngestionItemResult]:
+    """Upsert a whole HERE response page with the bulk ingestion mode.
+
+    Returns one result per item of the page, in the same order.
+    """
+    results: list[IngestionItemResult] = []
+    locations = []
+    ev_chargers = []
+
+    for item in data.get("items", []):
+        result = IngestionItemResult(external_id=item.get("id"), status=IngestionStatusEnum.SKIPPED)
+        results.append(result)
+        try:
+            schema = build_location_schema(item)
+            if schema is None:
+                continue
+            item_ev_chargers = build_bulk_ev_chargers(item, schema.here_id)
+        except Exception as e:
+            logger.warning(f"Failed to parse item with external_id {item.get('id')}: {e}")
+            result.status = IngestionStatusEnum.FAILED
+            result.detail = str(e)
+            continue
+
+        result.here_id = schema.here_id
+        locations.append(schema)
+        ev_chargers.extend(item_ev_chargers)
+
+    if not locations:
+        return results
+
+    try:
+        upserted = location_service.bulk_upsert(locations, ev_chargers)
+    except (DuplicatedError, ValidationError, SQLAlchemyError) as e:
+        # the page transaction was rolled back, indexing failures after the commit are not raised
+        logger.error(f"Failed to bulk upsert {len(locations)} locations, retrying them one by one: {e}")
+        upserted = upsert_one_by_one(location_service, locations, ev_chargers, results)
+
+    for result in results:
+        if result.here_id is None:
+            continue
+        upserted_result = upserted.get(result.here_id)
+        if upserted_result is None:
+            result.status = IngestionStatusEnum.FAILED
+            continue
+        result.status = upserted_result.status
+        result.location_id = upserted_result.location_id
+        result.ev_charger_count = upserted_result.ev_charger_count
+        result.detail = upserted_result.detail
+
+    logger.info(
+        f"Bulk upserted page of {len(results)} items: "
+        + ", ".join(f"{status.value}={sum(result.status == status for result in results)}" for status in IngestionStatusEnum)
+    )
+    return results
+
+
+def upsert_one_by_one(location_service, locations, ev_chargers, results) -> dict:
+    """Upsert each location of a failed page in its own transaction, only the bad items fail."""
+    ev_chargers_by_location: dict[str, list] = {}
+    for ev_charger in ev_chargers:
+        ev_chargers_by_location.setdefault(ev_charger.location_here_id, []).append(ev_charger)
+    results_by_here_id = {result.here_id: result for result in results if result.here_id is not None}
+
+    upserted = {}
+    for location in locations:
+        try:
+            upserted.update(location_service.bulk_upsert([location], ev_chargers_by_location.get(location.here_id, [])))
+        except Exception as e:
+            logger.warning(f"Failed to upsert location {location.here_id}: {e}")
+            results_by_here_id[location.here_id].detail = str(e)
+    return upserted
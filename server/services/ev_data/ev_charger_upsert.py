@@ -12,92 +12,84 @@ from app.constant.enum.power_plug_type import PowerModel
 logger = logging.getLogger(__name__)
 
 
-def create_ev_chargers_from_data(
-    locations_and_items,
-    ev_charger_service,
-    power_plug_type_service,
-    power_output_service,
-):
-    from app.schema.ev_charger_schema import CreateEVCharger, CreatePort
+def parse_evses(item):
+    """Yield (charger fields, [(port here_id, plug type, power output)]) per HERE evse."""
     from app.schema.power_plug_type_schema import CreatePowerPlugType
     from app.schema.power_output_schema import CreatePowerOutput
     import datetime
 
-    for location, item in locations_and_items:
-        extended = item.get("extended", {})
-        ev_availability = extended.get("evAvailability", {})
-        ev_station = extended.get("evStation", {})
-        station_list = ev_availability.get("stations", [])
-        connectors_info = ev_station.get("connectors", [])
-        if not station_list:
-            logger.warning(f"No station_list found for location {location.id}")
-            continue
-
-        evses = station_list[0].get("evses", [])
-        for evse in evses:
-            evc_here_id = evse.get("id")
-            cpo_id = evse.get("cpoId")
-            cpo_evse_emi3_id = evse.get("cpoEvseEMI3Id")
-            availability = AvailabilityEnum(evse.get("state", "UNAVAILABLE"))
-            last_updated = evse.get("last_updated")
-            if last_updated:
-                try:
-                    last_updated = datetime.datetime.fromisoformat(
-                        last_updated.replace("Z", "+00:00")
-                    )
-                except Exception as e:
-                    logger.warning(f"Invalid last_updated format: {last_updated} ({e})")
-                    last_updated = None
-
-            ports = []
-            for connector in evse.get("connectors", []):
-                type_id = connector.get("typeId")
-                port_here_id = connector.get("id")
-                connector_detail = next(
-                    (
-                        c
-                        for c in connectors_info
-                        if c.get("connectorType", {}).get("id") == type_id
-                    ),
-                    None,
-                )
-                if not connector_detail:
-                    logger.warning(
-                        f"Connector type {type_id} not found in evStation.connectors for charger {evc_here_id}."
-                    )
-                    continue
-
-                supplier_name = connector_detail.get("supplierName")
-                connector_type = connector_detail.get("connectorType", {})
-                plug_type = connector_type.get("name")
-                plug_type_id = connector_type.get("id")
-                fixed_plug = connector_detail.get("fixedCable")
-                volts_range = connector_detail.get("chargingPoint", {}).get(
-                    "voltsRange", ""
+    extended = item.get("extended", {})
+    ev_availability = extended.get("evAvailability", {})
+    ev_station = extended.get("evStation", {})
+    station_list = ev_availability.get("stations", [])
+    connectors_info = ev_station.get("connectors", [])
+    if not station_list:
+        logger.warning(f"No station_list found for item {item.get('id')}")
+        return
+
+    evses = station_list[0].get("evses", [])
+    for evse in evses:
+        evc_here_id = evse.get("id")
+        availability = AvailabilityEnum(evse.get("state", "UNAVAILABLE"))
+        last_updated = evse.get("last_updated")
+        if last_updated:
+            try:
+                last_updated = datetime.datetime.fromisoformat(
+                    last_updated.replace("Z", "+00:00")
                 )
-                amps_range = connector_detail.get("chargingPoint", {}).get(
-                    "ampsRange", ""
+            except Exception as e:
+                logger.warning(f"Invalid last_updated format: {last_updated} ({e})")
+                last_updated = None
+
+        ports = []
+        for connector in evse.get("connectors", []):
+            type_id = connector.get("typeId")
+            port_here_id = connector.get("id")
+            connector_detail = next(
+                (
+                    c
+                    for c in connectors_info
+                    if c.get("connectorType", {}).get("id") == type_id
+                ),
+                None,
+            )
+            if not connector_detail:
+                logger.warning(
+                    f"Connector type {type_id} not found in evStation.connectors for charger {evc_here_id}."
                 )
-                max_power_level = connector_detail.get("maxPowerLevel")
+                continue
+
+            supplier_name = connector_detail.get("supplierName")
+            connector_type = connector_detail.get("connectorType", {})
+            plug_type = connector_type.get("name")
+            plug_type_id = connector_type.get("id")
+            fixed_plug = connector_detail.get("fixedCable")
+            volts_range = connector_detail.get("chargingPoint", {}).get(
+                "voltsRange", ""
+            )
+            amps_range = connector_detail.get("chargingPoint", {}).get(
+                "ampsRange", ""
+            )
+            max_power_level = connector_detail.get("maxPowerLevel")
 
-                power_model = PowerModel.DC if "DC" in volts_range else PowerModel.AC
+            power_model = PowerModel.DC if "DC" in volts_range else PowerModel.AC
 
-                voltage = None
-                amperage = None
-                try:
-                    voltage = int(
-                        volts_range.split("-")[0].replace("V", "").replace(" ", "")
-                    )
-                except Exception:
-                    logger.warning(f"Could not parse voltage from '{volts_range}'")
-                    pass
-                try:
-                    amperage = int(amps_range.replace("A", "").replace(" ", ""))
-                except Exception:
-                    logger.warning(f"Could not parse amperage from '{amps_range}'")
-                    pass
-
-                # Create or get PowerPlugType
+            voltage = None
+            amperage = None
+            try:
+                voltage = int(
+                    volts_range.split("-")[0].replace("V", "").replace(" ", "")
+                )
+            except Exception:
+                logger.warning(f"Could not parse voltage from '{volts_range}'")
+                pass
+            try:
+                amperage = int(amps_range.replace("A", "").replace(" ", ""))
+            except Exception:
+                logger.warning(f"Could not parse amperage from '{amps_range}'")
+                pass
+
+            try:
                 power_plug_type_schema = CreatePowerPlugType(
                     supplier_name=supplier_name,
                     power_model=power_model,
@@ -108,9 +100,6 @@ def create_ev_chargers_from_data(
                     additional_note=None,
                     power_plug_region=None,
                 )
-                power_plug_type = power_plug_type_service.add(power_plug_type_schema)
-
-                # Create or get PowerOutput
                 power_output_schema = CreatePowerOutput(
                     output_value=max_power_level,
                     voltage=voltage,
@@ -118,33 +107,91 @@ def create_ev_chargers_from_data(
                     charging_speed=None,
                     description=None,
                 )
-                power_output = power_output_service.add(power_output_schema)
+            except ValueError as e:
+                # one bad connector does not drop the rest of the location
+                logger.warning(f"Skipped connector {port_here_id} of charger {evc_here_id}: {e}")
+                continue
+            ports.append((port_here_id, power_plug_type_schema, power_output_schema))
+
+        charger_fields = dict(
+            here_id=evc_here_id,
+            cpo_id=evse.get("cpoId"),
+            cpo_evse_emi3_id=evse.get("cpoEvseEMI3Id"),
+            availability=availability,
+            last_updated=last_updated,
+            station_name=None,
+            installation_date=None,
+            last_maintenance_date=None,
+        )
+        yield charger_fields, ports
+
+
+def build_bulk_ev_chargers(item, location_here_id):
+    from app.schema.ev_charger_schema import CreateBulkEVCharger, CreateBulkPort
 
-                port = CreatePort(
+    return [
+        CreateBulkEVCharger(
+            **charger_fields,
+            location_here_id=location_here_id,
+            ev_charger_ports=[
+                CreateBulkPort(
                     here_id=port_here_id,
-                    power_plug_type_id=power_plug_type.id,
-                    power_output_id=power_output.id,
+                    power_plug_type=power_plug_type,
+                    power_output=power_output,
                 )
-                ports.append(port)
-
-            ev_charger_schema = CreateEVCharger(
-                location_id=location.id,
-                here_id=evc_here_id,
-                cpo_id=cpo_id,
-                cpo_evse_emi3_id=cpo_evse_emi3_id,
-                availability=availability,
-                last_updated=last_updated,
-                station_name=None,
-                installation_date=None,
-                last_maintenance_date=None,
-                ev_charger_ports=ports,
-            )
+                for port_here_id, power_plug_type, power_output in ports
+            ],
+        )
+        for charger_fields, ports in parse_evses(item)
+    ]
+
+
+def create_ev_chargers_from_data(
+    locations_and_items,
+    ev_charger_service,
+    power_plug_type_service,
+    power_output_service,
+):
+    """Upsert the EV chargers of each ``(location, item)``.
+
+    Returns the ``(location, item)`` pairs whose chargers were all upserted.
+    """
+    from app.schema.ev_charger_schema import CreateEVCharger, CreatePort
+
+    stored = []
+    for location, item in locations_and_items:
+        failed = False
+        for charger_fields, parsed_ports in parse_evses(item):
+            evc_here_id = charger_fields["here_id"]
             try:
+                ports = []
+                for port_here_id, power_plug_type_schema, power_output_schema in parsed_ports:
+                    # Create or get PowerPlugType
+                    power_plug_type = power_plug_type_service.add(power_plug_type_schema)
+                    # Create or get PowerOutput
+                    power_output = power_output_service.add(power_output_schema)
+
+                    port = CreatePort(
+                        here_id=port_here_id,
+                        power_plug_type_id=power_plug_type.id,
+                        power_output_id=power_output.id,
+                    )
+                    ports.append(port)
+
+                ev_charger_schema = CreateEVCharger(
+                    **charger_fields,
+                    location_id=location.id,
+                    ev_charger_ports=ports,
+                )
                 ev_charger_service.add(ev_charger_schema)
                 logger.info(
                     f"Upserted EV charger {evc_here_id} at location {location.id}"
                 )
             except Exception as e:
+                failed = True
                 logger.warning(
                     f"Failed to upsert EV charger {evc_here_id} at location {location.id}: {e}"
                 )
+        if not failed:
+            stored.append((location, item))
+    return stored
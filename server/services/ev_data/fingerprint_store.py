@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FINGERPRINT_PATH = os.path.join("logs", "here_fingerprints.sqlite3")
+# Unchanged items are still rewritten once in a while, so that a wiped
+# database or index heals without having to delete the store by hand
+DEFAULT_MAX_AGE_SECONDS = 86400
+# HERE fields which change with the query rather than with the station
+VOLATILE_FIELDS = {"distance"}
+# Stay below SQLite's bound parameter limit
+QUERY_CHUNK_SIZE = 500
+
+
+def content_hash(item: dict) -> str:
+    payload = {k: v for k, v in item.items() if k not in VOLATILE_FIELDS}
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class FingerprintStore:
+    """On-disk ``HERE id -> content hash`` map of the items already stored."""
+
+    def __init__(self, path=None, max_age_seconds=None):
+        self.path = path or os.getenv("HERE_FINGERPRINT_PATH", DEFAULT_FINGERPRINT_PATH)
+        self.max_age_seconds = (
+            max_age_seconds if max_age_seconds is not None else int(os.getenv("HERE_FINGERPRINT_MAX_AGE", DEFAULT_MAX_AGE_SECONDS))
+        )
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Used from the upsert worker threads, access is serialized by the lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprint (" "here_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def filter_changed(self, items: list[dict]) -> list[dict]:
+        """Return the items which are new, changed or older than the max age."""
+        hashes = {item.get("id"): content_hash(item) for item in items}
+        ids = list(hashes.keys())
+        stored = {}
+        with self._lock:
+            for i in range(0, len(ids), QUERY_CHUNK_SIZE):
+                chunk = ids[i : i + QUERY_CHUNK_SIZE]
+                rows = self._connection.execute(
+                    "SELECT here_id, content_hash, stored_at FROM fingerprint " f"WHERE here_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                stored.update({here_id: (h, stored_at) for here_id, h, stored_at in rows})
+
+        min_stored_at = time.time() - self.max_age_seconds
+        changed = []
+        for item in items:
+            fingerprint = stored.get(item.get("id"))
+            if fingerprint is None or fingerprint[0] != hashes[item.get("id")] or fingerprint[1] < min_stored_at:
+                changed.append(item)
+        return changed
+
+    def record(self, items: list[dict]) -> None:
+        now = time.time()
+        rows = [(item.get("id"), content_hash(item), now) for item in items]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT INTO fingerprint (here_id, content_hash, stored_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(here_id) DO UPDATE SET "
+                "content_hash = excluded.content_hash, stored_at = excluded.stored_at",
+                rows,
+            )
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -88,88 +88,95 @@ def parse_opening_hours(opening_hours_json):
     return working_days
 
 
-def create_locations_from_data(location_service, data: dict):
+def build_location_schema(item: dict):
+    """Map a HERE item to a location schema, or None if it must be skipped."""
     from app.schema.location_schema import CreateEditLocation
 
-    created_locations = []
+    address = item.get("address", {})
+    position = item.get("position", {})
+    contacts = item.get("contacts", [])
+    ev_station = item.get("extended", {}).get("evStation", {})
+    ev_availability = item.get("extended", {}).get("evAvailability", {})
+    station_list = ev_availability.get("stations", [])
+    # if no ev_availability or no stations, skip this item
+    if not ev_availability or not station_list:
+        logger.warning(
+            f"Skipping item with external_id: {item.get('id')} due to missing ev_availability or stations."
+        )
+        return None
+    # Extract phone and website from contacts
+    phone_number = None
+    website_url = None
+    if contacts:
+        contact = contacts[0]
+        phones = contact.get("phone", [])
+        if phones:
+            phone_number = phones[0].get("value")
+        wwws = contact.get("www", [])
+        if wwws:
+            website_url = wwws[0].get("value")
+
+    # Payment methods (only accepted ones)
+    payment_methods = []
+    for pm in ev_station.get("paymentMethods", []):
+        if pm.get("accepted"):
+            payment_methods.append(pm.get("id"))
+
+    # Map country string to Country enum
+    country_str = address.get("countryName", "United States")
+    try:
+        country = get_enum_value(Country, country_str)
+    except Exception:
+        logger.warning(f"Unknown country: {country_str}, skipping item.")
+        return None
 
-    for item in data.get("items", []):
-        address = item.get("address", {})
-        position = item.get("position", {})
-        contacts = item.get("contacts", [])
-        ev_station = item.get("extended", {}).get("evStation", {})
-        ev_availability = item.get("extended", {}).get("evAvailability", {})
-        station_list = ev_availability.get("stations", [])
-        # if no ev_availability or no stations, skip this item
-        if not ev_availability or not station_list:
-            logger.warning(
-                f"Skipping item with external_id: {item.get('id')} due to missing ev_availability or stations."
-            )
-            continue
-        # Extract phone and website from contacts
-        phone_number = None
-        website_url = None
-        if contacts:
-            contact = contacts[0]
-            phones = contact.get("phone", [])
-            if phones:
-                phone_number = phones[0].get("value")
-            wwws = contact.get("www", [])
-            if wwws:
-                website_url = wwws[0].get("value")
-
-        # Payment methods (only accepted ones)
-        payment_methods = []
-        for pm in ev_station.get("paymentMethods", []):
-            if pm.get("accepted"):
-                payment_methods.append(pm.get("id"))
-
-        # Map country string to Country enum
-        country_str = address.get("countryName", "United States")
+    # Map access string to LocationAccess enum
+    access_str = ev_station.get("access")
+    access = None
+    if access_str:
         try:
-            country = get_enum_value(Country, country_str)
+            access = get_enum_value(LocationAccess, access_str)
         except Exception:
-            logger.warning(f"Unknown country: {country_str}, skipping item.")
-            continue
+            logger.warning(f"Unknown access: {access_str}, setting as None.")
+
+    logger.info(
+        f"Processing item with external_id: {item.get('id')}, county: {address.get('county')}, state: {address.get('state')}, total_charging_ports: {ev_station.get('totalNumberOfConnectors')}, access: {access}, payment_methods: {payment_methods}"
+    )
+
+    return CreateEditLocation(
+        here_id=station_list[0].get("id") if station_list else None,
+        external_id=item.get("id"),
+        location_name=item.get("title"),
+        street=address.get("street"),
+        house_number=address.get("houseNumber"),
+        district=address.get("district"),
+        city=address.get("city", ""),
+        state=address.get("state"),
+        county=address.get("county"),
+        country=country,
+        postal_code=address.get("postalCode"),
+        latitude=position.get("lat"),
+        longitude=position.get("lng"),
+        phone_number=phone_number,
+        website_url=website_url,
+        description=address.get("label"),
+        image_url=None,
+        pricing=None,
+        parking_level=None,
+        total_charging_ports=ev_station.get("totalNumberOfConnectors"),
+        access=access,
+        payment_methods=payment_methods if payment_methods else None,
+        working_days=parse_opening_hours(item.get("openingHours", [])),
+    )
 
-        # Map access string to LocationAccess enum
-        access_str = ev_station.get("access")
-        access = None
-        if access_str:
-            try:
-                access = get_enum_value(LocationAccess, access_str)
-            except Exception:
-                logger.warning(f"Unknown access: {access_str}, setting as None.")
-
-        logger.info(
-            f"Processing item with external_id: {item.get('id')}, county: {address.get('county')}, state: {address.get('state')}, total_charging_ports: {ev_station.get('totalNumberOfConnectors')}, access: {access}, payment_methods: {payment_methods}"
-        )
 
-        schema = CreateEditLocation(
-            here_id=station_list[0].get("id") if station_list else None,
-            external_id=item.get("id"),
-            location_name=item.get("title"),
-            street=address.get("street"),
-            house_number=address.get("houseNumber"),
-            district=address.get("district"),
-            city=address.get("city", ""),
-            state=address.get("state"),
-            county=address.get("county"),
-            country=country,
-            postal_code=address.get("postalCode"),
-            latitude=position.get("lat"),
-            longitude=position.get("lng"),
-            phone_number=phone_number,
-            website_url=website_url,
-            description=address.get("label"),
-            image_url=None,
-            pricing=None,
-            parking_level=None,
-            total_charging_ports=ev_station.get("totalNumberOfConnectors"),
-            access=access,
-            payment_methods=payment_methods if payment_methods else None,
-            working_days=parse_opening_hours(item.get("openingHours", [])),
-        )
+def create_locations_from_data(location_service, data: dict):
+    created_locations = []
+
+    for item in data.get("items", []):
+        schema = build_location_schema(item)
+        if schema is None:
+            continue
 
         try:
             location = location_service.add(schema)
@@ -1,16 +1,19 @@
+import asyncio
 import os
-import httpx
 from dotenv import load_dotenv
+
+from app.core.http_client import AsyncHttpClient, HttpClient
 from server.services.here.here_auth import TokenManager
 
 load_dotenv()  # Loads .env file
 
+# Shared pooled client, closed by the server on shutdown
+http_client = HttpClient()
 # Create a single TokenManager instance (can be reused)
-token_manager = TokenManager()
+token_manager = TokenManager(http_client)
 
 
-def get_here_ev_data(lat=None, lon=None, radius_km=None):
-    url = os.getenv("HERE_API_URL")
+def build_here_params(lat=None, lon=None, radius_km=None):
     params = {
         "categories": os.getenv("HERE_API_CATEGORIES"),
         "limit": os.getenv("HERE_API_LIMIT", 100),
@@ -22,10 +25,25 @@ def get_here_ev_data(lat=None, lon=None, radius_km=None):
     else:
         params["at"] = os.getenv("HERE_API_AT")
         params["in"] = os.getenv("HERE_API_IN")
+    return params
+
+
+def get_here_ev_data(lat=None, lon=None, radius_km=None):
+    url = os.getenv("HERE_API_URL")
+    params = build_here_params(lat, lon, radius_km)
 
     token = token_manager.get_token()
     headers = {"Authorization": f"Bearer {token}"}
 
-    response = httpx.get(url, params=params, headers=headers, timeout=30)
-    response.raise_for_status()
-    return response.json()
+    return http_client.get_json(url, params=params, headers=headers)
+
+
+async def get_here_ev_data_async(client: AsyncHttpClient, lat=None, lon=None, radius_km=None):
+    url = os.getenv("HERE_API_URL")
+    params = build_here_params(lat, lon, radius_km)
+
+    # The token is cached, so this only blocks when it has to be refreshed
+    token = await asyncio.to_thread(token_manager.get_token)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    return await client.get_json(url, params=params, headers=headers)
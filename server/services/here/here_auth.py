@@ -5,9 +5,11 @@ from base64 import b64encode
 import hmac
 import hashlib
 import binascii
-import requests
+import threading
 from dotenv import load_dotenv
 
+from app.core.http_client import HttpClient
+
 load_dotenv()
 
 DEFAULT_TOKEN_EXPIRY_SECONDS = 86400  # Default to 24 hours
@@ -17,9 +19,12 @@ class TokenManager:
     # Define a named constant for token expiry buffer
     TOKEN_EXPIRY_BUFFER_SECONDS = 120
 
-    def __init__(self):
+    def __init__(self, http_client: HttpClient):
+        self.http_client = http_client
         self.token = None
         self.token_expiry = 0  # Unix timestamp
+        # Concurrent crawler workers must not refresh the token more than once
+        self._lock = threading.Lock()
 
     def is_token_valid(self):
         # Consider token valid if it expires in more than TOKEN_EXPIRY_BUFFER_SECONDS
@@ -30,8 +35,10 @@ class TokenManager:
     def get_token(self):
         if self.is_token_valid():
             return self.token
-        self.token, self.token_expiry = self._fetch_new_token()
-        return self.token
+        with self._lock:
+            if not self.is_token_valid():
+                self.token, self.token_expiry = self._fetch_new_token()
+            return self.token
 
     def _fetch_new_token(self):
         grant_type = "client_credentials"
@@ -79,8 +86,7 @@ class TokenManager:
             ),
         }
 
-        response = requests.post(url, data=body, headers=headers)
-        response.raise_for_status()
+        response = self.http_client.post(url, data=body, headers=headers)
         data = response.json()
         token = data["access_token"]
         expires_in = data.get(
@@ -1,9 +1,14 @@
+import asyncio
 import math
 import logging
+import os
 
+from app.constant.enum.ingestion import IngestionStatusEnum
+from server.services.ev_data.bulk_upsert import upsert_here_page
 from server.services.ev_data.ev_charger_upsert import create_ev_chargers_from_data
 from server.services.ev_data.location_upsert import create_locations_from_data
-from server.services.here.here_api import get_here_ev_data
+from app.core.http_client import AsyncHttpClient
+from server.services.here.here_api import get_here_ev_data_async
 
 logger = logging.getLogger(__name__)
 CENTER_LAT = 34.0522
@@ -33,52 +38,190 @@ MAX_ITEMS_PER_CELL = 100
 MIN_RADIUS_KM = 2
 SUBDIVISION_DELTAS = [-0.25, 0, 0.25]
 
+# Number of HERE requests allowed in flight at the same time
+MAX_IN_FLIGHT = int(os.getenv("HERE_MAX_IN_FLIGHT", 8))
+# Number of fetched pages allowed to wait for the upsert stage
+RESULT_QUEUE_SIZE = int(os.getenv("HERE_RESULT_QUEUE_SIZE", 16))
 
-def fetch_and_upsert_la_ev_data(
-    location_service, ev_charger_service, power_plug_type_service, power_output_service
-):
-    grid = generate_grid(CENTER_LAT, CENTER_LON, LAT_RANGE, LON_RANGE, STEP_KM)
-    seen_ids = set()
 
-    def process_cell(lat, lon, radius_km):
-        logger.info(f"Processing cell at ({lat},{lon}), r={radius_km}km")
-        data = get_here_ev_data(lat=lat, lon=lon, radius_km=radius_km)
-        items = data.get("items", [])
-        # Keep track of how many unique items we have seen
-        if not items:
-            logger.info(f"No items found at ({lat},{lon}), r={radius_km}km")
-            return
+def subdivide_cell(lat, lon, radius_km):
+    for dlat in SUBDIVISION_DELTAS:
+        for dlon in SUBDIVISION_DELTAS:
+            if dlat == 0 and dlon == 0:
+                continue
+            yield (
+                lat + dlat * radius_km / KM_PER_DEGREE_LATITUDE,
+                lon
+                + dlon
+                * radius_km
+                / (KM_PER_DEGREE_LATITUDE * math.cos(math.radians(lat))),
+                radius_km / 2,
+            )
+
+
+async def crawl_cells(client, cells, results, max_in_flight=MAX_IN_FLIGHT):
+    """Fetch every cell with at most ``max_in_flight`` concurrent requests.
+
+    The quadtree subdivision is driven by a work queue: dense cells push their
+    sub-cells back on the queue instead of recursing. Each fetched page is put
+    on ``results`` as ``(lat, lon, radius_km, items)``.
+    """
+    work = asyncio.Queue()
+    for lat, lon in cells:
+        work.put_nowait((lat, lon, RADIUS_KM))
+    stats = {"fetched": 0, "failed": 0}
+
+    async def worker():
+        while True:
+            lat, lon, radius_km = await work.get()
+            try:
+                logger.info(f"Processing cell at ({lat},{lon}), r={radius_km}km")
+                data = await get_here_ev_data_async(
+                    client, lat=lat, lon=lon, radius_km=radius_km
+                )
+                items = data.get("items", [])
+                stats["fetched"] += 1
+                if not items:
+                    logger.info(f"No items found at ({lat},{lon}), r={radius_km}km")
+                    continue
+                logger.info(
+                    f"Fetched {len(items)} items at ({lat},{lon}), r={radius_km}km"
+                )
+                # Blocks while the upsert stage is behind, which throttles fetching
+                await results.put((lat, lon, radius_km, items))
+                # If dense, subdivide
+                if len(items) >= MAX_ITEMS_PER_CELL and radius_km > MIN_RADIUS_KM:
+                    logger.info(f"Subdividing cell at ({lat},{lon}), r={radius_km}km")
+                    for cell in subdivide_cell(lat, lon, radius_km):
+                        work.put_nowait(cell)
+            except Exception as e:
+                stats["failed"] += 1
+                logger.error(
+                    f"Failed to fetch cell at ({lat},{lon}), r={radius_km}km: {e}"
+                )
+            finally:
+                work.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(max_in_flight)]
+    try:
+        await work.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    logger.info(f"Crawled {stats['fetched']} cells, {stats['failed']} failed.")
+    return stats
+
+
+async def upsert_pages(results, upsert_page, fingerprint_store=None):
+    """Drain ``results`` until the ``None`` sentinel, upserting page by page.
+
+    Items already seen during this crawl (overlapping cells) are dropped, and
+    so are items whose content did not change since they were last stored.
+    ``upsert_page`` returns the items it stored successfully.
+    """
+    seen_ids = set()
+    stats = {"seen": 0, "unchanged": 0, "stored": 0}
+    while True:
+        page = await results.get()
+        if page is None:
+            break
+        _, _, _, items = page
         new_items = []
         for item in items:
             ext_id = item.get("id")
             if ext_id not in seen_ids:
                 seen_ids.add(ext_id)
                 new_items.append(item)
-        logger.info(f"Fetched {len(items)} items at ({lat},{lon}), r={radius_km}km")
-        # Upsert as soon as you get data
+        stats["seen"] += len(items) - len(new_items)
+        changed_items = new_items
+        if fingerprint_store is not None and new_items:
+            changed_items = await asyncio.to_thread(
+                fingerprint_store.filter_changed, new_items
+            )
+            stats["unchanged"] += len(new_items) - len(changed_items)
+        if not changed_items:
+            continue
+        try:
+            # Database writes are synchronous, keep them off the event loop
+            stored_items = await asyncio.to_thread(upsert_page, changed_items)
+        except Exception as e:
+            logger.error(f"Failed to upsert page of {len(changed_items)} items: {e}")
+            continue
+        stats["stored"] += len(stored_items)
+        if fingerprint_store is not None and stored_items:
+            await asyncio.to_thread(fingerprint_store.record, stored_items)
+        # Log number of unique items seen so far
+        logger.info(f"Total unique items seen: {len(seen_ids)}")
+    logger.info(
+        f"Upserted {stats['stored']} items, skipped {stats['seen']} already seen "
+        f"and {stats['unchanged']} unchanged items."
+    )
+    return stats
+
+
+async def crawl_and_upsert(
+    cells, upsert_page, max_in_flight=MAX_IN_FLIGHT, fingerprint_store=None
+):
+    """Crawl ``cells`` and upsert the pages as they come, errors of either stage are raised.
+
+    The upsert stage only stops before the sentinel when it fails, the crawl is
+    cancelled then since its workers would block forever on the full queue.
+    """
+    results = asyncio.Queue(maxsize=RESULT_QUEUE_SIZE)
+    client = AsyncHttpClient()
+    consumer = asyncio.create_task(
+        upsert_pages(results, upsert_page, fingerprint_store)
+    )
+    crawler = asyncio.create_task(crawl_cells(client, cells, results, max_in_flight))
+    sentinel = None
+    try:
+        await asyncio.wait({crawler, consumer}, return_when=asyncio.FIRST_COMPLETED)
+        if not consumer.done():
+            crawler.result()
+            sentinel = asyncio.create_task(results.put(None))
+            await asyncio.wait({sentinel, consumer}, return_when=asyncio.FIRST_COMPLETED)
+        return await consumer
+    finally:
+        pending = [task for task in (crawler, consumer, sentinel) if task is not None]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await client.aclose()
+
+
+def fetch_and_upsert_la_ev_data(
+    location_service,
+    ev_charger_service,
+    power_plug_type_service,
+    power_output_service,
+    bulk=True,
+    max_in_flight=MAX_IN_FLIGHT,
+    fingerprint_store=None,
+):
+    grid = generate_grid(CENTER_LAT, CENTER_LON, LAT_RANGE, LON_RANGE, STEP_KM)
+
+    def upsert_page(items):
+        if bulk:
+            results = upsert_here_page(location_service, {"items": items})
+            stored_ids = {
+                result.external_id
+                for result in results
+                # stored but not indexed yet still counts, the outbox indexes them later
+                if result.status
+                in (IngestionStatusEnum.INSERTED, IngestionStatusEnum.UPDATED)
+            }
+            return [item for item in items if item.get("id") in stored_ids]
         locations_and_items = create_locations_from_data(
             location_service, {"items": items}
         )
-        create_ev_chargers_from_data(
+        # an item whose chargers failed is not recorded, the next crawl retries it
+        stored = create_ev_chargers_from_data(
             locations_and_items,
             ev_charger_service,
             power_plug_type_service,
             power_output_service,
         )
-        # If dense, subdivide
-        if len(items) >= MAX_ITEMS_PER_CELL and radius_km > MIN_RADIUS_KM:
-            logger.info(f"Subdividing cell at ({lat},{lon}), r={radius_km}km")
-            for dlat in SUBDIVISION_DELTAS:
-                for dlon in SUBDIVISION_DELTAS:
-                    if dlat == 0 and dlon == 0:
-                        continue
-                    process_cell(
-                        lat + dlat * radius_km / 111,
-                        lon + dlon * radius_km / (111 * math.cos(math.radians(lat))),
-                        radius_km / 2,
-                    )
-
-    for lat, lon in grid:
-        process_cell(lat, lon, RADIUS_KM)
-        # Log number of unique items seen so far
-        logger.info(f"Total unique items seen: {len(seen_ids)}")
+        return [item for _, item in stored]
+
+    asyncio.run(crawl_and_upsert(grid, upsert_page, max_in_flight, fingerprint_store))
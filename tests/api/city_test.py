@@ -89,6 +89,38 @@ def test_get_paginated_city(client: TestClient):
     assert len(items) == 5
 
 
+def test_get_paginated_city_count_mode(client: TestClient):
+    for city in get_city_test_data():
+        create_city(client, city)
+    rs = client.get("/api/v1/cities", params={"page": 2, "page_size": 2})
+    assert rs.status_code == 200
+    assert len(rs.json()["founds"]) == 2
+    assert rs.json()["search_options"]["total_count"] == 5
+    rs = client.get("/api/v1/cities", params={"page": 2, "page_size": 2, "count_mode": "none"})
+    assert rs.status_code == 200
+    assert len(rs.json()["founds"]) == 2
+    assert rs.json()["search_options"]["total_count"] is None
+
+
+def test_get_city_by_country_cursor(client: TestClient):
+    cities = get_city_test_data()
+    for city in cities:
+        create_city(client, city)
+    params = {"country": "Vietnam", "order_by": "updated_at", "ordering": "asc", "page_size": 2}
+    rs = client.get("/api/v1/cities", params=params)
+    assert rs.status_code == 200
+    names = [item["name"] for item in rs.json()["founds"]]
+    next_cursor = rs.json()["next_cursor"]
+    assert next_cursor is not None
+    rs = client.get("/api/v1/cities", params={**params, "cursor": next_cursor})
+    assert rs.status_code == 200
+    names += [item["name"] for item in rs.json()["founds"]]
+    assert rs.json()["next_cursor"] is None
+    assert names == [city.name for city in cities[:3]]
+    rs = client.get("/api/v1/cities", params={**params, "ordering": "desc", "cursor": next_cursor})
+    assert rs.status_code == 422
+
+
 def test_update_city(client: TestClient):
     city = get_city_test_data()[0]
     rs = create_city(client, city)
@@ -0,0 +1,62 @@
+import httpx
+from dependency_injector import providers
+from fastapi.testclient import TestClient
+
+from app.core.http_client import AsyncHttpClient
+from app.main import AppCreator
+
+DIRECTIONS = {
+    "status": "OK",
+    "routes": [
+        {
+            "legs": [
+                {
+                    "steps": [
+                        {"start_location": {"lat": 10.79619, "lng": 106.63332}, "end_location": {"lat": 10.80172, "lng": 106.65412}},
+                        {"start_location": {"lat": 10.80172, "lng": 106.65412}, "end_location": {"lat": 10.82302, "lng": 106.68212}},
+                    ]
+                }
+            ],
+            "overview_polyline": {"points": "es{`AgyyiSqa@_aCcdC_nD"},
+        }
+    ],
+}
+DIRECTION_PARAMS = {"start_lat": 10.79619, "start_long": 106.63332, "end_lat": 10.82302, "end_long": 106.68212}
+
+
+def fake_google(calls: list, directions: dict = DIRECTIONS):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=directions)
+
+    return providers.Singleton(AsyncHttpClient, transport=httpx.MockTransport(handler))
+
+
+def test_get_directions_is_cached(client: TestClient):
+    calls = []
+    with AppCreator().container.async_http_client.override(fake_google(calls)):
+        first = client.get("/api/v1/gg-map/directions", params=DIRECTION_PARAMS)
+        second = client.get("/api/v1/gg-map/directions", params=DIRECTION_PARAMS)
+    assert first.status_code == 200
+    assert first.json()["overview_polyline"] == DIRECTIONS["routes"][0]["overview_polyline"]["points"]
+    assert second.json() == first.json()
+    assert len(calls) == 1
+
+
+def test_get_directions_errors_are_not_cached(client: TestClient):
+    calls = []
+    error = {"status": "OVER_QUERY_LIMIT", "error_message": "You have exceeded your daily request quota for this API.", "routes": []}
+    with AppCreator().container.async_http_client.override(fake_google(calls, error)):
+        first = client.get("/api/v1/gg-map/directions", params=DIRECTION_PARAMS)
+        second = client.get("/api/v1/gg-map/directions", params=DIRECTION_PARAMS)
+    assert first.status_code == second.status_code == 500
+    assert first.json()["detail"] == error["error_message"]
+    assert len(calls) == 2
+
+
+def test_get_directions_without_route(client: TestClient):
+    calls = []
+    with AppCreator().container.async_http_client.override(fake_google(calls, {"status": "ZERO_RESULTS", "routes": []})):
+        response = client.get("/api/v1/gg-map/directions", params=DIRECTION_PARAMS)
+    assert response.status_code == 200
+    assert response.json()["overview_polyline"] is None
@@ -1,5 +1,6 @@
 from starlette.testclient import TestClient
 
+from tests.data.amenities import create_amenities, get_amenities_test_data
 from tests.data.ev_charger import create_ev_charger, get_ev_charger_test_data
 from tests.data.location import (
     create_location,
@@ -64,6 +65,24 @@ def test_create_location_with_wrong_longitude_value(client: TestClient):
     assert rs.status_code == 422
 
 
+def test_create_location_with_default_timezone(client: TestClient):
+    location = get_location_test_data()[0]
+    rs = create_location(client, location)
+    assert rs.status_code == 201
+    assert rs.json()["timezone"] == "Asia/Ho_Chi_Minh"
+
+
+def test_create_location_with_wrong_timezone(client: TestClient):
+    location = get_location_test_data()[0]
+    location.timezone = "Asia/Saigonn"
+    rs = create_location(client, location)
+
+    msg = rs.json()["detail"][0]["msg"]
+
+    assert msg == "Value error, Timezone must be an IANA timezone name."
+    assert rs.status_code == 422
+
+
 def test_get_location(client: TestClient):
     location = get_location_test_data()[0]
     rs = create_location(client, location)
@@ -83,6 +102,28 @@ def test_get_paginated_location(client: TestClient):
     assert len(items) == 3
 
 
+def test_get_location_by_radius(client: TestClient):
+    for location in get_location_test_data():
+        create_location(client, location)
+    rs = client.get("/api/v1/locations/by_radius", params={"user_lat": 40.01, "user_long": 50.01, "radius": 10})
+    assert rs.status_code == 200
+    items = rs.json()
+    assert len(items) == 1
+    assert items[0]["location_name"] == "Agest"
+    assert 1 < items[0]["distance"] < 2
+
+
+def test_sync_elastic_data(client: TestClient):
+    for location in get_location_test_data():
+        create_location(client, location)
+    rs = client.post("/api/v1/locations/sync-elastic-data")
+    assert rs.status_code == 202
+    rs = client.get(f"/api/v1/locations/sync-elastic-data/{rs.json()['id']}")
+    assert rs.status_code == 200
+    assert rs.json()["status"] == "succeeded"
+    assert rs.json()["processed"] == rs.json()["total"] == 3
+
+
 def test_update_location(client: TestClient):
     location = get_location_test_data()[0]
     rs = create_location(client, location)
@@ -116,6 +157,26 @@ def test_delete_location(client: TestClient):
     assert rs.status_code == 404
 
 
+def test_delete_location_without_lazy_loads(client: TestClient, raiseload):
+    location = get_location_test_data()[0]
+    result = create_location(client, location)
+    rs = client.delete(f"/api/v1/locations/{result.json()['id']}")
+    assert rs.status_code == 200
+    assert rs.headers["X-DB-Repeated-Queries"] == "0"
+
+
+def test_get_location_list_without_lazy_loads(client: TestClient, raiseload):
+    amenities_ids = [create_amenities(client, amenities).json()["id"] for amenities in get_amenities_test_data()]
+    for location in get_location_test_data():
+        location.amenities_id = amenities_ids
+        create_location(client, location)
+    rs = client.get("/api/v1/locations")
+    assert rs.status_code == 200
+    assert all(location["location_amenities"] for location in rs.json()["founds"])
+    assert int(rs.headers["X-DB-Query-Count"]) > 0
+    assert rs.headers["X-DB-Repeated-Queries"] == "0"
+
+
 def test_delete_location_when_active_charger_exists(client: TestClient):
     ev_charger = get_ev_charger_test_data(client)[0]
     create_ev_charger(client, ev_charger)
@@ -125,3 +186,19 @@ def test_delete_location_when_active_charger_exists(client: TestClient):
     assert rs.status_code == 404
     rs = client.get("/api/v1/ev-chargers", params={"location_id": ev_charger.location_id})
     assert rs.json()["founds"].__len__() == 0
+
+
+def test_get_location_clusters_with_wrong_bounding_box(client: TestClient):
+    rs = client.get(
+        "/api/v1/locations/clusters",
+        params={"min_lat": 11, "min_lon": 106, "max_lat": 10, "max_lon": 107, "zoom": 8},
+    )
+    assert rs.status_code == 422
+
+
+def test_get_location_on_route_with_wrong_page_size(client: TestClient):
+    rs = client.get(
+        "/api/v1/locations/location-on-route",
+        params={"start_lat": 10.79, "start_long": 106.63, "end_lat": 10.82, "end_long": 106.68, "page_size": 0},
+    )
+    assert rs.status_code == 422
@@ -0,0 +1,15 @@
+import os
+
+from app.profile_startup import measure_startup
+
+# generous for slow runners, a regression shows up as a multiple of the usual time
+IMPORT_BUDGET_SECONDS = float(os.getenv("STARTUP_IMPORT_BUDGET_SECONDS", "10"))
+RSS_BUDGET_MB = float(os.getenv("STARTUP_RSS_BUDGET_MB", "200"))
+
+
+def test_app_import_within_budget():
+    startup = measure_startup()
+    assert startup["lazy_modules"] == []
+    assert startup["seconds"] < IMPORT_BUDGET_SECONDS
+    if startup["rss_mb"] is not None:
+        assert startup["rss_mb"] < RSS_BUDGET_MB
@@ -33,6 +33,12 @@ def client():
         yield client
 
 
+@pytest.fixture
+def raiseload(monkeypatch):
+    # relationships lazy loaded by the code under test fail the request instead of running N+1 queries
+    monkeypatch.setattr(configs, "DB_RAISELOAD", True)
+
+
 @pytest.fixture
 def container():
     return Container()
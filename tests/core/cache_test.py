@@ -0,0 +1,235 @@
+import asyncio
+import datetime
+
+import pytest
+import pytz
+
+from app.core import cache as cache_module
+from app.core.cache import ResultCache
+from app.core.config import configs
+from app.schema.location_schema import LocationByRadiusQuery, SearchLocation
+from app.services.location_service import normalize_nearby, normalize_search
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ResultCache(ttl=30, max_size=10)
+    cache.set("key", "value")
+
+    clock.now += 29
+    assert cache.get("key") == "value"
+    clock.now += 1
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResultCache(ttl=30, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_invalidate_drops_every_entry():
+    cache = ResultCache(ttl=30, max_size=10)
+    cache.set("a", 1)
+
+    cache.invalidate()
+
+    assert cache.get("a") is None
+
+
+def test_result_computed_across_an_invalidation_is_not_stored():
+    cache = ResultCache(ttl=30, max_size=10)
+
+    async def compute():
+        # the data changes while the query runs
+        cache.invalidate()
+        return "stale"
+
+    assert asyncio.run(cache.get_or_compute("key", compute)) == "stale"
+    assert cache.get("key") is None
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResultCache(ttl=30, max_size=10)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert calls == 1
+    assert cache.get("key") == "value"
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_computation():
+    cache = ResultCache(ttl=30, max_size=10)
+
+    async def run():
+        released = asyncio.Event()
+
+        async def compute():
+            await released.wait()
+            return "value"
+
+        cancelled = asyncio.create_task(cache.get_or_compute("key", compute))
+        waiting = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        released.set()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await waiting
+
+    assert asyncio.run(run()) == "value"
+    assert cache.get("key") == "value"
+
+
+def test_failed_computation_is_not_stored():
+    cache = ResultCache(ttl=30, max_size=10)
+
+    async def fail():
+        raise RuntimeError("Elasticsearch is unavailable")
+
+    async def compute():
+        return "value"
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_compute("key", fail))
+    assert asyncio.run(cache.get_or_compute("key", compute)) == "value"
+
+
+class FakeRedis:
+    """The ``mget``/``set`` subset of the asyncio Redis client the cache uses."""
+
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+        self.reads = 0
+
+    async def mget(self, *keys):
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        return [self.values.get(key) for key in keys]
+
+    async def set(self, key, value, px):
+        self.values[key] = value
+
+
+@pytest.fixture
+def redis_cache():
+    pytest.importorskip("redis")
+    from pydantic import TypeAdapter
+
+    from app.core.cache import RedisResultCache
+
+    redis_cache = RedisResultCache("redis://localhost:6379/0", 30, TypeAdapter(list[int]), "test")
+    redis_cache._async_client = FakeRedis()
+    return redis_cache
+
+
+def test_redis_cache_coalesces_concurrent_misses_in_process(redis_cache):
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return [1, 2]
+
+    async def run():
+        return await asyncio.gather(*(redis_cache.get_or_compute("key", compute) for _ in range(5)))
+
+    assert asyncio.run(run()) == [[1, 2]] * 5
+    assert calls == 1
+    assert redis_cache._async_client.reads == 1
+    assert redis_cache._async_client.values["test:key"] == b"0:[1,2]"
+
+
+def test_redis_cache_ignores_entries_of_an_older_generation(redis_cache):
+    redis_cache._async_client.values.update({"test:generation": b"2", "test:key": b"1:[1]"})
+
+    async def compute():
+        return [2]
+
+    assert asyncio.run(redis_cache.get_or_compute("key", compute)) == [2]
+    assert redis_cache._async_client.values["test:key"] == b"2:[2]"
+    assert asyncio.run(redis_cache.get_or_compute("key", compute)) == [2]
+
+
+def test_nearby_centers_in_one_geohash_cell_share_a_key(monkeypatch):
+    monkeypatch.setattr(configs, "RESULT_CACHE_GEOHASH_PRECISION", 7)
+    monkeypatch.setattr(configs, "RESULT_CACHE_RADIUS_BUCKET_KM", 0.5)
+    # ~10 m apart, inside the same ~150 m wide cell
+    key, schema = normalize_nearby(LocationByRadiusQuery(user_lat=10.77691, user_long=106.70091, radius=1.2))
+    other_key, _ = normalize_nearby(LocationByRadiusQuery(user_lat=10.77698, user_long=106.70098, radius=1.5))
+    far_key, _ = normalize_nearby(LocationByRadiusQuery(user_lat=10.7800, user_long=106.7009, radius=1.5))
+
+    assert key == other_key != far_key
+    # the cell center, and the radius rounded up to its bucket
+    assert (schema.user_lat, schema.user_long) != (10.77691, 106.70091)
+    assert abs(schema.user_lat - 10.77691) < 0.001 and abs(schema.user_long - 106.70091) < 0.001
+    assert schema.radius == 1.5
+
+
+@pytest.mark.parametrize("radius, bucketed", [(0.1, 0.5), (0.5, 0.5), (0.51, 1.0), (10, 10)])
+def test_nearby_radius_is_rounded_up_to_its_bucket(monkeypatch, radius, bucketed):
+    monkeypatch.setattr(configs, "RESULT_CACHE_RADIUS_BUCKET_KM", 0.5)
+
+    _, schema = normalize_nearby(LocationByRadiusQuery(user_lat=10.7769, user_long=106.7009, radius=radius))
+
+    assert schema.radius == bucketed
+
+
+def test_equivalent_searches_share_a_key(monkeypatch):
+    monkeypatch.setattr(configs, "RESULT_CACHE_GEOHASH_PRECISION", 7)
+    monkeypatch.setattr(configs, "RESULT_CACHE_RADIUS_BUCKET_KM", 0.5)
+    open_at = datetime.datetime(2026, 1, 5, 8, 30, 12, tzinfo=pytz.utc)
+
+    key, search, charger_type, amenities = normalize_search(
+        SearchLocation(lat=10.77691, lon=106.70091, radius=1.2, open_at=open_at), False, ["CCS2", "Type 2", "CCS2"], ["wifi", "cafe"]
+    )
+    other_key, *_ = normalize_search(
+        SearchLocation(lat=10.77698, lon=106.70098, radius=1.4, open_at=open_at.replace(second=48)),
+        False,
+        ["Type 2", "CCS2"],
+        ["cafe", "wifi"],
+    )
+    fuzzy_key, *_ = normalize_search(SearchLocation(lat=10.77691, lon=106.70091, radius=1.2, open_at=open_at), True, ["CCS2"], [])
+
+    assert key == other_key != fuzzy_key
+    assert (charger_type, amenities) == (["CCS2", "Type 2"], ["cafe", "wifi"])
+    assert search.radius == 1.5
+    assert search.open_at == open_at.replace(second=0)
+
+
+def test_open_now_searches_are_keyed_by_the_current_minute():
+    key, search, _, _ = normalize_search(SearchLocation(query="vinfast", open_now=True), False, [], [])
+
+    assert not search.open_now
+    assert search.open_at.second == 0 and search.open_at.tzinfo is not None
+    assert normalize_search(SearchLocation(query="vinfast", open_at=search.open_at), False, [], [])[0] == key
@@ -0,0 +1,18 @@
+from starlette.testclient import TestClient
+
+from app.core.config import configs
+from tests.data.city import create_city, get_city_test_data
+
+
+def test_request_reports_database_time(client: TestClient):
+    city = get_city_test_data()[0]
+    rs = create_city(client, city)
+    rs = client.get(f"/api/v1/cities/{rs.json()['id']}")
+    assert rs.headers["Server-Timing"].startswith("db;dur=")
+
+
+def test_request_without_queries_when_logging_every_request(client: TestClient, monkeypatch):
+    monkeypatch.setattr(configs, "DB_SLOW_QUERY_MS", 0)
+    rs = client.get("/")
+    assert rs.status_code == 200
+    assert rs.headers["X-DB-Query-Count"] == "0"
@@ -0,0 +1,82 @@
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.core.elastic_sync import ElasticSyncDispatcher
+from app.repository.location_sync_outbox_repository import LOCATIONS_DIRTY
+
+TIMEOUT = 5
+
+
+class FlakySync:
+    """``sync`` failing ``failures`` times before it succeeds."""
+
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.calls = 0
+        self.done = threading.Event()
+
+    def __call__(self) -> int:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("Elasticsearch is unavailable")
+        self.done.set()
+        return 1
+
+
+def dispatcher(sync, interval=60) -> ElasticSyncDispatcher:
+    return ElasticSyncDispatcher(sync, interval=interval, debounce=0, initial_backoff=0.01, max_backoff=0.02)
+
+
+def test_commit_queuing_locations_wakes_the_dispatcher():
+    sync = FlakySync()
+    elastic_sync = dispatcher(sync)
+    elastic_sync.start()
+    try:
+        session = Session()
+        session.info[LOCATIONS_DIRTY] = True
+        session.commit()
+        assert sync.done.wait(TIMEOUT)
+    finally:
+        elastic_sync.stop(TIMEOUT)
+
+
+def test_failed_sync_is_retried_with_backoff():
+    sync = FlakySync(failures=2)
+    elastic_sync = dispatcher(sync)
+    elastic_sync.start()
+    try:
+        elastic_sync.notify()
+        assert sync.done.wait(TIMEOUT)
+        assert sync.calls == 3
+    finally:
+        elastic_sync.stop(TIMEOUT)
+
+
+def test_dispatcher_polls_without_notifications():
+    sync = FlakySync()
+    elastic_sync = dispatcher(sync, interval=0.01)
+    elastic_sync.start()
+    try:
+        assert sync.done.wait(TIMEOUT)
+    finally:
+        elastic_sync.stop(TIMEOUT)
+
+
+def test_stop_ends_the_retries_and_stops_listening():
+    sync = FlakySync(failures=1000)
+    elastic_sync = dispatcher(sync)
+    elastic_sync.start()
+    elastic_sync.notify()
+    elastic_sync.stop(TIMEOUT)
+    calls = sync.calls
+
+    session = Session()
+    session.info[LOCATIONS_DIRTY] = True
+    session.commit()
+    assert not sync.done.wait(0.1)
+    assert sync.calls == calls
+
+
+def test_stop_without_start_is_a_no_op():
+    dispatcher(FlakySync()).stop(TIMEOUT)
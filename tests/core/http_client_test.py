@@ -0,0 +1,114 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import http_client
+from app.core.config import configs
+from app.core.http_client import AsyncHttpClient, HttpClient
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    delays = []
+
+    async def async_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(http_client.time, "sleep", delays.append)
+    monkeypatch.setattr(http_client.asyncio, "sleep", async_sleep)
+    monkeypatch.setattr(configs, "HTTP_MAX_RETRIES", 3)
+    monkeypatch.setattr(configs, "HTTP_BACKOFF_FACTOR", 0.5)
+    monkeypatch.setattr(configs, "HTTP_MAX_BACKOFF_SECONDS", 10)
+    return delays
+
+
+def replies(*responses):
+    """Transport handler answering with ``responses`` in turn, an exception is raised instead."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        response = responses[len(requests) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return handler, requests
+
+
+def test_get_is_retried_with_exponential_backoff(delays):
+    handler, requests = replies(
+        httpx.Response(503), httpx.ConnectError("refused"), httpx.Response(502), httpx.Response(200, json={"ok": True})
+    )
+    client = HttpClient(transport=httpx.MockTransport(handler))
+
+    assert client.get_json("https://example.com") == {"ok": True}
+    assert len(requests) == 4
+    assert delays == [0.5, 1.0, 2.0]
+
+
+def test_retry_after_header_is_honored(delays):
+    handler, _ = replies(httpx.Response(429, headers={"Retry-After": "3"}), httpx.Response(200))
+    client = HttpClient(transport=httpx.MockTransport(handler))
+
+    client.get("https://example.com")
+    assert delays == [3.0]
+
+
+def test_last_error_is_raised_once_retries_are_exhausted(delays):
+    handler, requests = replies(*[httpx.Response(500)] * 4)
+    client = HttpClient(transport=httpx.MockTransport(handler))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        client.get("https://example.com")
+    assert len(requests) == 4
+
+
+def test_post_is_not_retried(delays):
+    handler, requests = replies(httpx.Response(503), httpx.Response(200))
+    client = HttpClient(transport=httpx.MockTransport(handler))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        client.post("https://example.com/token", data={"nonce": "1"})
+    assert len(requests) == 1
+
+    handler, requests = replies(httpx.ConnectError("refused"))
+    client = HttpClient(transport=httpx.MockTransport(handler))
+    with pytest.raises(httpx.ConnectError):
+        client.post("https://example.com/token")
+    assert len(requests) == 1
+    assert delays == []
+
+
+def test_post_is_retried_when_the_caller_opts_in(delays):
+    handler, requests = replies(httpx.Response(503), httpx.Response(201))
+    client = HttpClient(transport=httpx.MockTransport(handler))
+
+    assert client.post("https://example.com", retry=True).status_code == 201
+    assert len(requests) == 2
+
+
+def test_get_is_not_retried_when_the_caller_opts_out(delays):
+    handler, requests = replies(httpx.Response(503), httpx.Response(200))
+    client = HttpClient(transport=httpx.MockTransport(handler))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        client.get("https://example.com", retry=False)
+    assert len(requests) == 1
+
+
+def test_async_client_retries_idempotent_requests_only(delays):
+    async def run():
+        handler, get_requests = replies(httpx.Response(504), httpx.Response(200, json=[1]))
+        client = AsyncHttpClient(transport=httpx.MockTransport(handler))
+        assert await client.get_json("https://example.com") == [1]
+
+        handler, post_requests = replies(httpx.Response(504), httpx.Response(200))
+        client = AsyncHttpClient(transport=httpx.MockTransport(handler))
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.post("https://example.com")
+        return len(get_requests), len(post_requests)
+
+    assert asyncio.run(run()) == (2, 1)
+    assert delays == [0.5]
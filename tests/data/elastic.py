@@ -0,0 +1,21 @@
+import uuid
+
+from app.util.elastic_query_builder import LOCATION_RESPONSE_SOURCE
+
+
+def get_location_source(name: str, latitude: float = 10.7769, longitude: float = 106.7009, **fields) -> dict:
+    """``_source`` of a location document, limited to the fields searches read."""
+    source = {
+        "id": str(uuid.uuid4()),
+        "here_id": name,
+        "external_id": name,
+        "location_name": name,
+        "city": "Ho Chi Minh City",
+        "country": "Vietnam",
+        "latitude": latitude,
+        "longitude": longitude,
+        "timezone": "Asia/Ho_Chi_Minh",
+        "opening_hours": [],
+        **fields,
+    }
+    return {key: value for key, value in source.items() if key in LOCATION_RESPONSE_SOURCE}
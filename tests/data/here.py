@@ -0,0 +1,54 @@
+# HERE connector types of the test items, ``typeId`` -> connector detail
+CONNECTOR_TYPES = {
+    "33": {"name": "IEC 62196-3 Type 2 Combo (CCS2)", "voltsRange": "400-500V DC", "ampsRange": "125A", "maxPowerLevel": 50},
+    "30": {"name": "IEC 62196-2 Type 2 (Mennekes)", "voltsRange": "230V", "ampsRange": "32A", "maxPowerLevel": 7.4},
+    # no voltage nor amperage, the connector does not validate
+    "99": {"name": "Unknown", "voltsRange": "", "ampsRange": "", "maxPowerLevel": 11},
+}
+
+
+def get_here_item(id: str, evses: dict[str, list[tuple[str, str]]] | None = None, title: str = "HERE station") -> dict:
+    """A HERE browse item with ``evses`` as ``{evse id: [(connector id, typeId)]}``."""
+    if evses is None:
+        evses = {f"{id}-evse-1": [(f"{id}-port-1", "33"), (f"{id}-port-2", "30")]}
+    type_ids = {type_id for connectors in evses.values() for _, type_id in connectors}
+    return {
+        "id": id,
+        "title": title,
+        "address": {"label": f"{title}, Ho Chi Minh City", "street": "Nguyen Hue", "city": "Ho Chi Minh City", "countryName": "Vietnam"},
+        "position": {"lat": 10.7769, "lng": 106.7009},
+        "extended": {
+            "evStation": {
+                "totalNumberOfConnectors": sum(len(connectors) for connectors in evses.values()),
+                "connectors": [
+                    {
+                        "supplierName": "VinFast",
+                        "connectorType": {"id": type_id, "name": CONNECTOR_TYPES[type_id]["name"]},
+                        "fixedCable": True,
+                        "maxPowerLevel": CONNECTOR_TYPES[type_id]["maxPowerLevel"],
+                        "chargingPoint": {
+                            "voltsRange": CONNECTOR_TYPES[type_id]["voltsRange"],
+                            "ampsRange": CONNECTOR_TYPES[type_id]["ampsRange"],
+                        },
+                    }
+                    for type_id in sorted(type_ids)
+                ],
+            },
+            "evAvailability": {
+                "stations": [
+                    {
+                        "id": f"{id}-station",
+                        "evses": [
+                            {
+                                "id": evse_id,
+                                "state": "AVAILABLE",
+                                "last_updated": "2026-01-01T00:00:00Z",
+                                "connectors": [{"id": port_id, "typeId": type_id} for port_id, type_id in connectors],
+                            }
+                            for evse_id, connectors in evses.items()
+                        ],
+                    }
+                ]
+            },
+        },
+    }
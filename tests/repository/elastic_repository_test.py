@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from app.repository.elastic_repository import (
+    AsyncElasticsearchRepository,
+    ElasticsearchRepository,
+)
+from app.schema.location_schema import SearchLocation
+from tests.data.elastic import get_location_source
+
+
+class FakeElasticsearch:
+    """Pages ``sources`` in order through points in time, each search refreshes the point in time id."""
+
+    def __init__(self, sources: list[dict]) -> None:
+        self.sources = sources
+        self.opened = 0
+        self.open_pits: set[str] = set()
+        self.closed: list[str] = []
+
+    def open_point_in_time(self, index, keep_alive):
+        self.opened += 1
+        pit_id = f"pit-{self.opened}"
+        self.open_pits.add(pit_id)
+        return {"id": pit_id}
+
+    def search_template(self, index, id, params, filter_path):
+        pit_id = params["pit"]["id"]
+        assert pit_id in self.open_pits
+        start = params["search_after"][0] + 1 if params["has_search_after"] else 0
+        page = self.sources[start : start + params["size"]]
+        # Elasticsearch may hand out a new id for the same point in time
+        refreshed = pit_id + "+"
+        self.open_pits.add(refreshed)
+        response = {"pit_id": refreshed}
+        if page:
+            response["hits"] = {"hits": [{"_source": dict(source), "sort": [start + i]} for i, source in enumerate(page)]}
+        return response
+
+    def close_point_in_time(self, id):
+        self.closed.append(id)
+        self.open_pits = {pit_id for pit_id in self.open_pits if pit_id.split("+")[0] != id.split("+")[0]}
+
+
+class AsyncFakeElasticsearch(FakeElasticsearch):
+    async def open_point_in_time(self, index, keep_alive):
+        return super().open_point_in_time(index, keep_alive)
+
+    async def search_template(self, index, id, params, filter_path):
+        return super().search_template(index, id, params, filter_path)
+
+    async def close_point_in_time(self, id):
+        return super().close_point_in_time(id)
+
+
+@pytest.fixture
+def sources():
+    return [get_location_source(f"location-{i}") for i in range(5)]
+
+
+def read_all_pages(search_location, page_size):
+    names, cursor, pages = [], None, 0
+    while True:
+        page = search_location(SearchLocation(page_size=page_size, cursor=cursor))
+        pages += 1
+        names += [location.location_name for location in page.founds]
+        cursor = page.next_cursor
+        if cursor is None:
+            return names, pages
+
+
+def test_paged_search_reads_every_location_once_and_closes_its_point_in_time(sources):
+    es_client = FakeElasticsearch(sources)
+    repository = ElasticsearchRepository(es_client)
+
+    names, pages = read_all_pages(repository.search_location, 2)
+
+    assert names == [source["location_name"] for source in sources]
+    assert pages == 3
+    assert es_client.opened == 1
+    assert es_client.closed == ["pit-1+++"]
+    assert es_client.open_pits == set()
+
+
+def test_point_in_time_stays_open_while_pages_are_left(sources):
+    es_client = FakeElasticsearch(sources)
+    repository = ElasticsearchRepository(es_client)
+
+    page = repository.search_location(SearchLocation(page_size=2))
+
+    assert page.next_cursor is not None
+    assert es_client.closed == []
+
+
+def test_single_page_search_closes_its_point_in_time(sources):
+    es_client = FakeElasticsearch(sources)
+    repository = ElasticsearchRepository(es_client)
+
+    page = repository.search_location(SearchLocation(page_size=10))
+
+    assert len(page.founds) == 5 and page.next_cursor is None
+    assert es_client.closed == ["pit-1+"]
+
+
+def test_query_searches_do_not_open_a_point_in_time(sources, monkeypatch):
+    es_client = FakeElasticsearch(sources)
+    repository = ElasticsearchRepository(es_client)
+    monkeypatch.setattr(es_client, "search_template", lambda **request: {"hits": {"hits": [{"_source": sources[0]}]}})
+
+    page = repository.search_location(SearchLocation(query="location"))
+
+    assert len(page.founds) == 1
+    assert es_client.opened == 0 and es_client.closed == []
+
+
+def test_async_paged_search_closes_its_point_in_time(sources):
+    es_client = AsyncFakeElasticsearch(sources)
+    repository = AsyncElasticsearchRepository(es_client)
+
+    async def run():
+        names, cursor = [], None
+        while True:
+            page = await repository.search_location(SearchLocation(page_size=2, cursor=cursor))
+            names += [location.location_name for location in page.founds]
+            if (cursor := page.next_cursor) is None:
+                return names
+
+    assert asyncio.run(run()) == [source["location_name"] for source in sources]
+    assert es_client.closed == ["pit-1+++"]
+    assert es_client.open_pits == set()
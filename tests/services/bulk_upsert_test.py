@@ -0,0 +1,96 @@
+from sqlalchemy import select, update
+
+from app.constant.enum.ingestion import IngestionStatusEnum
+from app.model.ev_charger import EVCharger
+from app.model.ev_charger_port import EVChargerPort
+from app.model.location import Location
+from app.model.power_plug_type import PowerPlugType
+from server.services.ev_data.bulk_upsert import upsert_here_page
+from tests.data.here import get_here_item
+
+
+def upsert(container, *items):
+    return upsert_here_page(container.location_service(), {"items": list(items)})
+
+
+def test_reingest_keeps_values_here_does_not_provide(client, container):
+    result = upsert(container, get_here_item("here-1"))[0]
+    with container.db().session() as session:
+        session.execute(update(Location).filter(Location.id == result.location_id).values(pricing="0.5 USD/kWh", parking_level="B2"))
+        session.commit()
+
+    result = upsert(container, get_here_item("here-1", title="Renamed station"))[0]
+    assert result.status == IngestionStatusEnum.UPDATED
+    with container.db().session() as session:
+        location = session.scalars(select(Location).filter(Location.id == result.location_id)).one()
+        assert location.location_name == "Renamed station"
+        assert location.pricing == "0.5 USD/kWh"
+        assert location.parking_level == "B2"
+
+
+def ports_by_here_id(container, location_id):
+    with container.db().session() as session:
+        rows = session.execute(
+            select(EVChargerPort.here_id, EVChargerPort.is_deleted).join(EVCharger).filter(EVCharger.location_id == location_id)
+        ).all()
+        return dict(rows)
+
+
+def test_reingest_soft_deletes_ports_and_chargers_missing_from_here(client, container):
+    item = get_here_item("here-1", {"evse-1": [("port-1", "33"), ("port-2", "30")], "evse-2": [("port-3", "33")]})
+    location_id = upsert(container, item)[0].location_id
+
+    upsert(container, get_here_item("here-1", {"evse-1": [("port-1", "33")]}))
+
+    assert ports_by_here_id(container, location_id) == {"port-1": False, "port-2": True, "port-3": True}
+    with container.db().session() as session:
+        chargers = dict(session.execute(select(EVCharger.here_id, EVCharger.is_deleted).filter(EVCharger.location_id == location_id)).all())
+    assert chargers == {"evse-1": False, "evse-2": True}
+
+
+def test_reingest_keeps_ports_when_none_could_be_parsed(client, container):
+    location_id = upsert(container, get_here_item("here-1", {"evse-1": [("port-1", "33")]}))[0].location_id
+
+    # the connector has no voltage nor amperage, no valid port is left for the charger
+    upsert(container, get_here_item("here-1", {"evse-1": [("port-1", "99")]}))
+
+    assert ports_by_here_id(container, location_id) == {"port-1": False}
+
+
+def test_upsert_reports_inserted_then_updated_locations(client, container):
+    item = get_here_item("here-1", {"evse-1": [("port-1", "33")], "evse-2": [("port-2", "30")]})
+
+    inserted = upsert(container, item)[0]
+    updated = upsert(container, item)[0]
+
+    assert inserted.status == IngestionStatusEnum.INSERTED
+    assert inserted.ev_charger_count == 2
+    assert updated.status == IngestionStatusEnum.UPDATED
+    assert updated.location_id == inserted.location_id
+
+
+def test_upsert_reuses_stored_power_plug_types(client, container):
+    plug_type = PowerPlugType(power_model="DC", plug_type="IEC 62196-3 Type 2 Combo (CCS2)", plug_type_id="33", fixed_plug=True)
+    with container.db().session() as session:
+        session.add(plug_type)
+        session.commit()
+        plug_type_id = plug_type.id
+
+    upsert(container, get_here_item("here-1", {"evse-1": [("port-1", "33")]}))
+
+    with container.db().session() as session:
+        assert session.scalars(select(PowerPlugType.id).filter(PowerPlugType.power_model == "DC")).all() == [plug_type_id]
+        assert session.scalars(select(EVChargerPort.power_plug_type_id).filter(EVChargerPort.here_id == "port-1")).one() == plug_type_id
+
+
+def test_failed_page_falls_back_to_one_location_at_a_time(client, container):
+    # the port id does not fit its column, the page transaction fails in the database
+    bad_item = get_here_item("here-2", {"evse-2": [("port" * 100, "33")]})
+
+    good, bad = upsert(container, get_here_item("here-1"), bad_item)
+
+    assert good.status == IngestionStatusEnum.INSERTED
+    assert bad.status == IngestionStatusEnum.FAILED
+    assert bad.detail
+    with container.db().session() as session:
+        assert session.scalars(select(Location.here_id)).all() == ["here-1-station"]
@@ -0,0 +1,52 @@
+import pytest
+
+from server.services.ev_data.fingerprint_store import FingerprintStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite3"), max_age_seconds=3600)
+    yield store
+    store.close()
+
+
+def test_new_items_are_changed(store):
+    items = [{"id": "here-1", "title": "A"}, {"id": "here-2", "title": "B"}]
+
+    assert store.filter_changed(items) == items
+
+
+def test_recorded_items_are_unchanged(store):
+    item = {"id": "here-1", "title": "A", "distance": 120}
+    store.record([item])
+
+    # the distance depends on the query, not on the station
+    assert store.filter_changed([{**item, "distance": 4500}]) == []
+
+
+def test_items_with_a_new_content_are_changed(store):
+    store.record([{"id": "here-1", "title": "A"}, {"id": "here-2", "title": "B"}])
+    changed = {"id": "here-2", "title": "B renamed"}
+
+    assert store.filter_changed([{"id": "here-1", "title": "A"}, changed]) == [changed]
+
+
+def test_items_older_than_the_max_age_are_changed(tmp_path):
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite3"), max_age_seconds=-1)
+    item = {"id": "here-1", "title": "A"}
+    store.record([item])
+
+    assert store.filter_changed([item]) == [item]
+    store.close()
+
+
+def test_fingerprints_survive_a_restart(tmp_path):
+    path = str(tmp_path / "fingerprints.sqlite3")
+    item = {"id": "here-1", "title": "A"}
+    store = FingerprintStore(path, max_age_seconds=3600)
+    store.record([item])
+    store.close()
+
+    store = FingerprintStore(path, max_age_seconds=3600)
+    assert store.filter_changed([item]) == []
+    store.close()
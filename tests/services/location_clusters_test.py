@@ -0,0 +1,106 @@
+import math
+
+import pytest
+
+from app.repository.elastic_repository import ElasticsearchRepository
+from app.schema.location_schema import LocationClusterQuery
+from app.services.location_service import LocationService
+from tests.data.elastic import get_location_source
+
+
+def geotile(lat: float, lon: float, precision: int) -> str:
+    tiles = 2**precision
+    x = int((lon + 180) / 360 * tiles)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * tiles)
+    return f"{precision}/{min(x, tiles - 1)}/{min(y, tiles - 1)}"
+
+
+class FakeElasticsearch:
+    """Answers cluster searches: ``geo_bounding_box`` filter and the ``geotile_grid`` aggregation."""
+
+    def __init__(self, sources: list[dict]) -> None:
+        self.sources = sources
+        self.requests = []
+
+    def search_template(self, index, id, params, filter_path):
+        self.requests.append(params)
+        assert params["size"] == 0
+        box = params["bounding_box"]
+        grid = params["aggs"]["clusters"]["geotile_grid"]
+        assert grid["bounds"] == box
+        tiles: dict[str, list[dict]] = {}
+        for source in self.sources:
+            if (
+                box["bottom_right"]["lat"] <= source["latitude"] <= box["top_left"]["lat"]
+                and box["top_left"]["lon"] <= source["longitude"] <= box["bottom_right"]["lon"]
+            ):
+                tiles.setdefault(geotile(source["latitude"], source["longitude"], grid["precision"]), []).append(source)
+        buckets = [
+            {
+                "key": key,
+                "doc_count": len(sources),
+                "centroid": {
+                    "location": {
+                        "lat": sum(source["latitude"] for source in sources) / len(sources),
+                        "lon": sum(source["longitude"] for source in sources) / len(sources),
+                    }
+                },
+                "station_count": {"value": float(sum(source["station_count"] for source in sources))},
+                "max_power_output": {"value": max(source["max_power_output"] for source in sources)},
+            }
+            for key, sources in tiles.items()
+        ]
+        buckets.sort(key=lambda bucket: -bucket["doc_count"])
+        return {"aggregations": {"clusters": {"buckets": buckets}}} if buckets else {}
+
+
+def location(name: str, lat: float, lon: float, station_count: int, max_power_output: float) -> dict:
+    return {**get_location_source(name, lat, lon), "station_count": station_count, "max_power_output": max_power_output}
+
+
+@pytest.fixture
+def es_client():
+    return FakeElasticsearch(
+        [
+            # a few hundred meters apart in District 1
+            location("d1-a", 10.7769, 106.7009, 4, 50),
+            location("d1-b", 10.7772, 106.7012, 2, 150),
+            location("d1-c", 10.7766, 106.7006, 1, 22),
+            # Thu Duc, ~15 km away
+            location("td-a", 10.8500, 106.7700, 6, 60),
+            location("td-b", 10.8503, 106.7703, 2, 11),
+            # Hanoi, outside the box
+            location("hanoi", 21.0285, 105.8542, 10, 350),
+        ]
+    )
+
+
+def test_clusters_count_the_locations_of_the_box_per_tile(es_client):
+    location_service = LocationService(None, ElasticsearchRepository(es_client), None, None, None)
+
+    clusters = location_service.get_clusters(
+        LocationClusterQuery(min_lat=10.6, min_lon=106.5, max_lat=11.0, max_lon=107.0, zoom=10), [], []
+    )
+
+    assert [(cluster.count, cluster.station_count, cluster.max_power_output) for cluster in clusters] == [(3, 7, 150), (2, 8, 60)]
+    assert all(cluster.key.startswith("13/") for cluster in clusters)
+    assert clusters[0].latitude == pytest.approx(10.7769) and clusters[0].longitude == pytest.approx(106.7009)
+    assert clusters[1].latitude == pytest.approx(10.85015) and clusters[1].longitude == pytest.approx(106.77015)
+
+
+def test_clusters_split_with_the_zoom(es_client):
+    location_service = LocationService(None, ElasticsearchRepository(es_client), None, None, None)
+
+    far = location_service.get_clusters(LocationClusterQuery(min_lat=8, min_lon=102, max_lat=23, max_lon=110, zoom=3), [], [])
+    close = location_service.get_clusters(LocationClusterQuery(min_lat=10.6, min_lon=106.5, max_lat=11.0, max_lon=107.0, zoom=20), [], [])
+
+    # Ho Chi Minh City and Hanoi apart, then every location on its own
+    assert sorted(cluster.count for cluster in far) == [1, 5]
+    assert sorted(cluster.count for cluster in close) == [1] * 5
+    assert es_client.requests[-1]["aggs"]["clusters"]["geotile_grid"]["precision"] == 23
+
+
+def test_empty_box_has_no_clusters(es_client):
+    location_service = LocationService(None, ElasticsearchRepository(es_client), None, None, None)
+
+    assert location_service.get_clusters(LocationClusterQuery(min_lat=-10, min_lon=-10, max_lat=-5, max_lon=-5, zoom=8), [], []) == []
@@ -0,0 +1,114 @@
+import httpx
+import pytest
+from fastapi import HTTPException
+from shapely.geometry import Point, Polygon
+
+from app.core.cache import ResultCache
+from app.core.http_client import HttpClient
+from app.repository.elastic_repository import ElasticsearchRepository
+from app.schema.gg_map_schema import DirectionRequest
+from app.services.gg_map_service import GGMapService
+from app.services.location_service import LocationService
+from tests.api.gg_map_test import DIRECTION_PARAMS, DIRECTIONS
+from tests.data.elastic import get_location_source
+
+
+class FakeElasticsearch:
+    """Answers the route corridor search through a point in polygon test and the search of locations by ids."""
+
+    def __init__(self, sources: list[dict]) -> None:
+        self.sources = sources
+
+    def search(self, index, body, filter_path):
+        query = body["query"]["bool"]["filter"]
+        if "geo_shape" in query:
+            (ring,) = query["geo_shape"]["location"]["shape"]["coordinates"]
+            corridor = Polygon(ring)
+            hits = [
+                {"_source": {key: source[key] for key in body["_source"]}}
+                for source in self.sources
+                if corridor.contains(Point(source["longitude"], source["latitude"]))
+            ]
+        else:
+            ids = query["terms"]["id"]
+            # hits come back in index order, not in the order of the ids
+            hits = [{"_source": dict(source)} for source in self.sources if source["id"] in ids]
+        return {"hits": {"hits": hits}} if hits else {}
+
+
+def along(fraction: float, offset: float = 0) -> tuple[float, float]:
+    """Point ``fraction`` of the way between the first and last route points, ``offset`` degrees north of it."""
+    (start_lat, start_long), (end_lat, end_long) = (10.79619, 106.63332), (10.80172, 106.65412)
+    return start_lat + (end_lat - start_lat) * fraction + offset, start_long + (end_long - start_long) * fraction
+
+
+@pytest.fixture
+def sources():
+    # stored out of route order
+    return [
+        get_location_source("third", *along(0.6)),
+        get_location_source("first", *along(0.1)),
+        get_location_source("off-route", *along(0.5, offset=0.05)),
+        get_location_source("second", *along(0.3, offset=0.002)),
+    ]
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def directions():
+    return DIRECTIONS
+
+
+@pytest.fixture
+def location_service(sources, calls, directions):
+    def google(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=directions)
+
+    gg_map_service = GGMapService(HttpClient(transport=httpx.MockTransport(google)), ResultCache(ttl=60, max_size=10))
+    return LocationService(None, ElasticsearchRepository(FakeElasticsearch(sources)), gg_map_service, None, None)
+
+
+def test_route_locations_are_ordered_along_the_route(location_service):
+    route = location_service.get_location_by_direction(DirectionRequest(**DIRECTION_PARAMS))
+
+    assert [location.location_name for location in route.locations] == ["first", "second", "third"]
+    distances = [location.distance_along_route for location in route.locations]
+    assert distances == sorted(distances) and distances[0] > 0
+    assert route.locations[1].detour_distance > route.locations[0].detour_distance
+    assert route.total_locations == 3
+    assert route.next_page is None
+    assert route.overview_polyline == DIRECTIONS["routes"][0]["overview_polyline"]["points"]
+
+
+def test_route_locations_are_paged_in_route_order(location_service, calls):
+    first = location_service.get_location_by_direction(DirectionRequest(**DIRECTION_PARAMS, page_size=2))
+    second = location_service.get_location_by_direction(DirectionRequest(**DIRECTION_PARAMS, page_size=2, page=first.next_page))
+
+    assert [location.location_name for location in first.locations] == ["first", "second"]
+    assert [location.location_name for location in second.locations] == ["third"]
+    assert (first.total_locations, first.next_page) == (3, 2)
+    assert (second.total_locations, second.next_page) == (3, None)
+    # the route and its corridor are cached across the pages
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("directions", [{"status": "REQUEST_DENIED", "error_message": "The provided API key is invalid.", "routes": []}])
+def test_route_errors_are_not_cached(location_service, calls):
+    for _ in range(2):
+        with pytest.raises(HTTPException, match="The provided API key is invalid."):
+            location_service.get_location_by_direction(DirectionRequest(**DIRECTION_PARAMS))
+
+    assert len(calls) == 2
+    assert len(location_service.gg_map_service.directions_cache) == 0
+
+
+@pytest.mark.parametrize("directions", [{"status": "ZERO_RESULTS", "routes": []}])
+def test_route_without_route_has_no_locations(location_service, calls):
+    route = location_service.get_location_by_direction(DirectionRequest(**DIRECTION_PARAMS))
+
+    assert (route.locations, route.total_locations, route.overview_polyline) == ([], 0, None)
@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import select
+
+from app.core.config import configs
+from app.model.location import Location
+from server.services.ev_data.bulk_upsert import upsert_here_page
+from tests.data.here import get_here_item
+
+
+@pytest.fixture
+def no_elastic_sync(monkeypatch):
+    # the background dispatcher would claim the queued rows under the test
+    monkeypatch.setattr(configs, "ES_SYNC_INTERVAL_SECONDS", 0)
+
+
+def create_locations(container, *here_ids) -> list[str]:
+    results = upsert_here_page(container.location_service(), {"items": [get_here_item(here_id) for here_id in here_ids]})
+    return [str(result.location_id) for result in results]
+
+
+def version(container, location_id) -> int:
+    with container.db().session() as session:
+        return session.scalars(select(Location.version).filter(Location.id == location_id)).one()
+
+
+def test_mark_dirty_bumps_the_version_and_queues_the_location(no_elastic_sync, client, container):
+    repository = container.location_repository()
+    [location_id] = create_locations(container, "here-1")
+    repository.claim_dirty_location_ids(100)
+    before = version(container, location_id)
+
+    repository.mark_dirty([location_id, location_id])
+
+    assert version(container, location_id) == before + 1
+    assert repository.claim_dirty_location_ids(100) == [location_id]
+    assert repository.claim_dirty_location_ids(100) == []
+
+
+def test_claim_returns_distinct_locations_oldest_first(no_elastic_sync, client, container):
+    repository = container.location_repository()
+    first, second = create_locations(container, "here-1", "here-2")
+    repository.claim_dirty_location_ids(100)
+
+    repository.mark_dirty([first])
+    repository.mark_dirty([second])
+    repository.mark_dirty([first])
+
+    assert repository.claim_dirty_location_ids(2) == [first, second]
+    assert repository.claim_dirty_location_ids(2) == [first]
+
+
+def test_failed_sync_queues_the_locations_again(no_elastic_sync, client, container, monkeypatch):
+    location_service = container.location_service()
+    repository = container.location_repository()
+    [location_id] = create_locations(container, "here-1")
+    repository.claim_dirty_location_ids(100)
+    repository.mark_dirty([location_id])
+
+    def unavailable(index_name, actions):
+        raise RuntimeError("Elasticsearch is unavailable")
+
+    monkeypatch.setattr(location_service.es_repository, "sync_documents", unavailable)
+    with pytest.raises(RuntimeError):
+        location_service.sync_dirty_locations()
+
+    assert repository.claim_dirty_location_ids(100) == [location_id]
+
+
+def test_stale_documents_are_rejected_by_their_external_version(no_elastic_sync, client, container, test_name):
+    es_repository = container.es_repository()
+    index_name = test_name.lower()
+    es_repository.es_client.options(ignore_status=404).indices.delete(index=index_name)
+    try:
+        es_repository.sync_documents(
+            index_name, [{"_index": index_name, "_id": "1", "_source": {"location_name": "new"}, "version": 3, "version_type": "external"}]
+        )
+        # a rebuild read before the last change, replayed late
+        es_repository.sync_documents(
+            index_name, [{"_index": index_name, "_id": "1", "_source": {"location_name": "old"}, "version": 2, "version_type": "external"}]
+        )
+
+        document = es_repository.es_client.get(index=index_name, id="1")
+        assert document["_version"] == 3
+        assert document["_source"]["location_name"] == "new"
+    finally:
+        es_repository.es_client.options(ignore_status=404).indices.delete(index=index_name)
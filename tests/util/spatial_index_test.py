@@ -0,0 +1,164 @@
+import datetime
+import math
+import uuid
+
+import pytest
+
+from app.repository.elastic_repository import ElasticsearchRepository
+from app.schema.location_schema import (
+    LocationByRadiusQuery,
+    LocationResponseWithoutEVChargers,
+)
+from app.schema.working_day_schema import WorkingDayResponse
+from app.services.location_service import LocationService, spatial_index_entry
+from app.util.spatial_index import SpatialIndex
+from app.util.working_hours import location_timezone, opening_ranges
+
+HO_CHI_MINH_CITY = (10.7769, 106.7009)
+# ~111 km per degree of latitude
+KM_PER_DEGREE_LAT = 111.195
+
+
+def make_location(name: str, lat: float, lon: float, open_all_week: bool = False) -> LocationResponseWithoutEVChargers:
+    working_days = []
+    if open_all_week:
+        working_days = [WorkingDayResponse(day=day, open_time=datetime.time(0, 0), close_time=datetime.time(23, 59)) for day in range(1, 8)]
+    return LocationResponseWithoutEVChargers(
+        id=uuid.uuid4(),
+        here_id=name,
+        external_id=name,
+        location_name=name,
+        city="Ho Chi Minh City",
+        country="Vietnam",
+        latitude=lat,
+        longitude=lon,
+        working_days=working_days,
+    )
+
+
+def north_of(lat: float, lon: float, km: float) -> tuple[float, float]:
+    return lat + km / KM_PER_DEGREE_LAT, lon
+
+
+def ids(results) -> list[str]:
+    return [result.location_name for result in results]
+
+
+class FakeElasticsearch:
+    """Answers the nearby query: ``geo_distance`` filter, ``_geo_distance`` sort in km and ``size``."""
+
+    def __init__(self, locations: list[LocationResponseWithoutEVChargers]) -> None:
+        self.sources = [
+            {
+                **location.model_dump(mode="json", exclude={"working_days", "location_amenities"}),
+                "timezone": location_timezone(location),
+                "opening_hours": opening_ranges(location.working_days),
+            }
+            for location in locations
+        ]
+        self.requests = []
+
+    @staticmethod
+    def _distance_km(origin: dict, source: dict) -> float:
+        lat1, lon1, lat2, lon2 = map(math.radians, (origin["lat"], origin["lon"], source["latitude"], source["longitude"]))
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        return 2 * 6371.0088 * math.asin(math.sqrt(a))
+
+    def search(self, index, body, filter_path):
+        self.requests.append(body)
+        geo_distance = body["query"]["bool"]["filter"]["geo_distance"]
+        radius_km = float(geo_distance["distance"].removesuffix("km"))
+        origin = body["sort"][0]["_geo_distance"]["location"]
+        hits = []
+        for source in self.sources:
+            distance = self._distance_km(origin, source)
+            if distance <= radius_km:
+                hits.append({"_source": {key: source[key] for key in body["_source"] if key in source}, "sort": [distance]})
+        hits.sort(key=lambda hit: hit["sort"][0])
+        return {"hits": {"hits": hits[: body["size"]]}} if hits else {}
+
+
+@pytest.fixture
+def locations():
+    return [
+        make_location("center", *HO_CHI_MINH_CITY, open_all_week=True),
+        make_location("2km", *north_of(*HO_CHI_MINH_CITY, 2)),
+        make_location("8km", *north_of(*HO_CHI_MINH_CITY, 8)),
+        make_location("12km", *north_of(*HO_CHI_MINH_CITY, 12)),
+        make_location("hanoi", 21.0285, 105.8542),
+    ]
+
+
+def loaded_index(locations) -> SpatialIndex:
+    spatial_index = SpatialIndex()
+    spatial_index.load(spatial_index_entry(location) for location in locations)
+    return spatial_index
+
+
+def test_within_returns_the_points_in_the_radius_nearest_first(locations):
+    spatial_index = loaded_index(locations)
+
+    matches = spatial_index.within(*HO_CHI_MINH_CITY, 10)
+
+    assert [payload[0].location_name for payload, _ in matches] == ["center", "2km", "8km"]
+    assert [round(distance, 1) for _, distance in matches] == [0.0, 2.0, 8.0]
+
+
+def test_within_misses_points_outside_the_radius(locations):
+    spatial_index = loaded_index(locations)
+
+    assert spatial_index.within(*north_of(*HO_CHI_MINH_CITY, -50), 10) == []
+    assert len(spatial_index.within(*HO_CHI_MINH_CITY, 10, limit=2)) == 2
+
+
+def test_points_across_cell_and_antimeridian_borders_are_found():
+    spatial_index = SpatialIndex(cell_degrees=0.1)
+    spatial_index.load([("east", 0.0, 179.99, "east"), ("west", 0.0, -179.99, "west"), ("far", 0.0, 170.0, "far")])
+
+    assert [payload for payload, _ in spatial_index.within(0.0, 179.999, 5)] == ["east", "west"]
+
+
+def test_upsert_and_remove_refresh_the_index(locations):
+    spatial_index = loaded_index(locations)
+    moved = locations[3].model_copy(update={"latitude": HO_CHI_MINH_CITY[0], "longitude": HO_CHI_MINH_CITY[1] + 0.01})
+
+    spatial_index.upsert(*spatial_index_entry(moved))
+    spatial_index.remove(str(locations[1].id))
+
+    assert [payload[0].location_name for payload, _ in spatial_index.within(*HO_CHI_MINH_CITY, 10)] == ["center", "12km", "8km"]
+    assert len(spatial_index) == len(locations) - 1
+
+
+def test_load_replaces_the_whole_index(locations):
+    spatial_index = loaded_index(locations)
+
+    spatial_index.load([spatial_index_entry(locations[-1])])
+
+    assert spatial_index.within(*HO_CHI_MINH_CITY, 50) == []
+    assert len(spatial_index) == 1
+
+
+def test_nearest_widens_the_search_until_k_points_are_found(locations):
+    spatial_index = loaded_index(locations)
+
+    matches = spatial_index.nearest(*HO_CHI_MINH_CITY, 5)
+
+    assert [payload[0].location_name for payload, _ in matches] == ["center", "2km", "8km", "12km", "hanoi"]
+
+
+@pytest.mark.parametrize("radius, limit", [(10, 100), (50, 2), (2000, 100), (1, 100)])
+def test_spatial_index_matches_the_elasticsearch_fallback(locations, radius, limit):
+    schema = LocationByRadiusQuery(user_lat=HO_CHI_MINH_CITY[0], user_long=HO_CHI_MINH_CITY[1], radius=radius, limit=limit)
+    es_repository = ElasticsearchRepository(FakeElasticsearch(locations))
+    indexed = LocationService(None, es_repository, None, loaded_index(locations), None)
+    fallback = LocationService(None, es_repository, None, SpatialIndex(), None)
+
+    from_index = indexed.search_nearby_location(schema)
+    from_elasticsearch = fallback.search_nearby_location(schema)
+
+    assert ids(from_index) == ids(from_elasticsearch)
+    assert [result.distance for result in from_index] == pytest.approx([result.distance for result in from_elasticsearch])
+    # same fields and opening status
+    assert [result.model_dump(exclude={"distance"}) for result in from_index] == [
+        result.model_dump(exclude={"distance"}) for result in from_elasticsearch
+    ]
@@ -0,0 +1,144 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+import pytz
+
+from app.constant.enum.status import LocationStatusEnum
+from app.util.elastic_query_builder import build_open_at_filter
+from app.util.working_hours import (
+    MINUTES_PER_DAY,
+    MINUTES_PER_WEEK,
+    StatusClock,
+    is_open,
+    local_week_minute,
+    opening_ranges,
+    timezones_by_week_minute,
+    utc_minute,
+)
+
+MONDAY, TUESDAY, SUNDAY = 1, 2, 7
+
+
+def working_day(day: int, open_time: str, close_time: str) -> SimpleNamespace:
+    return SimpleNamespace(day=day, open_time=datetime.time.fromisoformat(open_time), close_time=datetime.time.fromisoformat(close_time))
+
+
+def minute(day: int, time: str) -> int:
+    hour, minutes = map(int, time.split(":"))
+    return (day - 1) * MINUTES_PER_DAY + hour * 60 + minutes
+
+
+def utc(*args) -> datetime.datetime:
+    return datetime.datetime(*args, tzinfo=pytz.utc)
+
+
+def test_opening_ranges_of_a_day():
+    assert opening_ranges([working_day(TUESDAY, "08:00", "17:30")]) == [{"gte": minute(TUESDAY, "08:00"), "lte": minute(TUESDAY, "17:30")}]
+
+
+def test_overnight_range_closes_the_next_day():
+    assert opening_ranges([working_day(MONDAY, "22:00", "02:00")]) == [{"gte": minute(MONDAY, "22:00"), "lte": minute(TUESDAY, "02:00")}]
+
+
+def test_sunday_night_wraps_to_monday_morning():
+    ranges = opening_ranges([working_day(TUESDAY, "08:00", "17:00"), working_day(SUNDAY, "22:00", "02:00")])
+
+    assert ranges == [
+        {"gte": 0, "lte": minute(MONDAY, "02:00")},
+        {"gte": minute(TUESDAY, "08:00"), "lte": minute(TUESDAY, "17:00")},
+        {"gte": minute(SUNDAY, "22:00"), "lte": MINUTES_PER_WEEK - 1},
+    ]
+    assert is_open(ranges, minute(SUNDAY, "23:59"))
+    assert is_open(ranges, minute(MONDAY, "01:00"))
+    assert not is_open(ranges, minute(MONDAY, "02:01"))
+
+
+def test_ranges_are_inclusive():
+    ranges = opening_ranges([working_day(MONDAY, "08:00", "17:00")])
+
+    assert is_open(ranges, minute(MONDAY, "08:00"))
+    assert is_open(ranges, minute(MONDAY, "17:00"))
+    assert not is_open(ranges, minute(MONDAY, "07:59"))
+    assert not is_open(ranges, minute(MONDAY, "17:01"))
+
+
+@pytest.mark.parametrize(
+    "timezone, at, local",
+    [
+        # UTC+7, Sunday evening in UTC is already Monday
+        ("Asia/Ho_Chi_Minh", utc(2026, 1, 4, 17, 30), minute(MONDAY, "00:30")),
+        # UTC-8, Monday morning in UTC is still Sunday
+        ("America/Los_Angeles", utc(2026, 1, 5, 2, 0), minute(SUNDAY, "18:00")),
+        # half and quarter hour offsets
+        ("Asia/Kolkata", utc(2026, 1, 5, 0, 0), minute(MONDAY, "05:30")),
+        ("Asia/Kathmandu", utc(2026, 1, 5, 0, 0), minute(MONDAY, "05:45")),
+        # New York moves to daylight saving time on 2026-03-08 at 02:00
+        ("America/New_York", utc(2026, 3, 8, 6, 59), minute(SUNDAY, "01:59")),
+        ("America/New_York", utc(2026, 3, 8, 7, 0), minute(SUNDAY, "03:00")),
+        # UTC+14, the first timezone of the week
+        ("Pacific/Kiritimati", utc(2026, 1, 4, 10, 0), minute(MONDAY, "00:00")),
+    ],
+)
+def test_local_week_minute(timezone, at, local):
+    assert local_week_minute(timezone, at) == local
+
+
+def test_utc_minute_truncates_and_converts_to_utc():
+    assert utc_minute(datetime.datetime(2026, 1, 5, 8, 30, 59, 999)) == utc(2026, 1, 5, 8, 30)
+    assert utc_minute(pytz.timezone("Asia/Ho_Chi_Minh").localize(datetime.datetime(2026, 1, 5, 8, 30, 15))) == utc(2026, 1, 5, 1, 30)
+
+
+def test_timezones_are_grouped_by_their_local_minute():
+    at = utc(2026, 1, 4, 17, 30)
+
+    groups = timezones_by_week_minute(at)
+
+    minutes = [minute for minute, _ in groups]
+    assert minutes == sorted(set(minutes))
+    timezones = [timezone for _, group in groups for timezone in group]
+    assert sorted(timezones) == sorted(pytz.common_timezones)
+    for minute_of_week, group in groups:
+        assert {local_week_minute(timezone, at) for timezone in group} == {minute_of_week}
+    assert any({"Asia/Ho_Chi_Minh", "Asia/Bangkok"} <= set(group) for _, group in groups)
+
+
+def test_status_clock_uses_the_location_timezone():
+    # Monday 08:30 in Ho Chi Minh City, Monday 01:30 in UTC
+    clock = StatusClock(utc(2026, 1, 5, 1, 30))
+    ranges = opening_ranges([working_day(MONDAY, "08:00", "17:00")])
+
+    assert clock.status(ranges, "Asia/Ho_Chi_Minh") == LocationStatusEnum.OPEN
+    assert clock.status(ranges, None) == LocationStatusEnum.CLOSE
+    assert clock.status(None, "Asia/Ho_Chi_Minh") == LocationStatusEnum.CLOSE
+    assert clock.status([], "Asia/Ho_Chi_Minh") == LocationStatusEnum.CLOSE
+
+
+def matches_open_at_filter(open_at_filter: dict, timezone: str, ranges: list[dict]) -> bool:
+    """Evaluate the filter like Elasticsearch, ``opening_hours`` is an ``integer_range`` field."""
+    for clause in open_at_filter["bool"]["should"]:
+        terms, term = clause["bool"]["filter"]
+        if timezone in terms["terms"]["timezone"] and is_open(ranges, term["term"]["opening_hours"]):
+            return True
+    return False
+
+
+@pytest.mark.parametrize(
+    "at",
+    [
+        utc(2026, 1, 5, 1, 30),
+        # Sunday 23:00 in Ho Chi Minh City, in the range wrapping to Monday
+        utc(2026, 1, 4, 16, 0),
+        # Monday 01:30 in Ho Chi Minh City, the other side of the wrap
+        utc(2026, 1, 4, 18, 30),
+        utc(2026, 1, 5, 12, 0),
+        utc(2026, 3, 8, 7, 0),
+    ],
+)
+@pytest.mark.parametrize("timezone", ["Asia/Ho_Chi_Minh", "Asia/Kolkata", "America/New_York", "Europe/Berlin"])
+def test_open_at_filter_agrees_with_the_status_clock(at, timezone):
+    ranges = opening_ranges([working_day(MONDAY, "08:00", "17:00"), working_day(SUNDAY, "22:00", "02:00")])
+
+    expected = StatusClock(at).status(ranges, timezone) == LocationStatusEnum.OPEN
+
+    assert matches_open_at_filter(build_open_at_filter(at), timezone, ranges) == expected